@@ -1,49 +1,182 @@
 """
 This module contains routing functions implementing the web API.
 """
-from typing import Optional
+import asyncio
+from typing import Callable, Optional, TypeVar
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 import database
-from game.pathfinding import follow_parent_pointers, multi_target_bfs, bidi_bfs
-from game.utilities import id_to_title, title_to_id
-from .schemas import ArticlePath, ArticleWrapper, ManyArticlePaths
+from game.completion import (
+    DEFAULT_COMPLETIONS,
+    TitleCompletions,
+    complete_titles,
+    get_completions,
+)
+from game.labeling import DistanceLabels, get_labels
+from game.landmarks import Landmarks, get_landmarks
+from game.limits import SearchCutOff, SearchLimits
+from game.pathfinding import (
+    bidi_bfs,
+    click_distance,
+    follow_parent_pointers,
+    is_reachable,
+    targeted_bfs,
+)
+from game.reachability import ReachabilityIndex, get_reachability
+from game.result_cache import Outcome, ResultCache, cached_path_query, get_result_cache
+from game.tree_cache import TreeCache, get_tree_cache
+from game.utilities import TitleIndex, get_title_index, ids_for_titles, titles_for_ids
+from .schemas import (
+    ArticleCompletions,
+    ArticleDistance,
+    ArticlePath,
+    ArticleReachability,
+    ArticleWrapper,
+    ManyArticlePaths,
+)
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+# largest number of completions a client may ask for
+MAX_COMPLETIONS = 100
+
+# how often a running search checks whether its client has disconnected, in seconds
+DISCONNECT_POLL_SECONDS = 0.1
+
+_CUT_OFF_RESPONSE = {status.HTTP_503_SERVICE_UNAVAILABLE: {"msg": str}}
+
+
+def _get_landmarks(
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+) -> Optional[Landmarks]:
+    return None if graph is None else get_landmarks(graph)
+
+
+def _get_result_cache() -> ResultCache:
+    return get_result_cache()
+
+
+def _get_labels(
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+) -> Optional[DistanceLabels]:
+    return None if graph is None else get_labels(graph)
+
+
+def _get_reachability(
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+) -> Optional[ReachabilityIndex]:
+    return None if graph is None else get_reachability(graph)
+
+
+def _get_completions(
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+) -> Optional[TitleCompletions]:
+    return None if graph is None else get_completions(graph)
+
+
+def _get_limits(
+    max_expansions: Optional[int] = Query(
+        None, ge=1, description="largest number of articles the search may expand"
+    ),
+    deadline: Optional[float] = Query(
+        None, gt=0, description="seconds after which the search is cut off"
+    ),
+) -> SearchLimits:
+    return SearchLimits(max_expansions, deadline)
+
+
+async def _run_search(request: Request, limits: SearchLimits, search: Callable[[], T]) -> T:
+    """
+    Run ``search`` in a worker thread, cancelling it through ``limits`` if the client
+    disconnects before it finishes.
+
+    :raises HTTPException: with status 503 if the search is cut off by its limits
+    """
+    task = asyncio.ensure_future(run_in_threadpool(search))
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if not task.done() and await request.is_disconnected():
+            limits.cancel()
+            break
+    try:
+        return await task
+    except SearchCutOff as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+def _get_snapshot() -> Optional[database.GraphSnapshot]:
+    return database.get_snapshot()
+
+
+def _get_titles(
+    snapshot: Optional[database.GraphSnapshot] = Depends(_get_snapshot),
+) -> Optional[TitleIndex]:
+    return None if snapshot is None else get_title_index(snapshot)
+
 
 @router.get(
     "/single",
     summary="Paths From One Start to One Endpoint",
-    responses={status.HTTP_404_NOT_FOUND: {"msg": str}},
+    responses={status.HTTP_404_NOT_FOUND: {"msg": str}, **_CUT_OFF_RESPONSE},
     response_model=ArticlePath,
 )
 async def path_from_src_to_dst(
+    request: Request,
     src: str = Query(..., description="starting article"),
     dst: str = Query(..., description="destination article"),
     db: Session = Depends(database.get_db),
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+    landmarks: Optional[Landmarks] = Depends(_get_landmarks),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+    result_cache: ResultCache = Depends(_get_result_cache),
+    reachability: Optional[ReachabilityIndex] = Depends(_get_reachability),
+    limits: SearchLimits = Depends(_get_limits),
+    titles: Optional[TitleIndex] = Depends(_get_titles),
 ):
     """
     Find a path of articles which minimizes the number of clicks starting from ``src``
-    and ending at ``dst``.
+    and ending at ``dst``. Searches cut off by ``max_expansions`` or ``deadline`` fail with
+    status 503, and their results are not cached.
     """
-    try:
-        path = bidi_bfs(db, src, dst)
-    except ValueError:
+    result = await _run_search(
+        request,
+        limits,
+        lambda: cached_path_query(
+            db,
+            result_cache,
+            src,
+            dst,
+            lambda: bidi_bfs(
+                db,
+                src,
+                dst,
+                graph=graph,
+                landmarks=landmarks,
+                tree_cache=tree_cache,
+                reachability=reachability,
+                limits=limits,
+            ),
+            titles,
+            graph,
+        ),
+    )
+    if result.outcome is Outcome.UNKNOWN_TITLE:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Could not find matching article for at least one of {src} and {dst}",
         )
-    if path is None:
+    if result.articles is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No path found between {src} and {dst}",
         )
     article_path = []
-    for article_title in path:
-        article_id = title_to_id(db, article_title)
+    for article_id, article_title in result.articles:
         article_url = f"https://en.wikipedia.org/?curid={article_id}"
         article_path.append(
             ArticleWrapper(
@@ -56,35 +189,176 @@ async def path_from_src_to_dst(
 
 
 @router.get(
-    "/many", summary="Paths from One Start To Many Endpoints", response_model=ManyArticlePaths
+    "/many",
+    summary="Paths from One Start To Many Endpoints",
+    responses={status.HTTP_404_NOT_FOUND: {"msg": str}, **_CUT_OFF_RESPONSE},
+    response_model=ManyArticlePaths,
 )
 async def paths_from_src(
+    request: Request,
     src: str = Query(..., description="starting article"),
     dsts: list[str] = Query(..., description="destination articles"),
     db: Session = Depends(database.get_db),
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+    limits: SearchLimits = Depends(_get_limits),
+    titles: Optional[TitleIndex] = Depends(_get_titles),
+    snapshot: Optional[database.GraphSnapshot] = Depends(_get_snapshot),
 ):
     """
     Find a shortest path from ``src`` to each destination in ``dsts``, where a shortest path
     minimizes the number of clicks between two articles.
     """
     paths: dict[str, Optional[ArticlePath]] = {}
-    ppd = multi_target_bfs(db, src)
-    for dst in dsts:
-        dst_id = title_to_id(db, dst)
-        path = follow_parent_pointers(dst_id, ppd)
+    try:
+        dst_ids = dict(zip(dsts, ids_for_titles(db, dsts, titles)))
+        ppd = await _run_search(
+            request,
+            limits,
+            lambda: targeted_bfs(
+                db,
+                src,
+                list(dst_ids.values()),
+                graph=graph,
+                tree_cache=tree_cache,
+                limits=limits,
+            ),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not find matching article for at least one of {src} and {dsts}",
+        )
+    id_paths = {dst: follow_parent_pointers(dst_id, ppd) for dst, dst_id in dst_ids.items()}
+    article_ids = list({article_id for path in id_paths.values() for article_id in path or ()})
+    article_titles = dict(zip(article_ids, titles_for_ids(db, article_ids, snapshot)))
+    for dst, path in id_paths.items():
         if path is None:
             paths[dst] = None
             continue
         article_path = []
         for article_id in path:
-            article_title = id_to_title(db, article_id)
             article_url = f"https://en.wikipedia.org/?curid={article_id}"
             article_path.append(
                 ArticleWrapper(
                     id=article_id,
-                    title=article_title,
+                    title=article_titles[article_id],
                     link=article_url,  # type: ignore
                 )
             )
         paths[dst] = ArticlePath(articles=article_path)
     return ManyArticlePaths(paths=paths)
+
+
+@router.get(
+    "/distance",
+    summary="Number of Clicks From One Start to One Endpoint",
+    responses={status.HTTP_404_NOT_FOUND: {"msg": str}, **_CUT_OFF_RESPONSE},
+    response_model=ArticleDistance,
+)
+async def distance_from_src_to_dst(
+    request: Request,
+    src: str = Query(..., description="starting article"),
+    dst: str = Query(..., description="destination article"),
+    db: Session = Depends(database.get_db),
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+    labels: Optional[DistanceLabels] = Depends(_get_labels),
+    reachability: Optional[ReachabilityIndex] = Depends(_get_reachability),
+    limits: SearchLimits = Depends(_get_limits),
+):
+    """
+    Find the number of clicks on a shortest path starting from ``src`` and ending at ``dst``,
+    without finding the path itself.
+    """
+    try:
+        clicks = await _run_search(
+            request,
+            limits,
+            lambda: click_distance(
+                db,
+                src,
+                dst,
+                graph=graph,
+                labels=labels,
+                reachability=reachability,
+                limits=limits,
+            ),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not find matching article for at least one of {src} and {dst}",
+        )
+    if clicks is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No path found between {src} and {dst}",
+        )
+    return ArticleDistance(src=src, dst=dst, clicks=clicks)
+
+
+@router.get(
+    "/reachable",
+    summary="Whether Any Path Leads From One Start to One Endpoint",
+    responses={status.HTTP_404_NOT_FOUND: {"msg": str}, **_CUT_OFF_RESPONSE},
+    response_model=ArticleReachability,
+)
+async def reachable_from_src(
+    request: Request,
+    src: str = Query(..., description="starting article"),
+    dst: str = Query(..., description="destination article"),
+    db: Session = Depends(database.get_db),
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+    reachability: Optional[ReachabilityIndex] = Depends(_get_reachability),
+    limits: SearchLimits = Depends(_get_limits),
+):
+    """
+    Find whether any path of articles starts from ``src`` and ends at ``dst``, which the
+    reachability index usually answers without a search.
+    """
+    try:
+        reachable = await _run_search(
+            request,
+            limits,
+            lambda: is_reachable(
+                db, src, dst, graph=graph, reachability=reachability, limits=limits
+            ),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Could not find matching article for at least one of {src} and {dst}",
+        )
+    return ArticleReachability(src=src, dst=dst, reachable=reachable)
+
+
+@router.get(
+    "/titles",
+    summary="Titles of Articles Starting With a Prefix",
+    response_model=ArticleCompletions,
+)
+async def complete_prefix(
+    prefix: str = Query(..., description="typed start of the titles, in any case"),
+    limit: int = Query(
+        DEFAULT_COMPLETIONS, ge=1, le=MAX_COMPLETIONS, description="largest number of titles"
+    ),
+    ranked: bool = Query(False, description="whether to list the most linked articles first"),
+    db: Session = Depends(database.get_db),
+    graph: Optional[database.CSRGraph] = Depends(database.get_graph),
+    completions: Optional[TitleCompletions] = Depends(_get_completions),
+    snapshot: Optional[database.GraphSnapshot] = Depends(_get_snapshot),
+):
+    """
+    Complete the titles of articles starting with ``prefix``, ignoring case, for offering
+    articles to start and end at as players type.
+    """
+    titles = complete_titles(
+        db,
+        prefix,
+        limit,
+        graph=graph,
+        completions=completions,
+        snapshot=snapshot,
+        ranked=ranked,
+    )
+    return ArticleCompletions(prefix=prefix, titles=titles)
@@ -27,3 +27,26 @@ class ManyArticlePaths(BaseModel):
     """
 
     paths: dict[str, Optional[ArticlePath]]
+
+
+class ArticleDistance(BaseModel):
+    """The number of clicks on a shortest path between two articles."""
+
+    src: str
+    dst: str
+    clicks: int = Field(ge=0)
+
+
+class ArticleReachability(BaseModel):
+    """Whether any path of links leads from one article to another."""
+
+    src: str
+    dst: str
+    reachable: bool
+
+
+class ArticleCompletions(BaseModel):
+    """The titles of articles starting with a typed prefix."""
+
+    prefix: str
+    titles: list[str]
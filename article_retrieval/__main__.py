@@ -1,10 +1,154 @@
 #!/usr/bin/env python3
 """Constructs article graph."""
-from database import clear_db
-from database.constants import engine
-from .database_builder import populate_db
+import os
+from typing import Optional
+
+import typer
+
+from database import GraphSnapshot, Session, bump_graph_version, clear_db
+from database.constants import Base, engine
+from database.snapshot import SNAPSHOT_PATH, build_snapshot
+from game.completion import TitleCompletions
+from game.labeling import LABELS_PATH
+from game.landmarks import LANDMARKS_PATH
+from game.reachability import ReachabilityIndex
+from .bulk_writer import DEFAULT_BATCH_SIZE, IngestStats
+from .database_builder import DEFAULT_FETCH_WORKERS, populate_db
+from .dumps import load_dumps
+from .updates import (
+    LinkChanges,
+    pages_from_api,
+    pages_from_xml_dump,
+    read_change_list,
+    update_links,
+)
+from .xml_dumps import load_xml_dump
+
+
+def main(
+    page_dump: Optional[str] = typer.Option(
+        None, help="Build the graph offline from this page.sql(.gz) dump instead of the API"
+    ),
+    pagelinks_dump: Optional[str] = typer.Option(None, help="pagelinks.sql(.gz) dump"),
+    redirect_dump: Optional[str] = typer.Option(None, help="redirect.sql(.gz) dump"),
+    linktarget_dump: Optional[str] = typer.Option(
+        None, help="linktarget.sql(.gz) dump, needed by pagelinks dumps which use link targets"
+    ),
+    xml_dump: Optional[str] = typer.Option(
+        None, help="Build the graph offline from this pages-articles.xml(.bz2) dump instead"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help="Number of processes extracting links from the XML dump, or of threads fetching "
+        "pages from the API",
+    ),
+    batch_size: int = typer.Option(
+        DEFAULT_BATCH_SIZE, min=1, help="Number of rows inserted at a time"
+    ),
+    update: bool = typer.Option(
+        False,
+        help="Update the links of changed pages in the existing graph instead of rebuilding "
+        "it, reading pages from --xml-dump if given and from the API otherwise",
+    ),
+    changes: Optional[str] = typer.Option(
+        None, help="With --update, file listing the titles of changed pages, one per line"
+    ),
+    resume: bool = typer.Option(
+        False, help="Continue an interrupted crawl of the API from its last checkpoint"
+    ),
+) -> None:
+    """
+    Construct the article graph, by crawling the Wikipedia API or from local SQL or XML dumps,
+    or update it incrementally, and build the graph snapshot and indexes derived from it.
+    """
+    if (page_dump is None) != (pagelinks_dump is None):
+        typer.echo("--page-dump and --pagelinks-dump must be given together", err=True)
+        raise typer.Exit(code=1)
+    if page_dump is not None and xml_dump is not None:
+        typer.echo("Only one of --page-dump and --xml-dump may be given", err=True)
+        raise typer.Exit(code=1)
+    if update and (page_dump is not None or (xml_dump is None and changes is None)):
+        typer.echo("--update needs --changes, --xml-dump or both", err=True)
+        raise typer.Exit(code=1)
+    if changes is not None and not update:
+        typer.echo("--changes may only be given with --update", err=True)
+        raise typer.Exit(code=1)
+    if resume and (update or page_dump is not None or xml_dump is not None):
+        typer.echo("--resume may only be given when crawling the API", err=True)
+        raise typer.Exit(code=1)
+
+    def report(stats: IngestStats) -> None:
+        typer.echo(
+            f"{stats.table}: {stats.rows} rows in {stats.seconds:.1f}s "
+            f"({stats.rows_per_second:.0f} rows/s)",
+            err=True,
+        )
+
+    if update:
+        titles = None if changes is None else read_change_list(changes)
+        if xml_dump is None:
+            pages = pages_from_api(titles or [])
+        else:
+            pages = pages_from_xml_dump(xml_dump, titles, workers)
+
+        def report_changes(stats: LinkChanges) -> None:
+            typer.echo(
+                f"{stats.pages} pages: {stats.added} links added, {stats.removed} removed",
+                err=True,
+            )
+
+        with Session() as db:
+            update_links(db, pages, report=report_changes)
+        _build_views()
+        # running processes only see the rebuilt views once results cached while they were
+        # rebuilt are invalidated
+        with Session() as db:
+            bump_graph_version(db)
+            db.commit()
+        return
+    if resume:
+        Base.metadata.create_all(bind=engine)
+    else:
+        clear_db(engine)
+    if xml_dump is not None:
+        with Session() as db:
+            load_xml_dump(db, xml_dump, workers, batch_size=batch_size, report=report)
+    elif page_dump is None:
+        populate_db(
+            batch_size=batch_size,
+            resume=resume,
+            workers=workers or DEFAULT_FETCH_WORKERS,
+            report=report,
+        )
+    else:
+        # given along with page_dump, as checked above
+        assert pagelinks_dump is not None
+        with Session() as db:
+            load_dumps(
+                db,
+                page_dump,
+                pagelinks_dump,
+                redirect_path=redirect_dump,
+                linktarget_path=linktarget_dump,
+                batch_size=batch_size,
+                report=report,
+            )
+    _build_views()
+
+
+def _build_views() -> None:
+    """Build the graph snapshot and the indexes derived from it from the database."""
+    # labels and landmarks are too slow to rebuild with the graph, and wrong once links change,
+    # so they are removed before the new snapshot is mapped until rebuilt with `python -m game`
+    for path in (LABELS_PATH, LANDMARKS_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+    with Session() as db:
+        graph = build_snapshot(db)
+    ReachabilityIndex.from_graph(graph).save()
+    TitleCompletions.from_snapshot(GraphSnapshot(SNAPSHOT_PATH)).save()
 
 
 if __name__ == "__main__":
-    clear_db(engine)
-    populate_db()
+    typer.run(main)
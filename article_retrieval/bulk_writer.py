@@ -0,0 +1,159 @@
+"""
+This module contains a writer which loads the rows of the article graph into the database in
+bulk, for use while the graph is constructed.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from sqlalchemy import Table, delete, insert, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from database import Article, Link, Redirect
+
+__all__ = ["DEFAULT_BATCH_SIZE", "DEFAULT_CACHE_KIB", "IngestStats", "BulkWriter"]
+
+# number of rows inserted into the database at a time
+DEFAULT_BATCH_SIZE = 50_000
+# size of the page cache of the connection writing rows, in KiB
+DEFAULT_CACHE_KIB = 1 << 20
+
+# tables whose secondary indexes are dropped while rows are written and created afterwards
+_INDEXED_TABLES = (Article.__table__, Link.__table__, Redirect.__table__)
+
+
+@dataclass
+class IngestStats:
+    """The rows read from one source, or written to one table, while building the graph."""
+
+    table: str
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """The number of rows read or written per second."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class BulkWriter:
+    """
+    Inserts rows into the article graph database in large batches of ``executemany`` inserts,
+    over one connection which does not check foreign keys and, unless the writer is durable,
+    does not journal or sync.
+
+    Secondary indexes of the graph tables are dropped when the writer is entered and created
+    again when it exits, after which foreign keys are checked, so that indexes are built once
+    rather than updated for every row. Rows which duplicate a key already written are ignored,
+    and rows which refer to missing rows are deleted and counted under "dangling" in stats.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        report: Optional[Callable[[IngestStats], None]] = None,
+        cache_kib: int = DEFAULT_CACHE_KIB,
+        durable: bool = False,
+    ) -> None:
+        """
+        :param engine: engine of the database to write to
+        :param batch_size: number of rows of a table inserted at a time
+        :param report: if provided, called with the rows written to a table after every batch
+        :param cache_kib: size of the page cache of the connection writing rows, in KiB
+        :param durable: whether to keep journaling and syncing, so that written batches survive
+                        a crash and the database is not corrupted by one
+        """
+        self.engine = engine
+        self.batch_size = batch_size
+        self.report = report
+        self.cache_kib = cache_kib
+        self.durable = durable
+        self.stats: dict[str, IngestStats] = {}
+        self._rows: dict[Table, list[dict]] = {}
+        self._connection: Optional[Connection] = None
+        self._pragmas: dict[str, object] = {}
+        self._start = 0.0
+
+    def __enter__(self) -> "BulkWriter":
+        self._connection = self.engine.connect()
+        build_pragmas: dict[str, object] = {
+            "cache_size": -self.cache_kib,
+            "temp_store": "MEMORY",
+            "foreign_keys": "OFF",
+        }
+        if not self.durable:
+            build_pragmas.update(journal_mode="OFF", synchronous="OFF")
+        for name, value in build_pragmas.items():
+            self._pragmas[name] = self._connection.execute(text(f"PRAGMA {name}")).scalar()
+            self._connection.execute(text(f"PRAGMA {name}={value}"))
+        for table in _INDEXED_TABLES:
+            for index in table.indexes:
+                index.drop(bind=self._connection, checkfirst=True)  # type: ignore
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        assert self._connection is not None
+        try:
+            if exc_type is None:
+                self.flush()
+            for table in _INDEXED_TABLES:
+                for index in table.indexes:
+                    index.create(bind=self._connection, checkfirst=True)  # type: ignore
+            if exc_type is None:
+                violations = self._connection.execute(text("PRAGMA foreign_key_check")).all()
+                if violations:
+                    self._delete_dangling()
+                    self._count("dangling", len(violations))
+        finally:
+            for name, value in self._pragmas.items():
+                self._connection.execute(text(f"PRAGMA {name}={value}"))
+            self._connection.close()
+            self._connection = None
+
+    def add(self, table: Union[Table, type], row: dict) -> None:
+        """
+        Buffer ``row`` to be inserted into ``table``, inserting the buffered rows of the table
+        once there are batch_size of them.
+
+        :param table: table, or model of the table, to insert into
+        :param row: value of each column of the row
+        """
+        target: Table = getattr(table, "__table__", table)
+        rows = self._rows.setdefault(target, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self._write(target, rows)
+
+    def flush(self) -> None:
+        """Insert every buffered row."""
+        for table, rows in self._rows.items():
+            self._write(table, rows)
+
+    def _delete_dangling(self) -> None:
+        """Delete the rows of the graph tables which refer to rows missing from another."""
+        assert self._connection is not None
+        with self._connection.begin():
+            for table in _INDEXED_TABLES:
+                dangling = [fk.parent.not_in(select(fk.column)) for fk in table.foreign_keys]
+                if dangling:
+                    self._connection.execute(delete(table).where(or_(*dangling)))
+
+    def _write(self, table: Table, rows: list[dict]) -> None:
+        """Insert ``rows`` into ``table`` in one transaction, and clear rows."""
+        if not rows:
+            return
+        assert self._connection is not None, "BulkWriter used outside of a with block"
+        with self._connection.begin():
+            self._connection.execute(insert(table).prefix_with("OR IGNORE"), rows)
+        self._count(table.name, len(rows))
+        rows.clear()
+
+    def _count(self, name: str, rows: int) -> None:
+        """Add ``rows`` to the stats under ``name``, and report them if a report is given."""
+        stats = self.stats.setdefault(name, IngestStats(name))
+        stats.rows += rows
+        stats.seconds = time.perf_counter() - self._start
+        if self.report is not None:
+            self.report(stats)
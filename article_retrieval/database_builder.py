@@ -1,46 +1,220 @@
 """
 This module contains methods used for populating and constructing the article graph database.
 """
-from typing import Iterable, cast
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, cast
 
 import pywikibot  # type: ignore
 from pywikibot.pagegenerators import PreloadingGenerator  # type: ignore
 from sqlalchemy.orm import Session as SessionTy
 
-from database import Article, Link, Session
+from database import (
+    Article,
+    Link,
+    Metadata,
+    Redirect,
+    Session,
+    bump_graph_version,
+    collapse_redirects,
+)
+from .bulk_writer import DEFAULT_BATCH_SIZE, BulkWriter, IngestStats
 
-__all__ = ["populate_db"]
+__all__ = [
+    "CRAWL_CURSOR_KEY",
+    "BUILD_STATE_KEY",
+    "DEFAULT_CHECKPOINT_PAGES",
+    "DEFAULT_FETCH_WORKERS",
+    "populate_db",
+    "get_build_state",
+]
 
+# metadata keys of the title of the last page whose rows were committed by a crawl, and of
+# whether the crawl is in progress or complete
+CRAWL_CURSOR_KEY = "crawl_cursor"
+BUILD_STATE_KEY = "build_state"
+CRAWLING = "crawling"
+COMPLETE = "complete"
+# number of pages crawled between checkpoints
+DEFAULT_CHECKPOINT_PAGES = 1_000
+# number of threads fetching pages at once
+DEFAULT_FETCH_WORKERS = 8
 
-def populate_db(session: SessionTy = None) -> None:
+
+@dataclass
+class _FetchedPage:
+    """A page fetched from the wiki."""
+
+    id: int
+    title: str
+    # id and title of each page the page links to
+    links: list[tuple[int, str]]
+    redirect: bool = False
+    # id and title of the page a redirect leads to, if that page exists
+    target: Optional[tuple[int, str]] = None
+
+
+def populate_db(
+    session: SessionTy = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = False,
+    site: Optional[pywikibot.site.BaseSite] = None,
+    checkpoint_pages: int = DEFAULT_CHECKPOINT_PAGES,
+    workers: int = DEFAULT_FETCH_WORKERS,
+    report: Optional[Callable[[IngestStats], None]] = None,
+) -> None:
     """
     Populate the database which ``session`` can modify to act as a graph, with articles
     as nodes and links between articles as uni-directional edges.
 
+    Redirect pages are recorded as redirects rather than articles, and collapsed out of the
+    graph once every page has been added, so that links to a redirect lead to its target.
+
+    Pages are crawled in order of title, and after every checkpoint_pages pages their rows are
+    committed along with the title of the last of them, so that a crawl which is interrupted
+    can be resumed from the last checkpoint rather than started over.
+
+    The links of pages are fetched by a pool of worker threads, with a bounded number of pages
+    in flight at once, while the calling thread writes the fetched pages in order of title.
+
+    The graph version is bumped both before and after populating, so that results cached for
+    the graph before or while it is populated are not used afterwards.
+
     :param session: database session
+    :param batch_size: number of rows inserted into the database at a time
+    :param resume: whether to continue the crawl recorded in the database from its last
+                   checkpoint, rather than crawling from the first page; if that crawl is
+                   complete, nothing is done
+    :param site: site to crawl; defaults to the English Wikipedia
+    :param checkpoint_pages: number of pages crawled between checkpoints
+    :param workers: number of threads fetching pages at once
+    :param report: if provided, called with the pages fetched so far at every checkpoint, and
+                   with the rows written to each table after every batch
     """
     if session is None:
         session = Session()
-    site = pywikibot.Site("en")
-    added_pages: set[int] = set()
-    all_pages = site.allpages()
-    for _page in PreloadingGenerator(all_pages):
-        page = cast(pywikibot.Page, _page)
-        if page.pageid not in added_pages:
-            session.add(Article(id=page.pageid, title=page.title()))
-            added_pages.add(page.pageid)
-        linked_pages: set[Article] = {
-            Article(id=linked.pageid, title=linked.title())
-            for linked in cast(Iterable[pywikibot.Page], page.linkedPages())
-            if linked.pageid not in added_pages
-        }
-        links: set[Link] = {
-            Link(src=page.pageid, dst=linked.pageid)
+    cursor = None
+    if resume:
+        if get_build_state(session) == COMPLETE:
+            return
+        cursor = _get_metadata(session, CRAWL_CURSOR_KEY)
+    bump_graph_version(session)
+    _set_metadata(session, BUILD_STATE_KEY, CRAWLING)
+    session.commit()
+    if site is None:
+        site = pywikibot.Site("en")
+    # allpages starts at the cursor itself, whose rows were committed with it
+    all_pages = site.allpages() if cursor is None else site.allpages(start=cursor)
+    pages = (
+        cast(pywikibot.Page, page)
+        for page in PreloadingGenerator(all_pages)
+        if page.title() != cursor
+    )
+    stats = IngestStats("fetched pages")
+    start = time.perf_counter()
+    with BulkWriter(session.get_bind(), batch_size, report, durable=True) as writer:
+        for page in _fetch_pages(pages, workers):
+            _write_page(writer, page)
+            stats.rows += 1
+            if stats.rows % checkpoint_pages == 0:
+                _checkpoint(session, writer, page.title, stats, start, report)
+        if stats.rows % checkpoint_pages:
+            _checkpoint(session, writer, page.title, stats, start, report)
+    collapse_redirects(session)
+    _set_metadata(session, BUILD_STATE_KEY, COMPLETE)
+    bump_graph_version(session)
+    session.commit()
+
+
+def get_build_state(session: SessionTy) -> Optional[str]:
+    """
+    :param session: database session
+    :return: whether the crawl which populated the database is ``"crawling"`` or ``"complete"``,
+            or None if the database was not populated by a crawl
+    """
+    return _get_metadata(session, BUILD_STATE_KEY)
+
+
+def _checkpoint(
+    session: SessionTy,
+    writer: BulkWriter,
+    title: str,
+    stats: IngestStats,
+    start: float,
+    report: Optional[Callable[[IngestStats], None]],
+) -> None:
+    """Commit the rows of the pages crawled up to the page titled ``title``, and its title."""
+    writer.flush()
+    _set_metadata(session, CRAWL_CURSOR_KEY, title)
+    session.commit()
+    if report is not None:
+        stats.seconds = time.perf_counter() - start
+        report(stats)
+
+
+def _get_metadata(session: SessionTy, key: str) -> Optional[str]:
+    metadata = session.query(Metadata).get(key)
+    return None if metadata is None else metadata.value
+
+
+def _set_metadata(session: SessionTy, key: str, value: str) -> None:
+    session.merge(Metadata(key=key, value=value))
+
+
+def _fetch_pages(pages: Iterable[pywikibot.Page], workers: int) -> Iterator[_FetchedPage]:
+    """
+    Fetch ``pages`` in a pool of worker threads, with at most twice as many pages in flight as
+    there are workers, so that pages are read only as fast as they are fetched.
+
+    :return: an iterator over the fetched pages, in the order of pages
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight: deque[Future] = deque()
+        for page in pages:
+            in_flight.append(executor.submit(_fetch_page, page))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def _fetch_page(page: pywikibot.Page) -> _FetchedPage:
+    """:return: ``page`` with the pages it links to, or the page it redirects to"""
+    if not page.isRedirectPage():
+        links = [
+            (linked.pageid, linked.title())
             for linked in cast(Iterable[pywikibot.Page], page.linkedPages())
-        }
-        for linked_page in linked_pages:
-            session.add(linked_page)
-            added_pages.add(linked_page.id)
-        for link in links:
-            session.add(link)
-        session.commit()
+        ]
+        return _FetchedPage(page.pageid, page.title(), links)
+    try:
+        target = cast(pywikibot.Page, page.getRedirectTarget())
+        exists = target.exists()
+    except pywikibot.exceptions.Error:
+        exists = False
+    return _FetchedPage(
+        page.pageid,
+        page.title(),
+        [],
+        redirect=True,
+        target=(target.pageid, target.title()) if exists else None,
+    )
+
+
+def _write_page(writer: BulkWriter, page: _FetchedPage) -> None:
+    """
+    Add ``page`` as an article with its links, adding the articles it links to if they have not
+    been added, or record that it redirects to another article, adding the article if it has
+    not been added. Redirects whose target does not exist are ignored.
+    """
+    if page.redirect:
+        if page.target is not None:
+            target_id, target_title = page.target
+            writer.add(Article, {"id": target_id, "title": target_title})
+            writer.add(Redirect, {"id": page.id, "title": page.title, "target": target_id})
+        return
+    writer.add(Article, {"id": page.id, "title": page.title})
+    for linked_id, linked_title in page.links:
+        writer.add(Article, {"id": linked_id, "title": linked_title})
+        writer.add(Link, {"src": page.id, "dst": linked_id})
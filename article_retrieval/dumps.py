@@ -0,0 +1,317 @@
+"""
+This module contains the population of the article graph database from locally downloaded
+Wikipedia SQL dumps, as an offline alternative to crawling the live API.
+
+Dumps are streamed one ``INSERT`` statement at a time, so that only the rows of a single
+statement are held in memory, and only pages in the main namespace become articles.
+"""
+import gzip
+import re
+import time
+from typing import Callable, Iterator, Optional, Sequence, TextIO
+
+from sqlalchemy.orm import Session as SessionTy
+
+from database import Article, Link, Redirect, bump_graph_version, collapse_redirects
+from .bulk_writer import DEFAULT_BATCH_SIZE, BulkWriter, IngestStats
+
+__all__ = [
+    "ARTICLE_NAMESPACE",
+    "dump_columns",
+    "dump_rows",
+    "load_dumps",
+]
+
+# namespace of articles, as opposed to talk pages, user pages, templates, etc.
+ARTICLE_NAMESPACE = 0
+
+_CREATE_TABLE = re.compile(r"CREATE TABLE `(\w+)`")
+_COLUMN = re.compile(r"\s*`(\w+)`")
+_INSERT = re.compile(r"INSERT INTO `\w+` VALUES ")
+_VALUE = re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'|(NULL)|([^,()']+)")
+_ESCAPE = re.compile(r"\\(.)")
+_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+def dump_columns(path: str) -> list[str]:
+    """
+    :param path: path of a SQL dump of one table, which may be compressed with gzip
+    :return: the names of the columns of the table, in order
+    :raises ValueError: if the dump does not create a table before inserting into it
+    """
+    with _open_dump(path) as dump:
+        return _read_columns(dump)
+
+
+def dump_rows(path: str, columns: Sequence[str]) -> Iterator[tuple]:
+    """
+    Stream the rows inserted by a SQL dump of one table.
+
+    :param path: path of a SQL dump of one table, which may be compressed with gzip
+    :param columns: names of the columns to read
+    :return: an iterator over the values of the columns of each row, in the order of columns;
+            strings are decoded and unescaped, numbers are parsed, and NULL is None
+    :raises ValueError: if the table lacks any of the columns, or a statement is malformed
+    """
+    with _open_dump(path) as dump:
+        names = _read_columns(dump)
+        missing = [column for column in columns if column not in names]
+        if missing:
+            raise ValueError(f"Dump {path} has no columns {missing}, only {names}")
+        positions = [names.index(column) for column in columns]
+        for line in dump:
+            match = _INSERT.match(line)
+            if match is None:
+                continue
+            for row in _parse_rows(line, match.end()):
+                yield tuple(row[position] for position in positions)
+
+
+def load_dumps(
+    session: SessionTy,
+    page_path: str,
+    pagelinks_path: str,
+    redirect_path: Optional[str] = None,
+    linktarget_path: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report: Optional[Callable[[IngestStats], None]] = None,
+) -> None:
+    """
+    Populate the database which ``session`` can modify from the page, pagelinks and redirect
+    dumps of a wiki, with pages in the main namespace as articles and links between them as
+    edges. Redirects are collapsed out of the graph as they are by ``populate_db``.
+
+    The graph version is bumped both before and after populating, so that results cached for
+    the graph before or while it is populated are not used afterwards.
+
+    :param session: database session
+    :param page_path: path of the page dump
+    :param pagelinks_path: path of the pagelinks dump
+    :param redirect_path: path of the redirect dump; if not provided, redirect pages are kept
+                          as ordinary articles
+    :param linktarget_path: path of the linktarget dump, which is needed if the pagelinks dump
+                            refers to link targets by id rather than by title
+    :param batch_size: number of rows inserted into the database at a time
+    :param report: if provided, called with the progress through each dump after every
+                   batch_size rows read and once the dump has been read, and with the rows
+                   written to each table after every batch
+    :raises ValueError: if a dump does not have the expected columns
+    """
+    bump_graph_version(session)
+    session.commit()
+    with BulkWriter(session.get_bind(), batch_size, report) as writer:
+        title_ids, redirect_titles = _load_pages(writer, page_path, report)
+        if redirect_path is not None:
+            _load_redirects(writer, redirect_path, title_ids, redirect_titles, report)
+        del redirect_titles
+        _load_links(writer, pagelinks_path, linktarget_path, title_ids, report)
+    collapse_redirects(session)
+    bump_graph_version(session)
+    session.commit()
+
+
+def _load_pages(
+    writer: BulkWriter,
+    path: str,
+    report: Optional[Callable[[IngestStats], None]],
+) -> tuple[dict[str, int], dict[int, str]]:
+    """
+    Add the pages in the main namespace of the page dump at ``path`` as articles.
+
+    :return: the id of each article keyed by title, and the title of each redirect page keyed
+            by id
+    """
+    stats = IngestStats("page")
+    title_ids: dict[str, int] = {}
+    redirect_titles: dict[int, str] = {}
+    start = time.perf_counter()
+    for page_id, namespace, title, is_redirect in dump_rows(
+        path, ("page_id", "page_namespace", "page_title", "page_is_redirect")
+    ):
+        stats.rows += 1
+        if namespace == ARTICLE_NAMESPACE:
+            title = _page_title(title)
+            title_ids[title] = page_id
+            if is_redirect:
+                redirect_titles[page_id] = title
+            writer.add(Article, {"id": page_id, "title": title})
+        _report(stats, start, writer.batch_size, report)
+    _report(stats, start, 0, report)
+    return title_ids, redirect_titles
+
+
+def _load_redirects(
+    writer: BulkWriter,
+    path: str,
+    title_ids: dict[str, int],
+    redirect_titles: dict[int, str],
+    report: Optional[Callable[[IngestStats], None]],
+) -> None:
+    """Record the redirects in the redirect dump at ``path`` between articles."""
+    stats = IngestStats("redirect")
+    start = time.perf_counter()
+    for page_id, namespace, title in dump_rows(path, ("rd_from", "rd_namespace", "rd_title")):
+        stats.rows += 1
+        target = title_ids.get(_page_title(title)) if namespace == ARTICLE_NAMESPACE else None
+        if page_id in redirect_titles and target is not None:
+            writer.add(
+                Redirect, {"id": page_id, "title": redirect_titles[page_id], "target": target}
+            )
+        _report(stats, start, writer.batch_size, report)
+    _report(stats, start, 0, report)
+
+
+def _load_links(
+    writer: BulkWriter,
+    path: str,
+    linktarget_path: Optional[str],
+    title_ids: dict[str, int],
+    report: Optional[Callable[[IngestStats], None]],
+) -> None:
+    """
+    Add the links between articles in the pagelinks dump at ``path``. Links from pages which
+    are not articles of the page dump are skipped, even if the pagelinks dump places them in
+    the main namespace.
+
+    :raises ValueError: if the dump refers to link targets by id and linktarget_path is None
+    """
+    link_rows: Iterator[tuple]
+    if "pl_target_id" in dump_columns(path):
+        if linktarget_path is None:
+            raise ValueError(f"Dump {path} refers to link targets by id")
+        targets = _link_targets(linktarget_path, title_ids, writer.batch_size, report)
+        link_rows = (
+            (src, from_namespace, targets.get(target_id))
+            for src, from_namespace, target_id in dump_rows(
+                path, ("pl_from", "pl_from_namespace", "pl_target_id")
+            )
+        )
+    else:
+        link_rows = (
+            (
+                src,
+                from_namespace,
+                title_ids.get(_page_title(title)) if namespace == ARTICLE_NAMESPACE else None,
+            )
+            for src, from_namespace, namespace, title in dump_rows(
+                path, ("pl_from", "pl_from_namespace", "pl_namespace", "pl_title")
+            )
+        )
+    article_ids = set(title_ids.values())
+    stats = IngestStats("pagelinks")
+    start = time.perf_counter()
+    for src, from_namespace, dst in link_rows:
+        stats.rows += 1
+        if from_namespace == ARTICLE_NAMESPACE and dst is not None and src in article_ids:
+            writer.add(Link, {"src": src, "dst": dst})
+        _report(stats, start, writer.batch_size, report)
+    _report(stats, start, 0, report)
+
+
+def _open_dump(path: str) -> TextIO:
+    """:return: the dump at ``path`` opened for reading text, decompressing it if needed"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def _read_columns(dump: TextIO) -> list[str]:
+    """
+    Read ``dump`` up to the end of its CREATE TABLE statement.
+
+    :return: the names of the columns of the table
+    :raises ValueError: if the dump does not create a table
+    """
+    for line in dump:
+        if _CREATE_TABLE.match(line):
+            break
+    else:
+        raise ValueError("Dump does not create a table")
+    columns: list[str] = []
+    for line in dump:
+        match = _COLUMN.match(line)
+        if match is None:
+            break
+        columns.append(match.group(1))
+    return columns
+
+
+def _parse_rows(line: str, pos: int) -> Iterator[list]:
+    """
+    :param line: an INSERT statement
+    :param pos: position in line of the first row after VALUES
+    :return: an iterator over the values of each row inserted by the statement
+    :raises ValueError: if the statement is malformed
+    """
+    try:
+        while line[pos] == "(":
+            row: list = []
+            pos += 1
+            while True:
+                match = _VALUE.match(line, pos)
+                if match is None:
+                    raise ValueError(f"Malformed value at {pos}: {line[pos:pos + 20]!r}")
+                string, null, literal = match.groups()
+                if string is not None:
+                    row.append(_unescape(string) if "\\" in string else string)
+                elif null is None:
+                    row.append(float(literal) if "." in literal else int(literal))
+                else:
+                    row.append(None)
+                pos = match.end() + 1
+                if line[pos - 1] == ")":
+                    break
+                if line[pos - 1] != ",":
+                    raise ValueError(f"Malformed row at {pos}: {line[pos - 20:pos]!r}")
+            yield row
+            if line[pos] != ",":
+                return
+            pos += 1
+    except IndexError:
+        raise ValueError("Statement ended inside a row") from None
+
+
+def _unescape(string: str) -> str:
+    """:return: string with the backslash escapes of MySQL replaced by the characters they escape"""
+    return _ESCAPE.sub(lambda match: _ESCAPES.get(match[1], match[1]), string)
+
+
+def _page_title(title: str) -> str:
+    """:return: the title of a page as it is shown, from the title stored in a dump"""
+    return title.replace("_", " ")
+
+
+def _link_targets(
+    path: str,
+    title_ids: dict[str, int],
+    batch_size: int,
+    report: Optional[Callable[[IngestStats], None]],
+) -> dict[int, int]:
+    """
+    :return: the id of the article each link target in the main namespace leads to, keyed by
+            the id of the link target
+    """
+    stats = IngestStats("linktarget")
+    targets: dict[int, int] = {}
+    start = time.perf_counter()
+    for target_id, namespace, title in dump_rows(path, ("lt_id", "lt_namespace", "lt_title")):
+        stats.rows += 1
+        if namespace == ARTICLE_NAMESPACE:
+            article_id = title_ids.get(_page_title(title))
+            if article_id is not None:
+                targets[target_id] = article_id
+        _report(stats, start, batch_size, report)
+    _report(stats, start, 0, report)
+    return targets
+
+
+def _report(
+    stats: IngestStats,
+    start: float,
+    every: int,
+    report: Optional[Callable[[IngestStats], None]],
+) -> None:
+    """Call report with stats once every ``every`` rows, or now if every is 0."""
+    if report is not None and (every == 0 or stats.rows % every == 0):
+        stats.seconds = time.perf_counter() - start
+        report(stats)
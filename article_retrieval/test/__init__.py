@@ -0,0 +1,4 @@
+"""
+This module contains tests for the retrieval of articles used for constructing the article
+graph.
+"""
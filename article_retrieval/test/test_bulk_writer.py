@@ -0,0 +1,44 @@
+"""
+This module contains tests for the bulk writer used to construct the article graph.
+"""
+import pytest
+from sqlalchemy import inspect, text
+
+from database import Article, Link
+from database.test.constants import TestSession, test_engine
+from ..bulk_writer import BulkWriter
+
+pytestmark = [pytest.mark.database]
+
+
+def test_bulk_writer(empty_db):
+    with test_engine.connect() as connection:
+        journal_mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+    with BulkWriter(test_engine, batch_size=2) as writer:
+        assert not inspect(test_engine).get_indexes("article")
+        for article_id, title in [(1, "Physics"), (2, "Chemistry"), (1, "Physics")]:
+            writer.add(Article, {"id": article_id, "title": title})
+        writer.add(Link.__table__, {"src": 1, "dst": 2})
+        writer.add(Link, {"src": 1, "dst": 2})
+    assert writer.stats["article"].rows == 3
+    with TestSession() as db:
+        articles = {(a.id, a.title) for a in db.query(Article)}
+        assert articles == {(1, "Physics"), (2, "Chemistry")}
+        assert {(link.src, link.dst) for link in db.query(Link)} == {(1, 2)}
+    assert [index["name"] for index in inspect(test_engine).get_indexes("article")] == [
+        "ix_article_title"
+    ]
+    with test_engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == journal_mode
+
+
+def test_bulk_writer_checks_foreign_keys(empty_db):
+    with BulkWriter(test_engine) as writer:
+        writer.add(Article, {"id": 1, "title": "Physics"})
+        writer.add(Link, {"src": 1, "dst": 1})
+        writer.add(Link, {"src": 1, "dst": 2})
+    assert writer.stats["dangling"].rows == 1
+    assert inspect(test_engine).get_indexes("article")
+    with TestSession() as db:
+        assert [a.id for a in db.query(Article)] == [1]
+        assert {(link.src, link.dst) for link in db.query(Link)} == {(1, 1)}
@@ -0,0 +1,141 @@
+"""
+This module contains tests for populating the article graph by crawling a wiki.
+"""
+import threading
+import time
+from typing import Iterator, Optional
+
+import pytest
+
+from database import Article, Link, Redirect
+from database.test.constants import TestSession
+from database.test.utilities import init_tables
+from ..bulk_writer import IngestStats
+from ..database_builder import COMPLETE, CRAWLING, get_build_state, populate_db
+
+pytestmark = [pytest.mark.database]
+
+
+class FakePage:
+    """A page of a ``FakeSite``."""
+
+    def __init__(self, site: "FakeSite", pageid: int, title: str) -> None:
+        self.site = site
+        self.pageid = pageid
+        self._title = title
+        self.links: list[FakePage] = []
+        self.target: Optional[FakePage] = None
+
+    def title(self) -> str:
+        return self._title
+
+    def exists(self) -> bool:
+        return True
+
+    def isRedirectPage(self) -> bool:
+        return self.target is not None
+
+    def getRedirectTarget(self) -> "FakePage":
+        assert self.target is not None
+        return self.target
+
+    def linkedPages(self) -> list["FakePage"]:
+        with self.site.lock:
+            self.site.fetched.append(self._title)
+            self.site.active += 1
+            self.site.max_active = max(self.site.max_active, self.site.active)
+        time.sleep(self.site.delay)
+        with self.site.lock:
+            self.site.active -= 1
+        return self.links
+
+
+class FakeSite:
+    """
+    A wiki crawled without the network, whose pages take delay seconds to fetch links from,
+    and which fails after listing fail_after pages.
+    """
+
+    maxlimit = 1
+
+    def __init__(self, fail_after: Optional[int] = None, delay: float = 0.0) -> None:
+        self.fail_after = fail_after
+        self.delay = delay
+        self.fetched: list[str] = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        titles = ["Albert Einstein", "Einstein", "Physics", "Ulm", "Zurich"]
+        self.pages = {title: FakePage(self, i + 1, title) for i, title in enumerate(titles)}
+        pages = self.pages
+        pages["Albert Einstein"].links = [pages["Physics"], pages["Ulm"], pages["Zurich"]]
+        pages["Einstein"].target = pages["Albert Einstein"]
+        pages["Physics"].links = [pages["Einstein"]]
+        pages["Ulm"].links = [pages["Albert Einstein"]]
+        pages["Zurich"].links = [pages["Physics"]]
+
+    def allpages(self, start: str = "!") -> Iterator[FakePage]:
+        for listed, title in enumerate(sorted(self.pages)):
+            if self.fail_after is not None and listed == self.fail_after:
+                raise ConnectionError("Crawl interrupted")
+            if title >= start:
+                yield self.pages[title]
+
+    def preloadpages(self, pages: list[FakePage], groupsize: int) -> Iterator[FakePage]:
+        yield from pages
+
+
+def graph_rows() -> tuple[set, set, set]:
+    with TestSession() as db:
+        return (
+            {(a.id, a.title) for a in db.query(Article)},
+            {(link.src, link.dst) for link in db.query(Link)},
+            {(r.id, r.title, r.target) for r in db.query(Redirect)},
+        )
+
+
+def test_populate_db(empty_db):
+    site = FakeSite(delay=0.05)
+    reports: list[IngestStats] = []
+    with TestSession() as db:
+        populate_db(
+            db,
+            site=site,
+            workers=4,
+            report=lambda stats: reports.append(IngestStats(stats.table, stats.rows)),
+        )
+        assert get_build_state(db) == COMPLETE
+    assert site.max_active > 1
+    assert sorted(site.fetched) == ["Albert Einstein", "Physics", "Ulm", "Zurich"]
+    progress = [(stats.table, stats.rows) for stats in reports]
+    assert ("fetched pages", 5) in progress and ("link", 6) in progress
+    assert graph_rows() == (
+        {(1, "Albert Einstein"), (3, "Physics"), (4, "Ulm"), (5, "Zurich")},
+        {(1, 3), (1, 4), (1, 5), (3, 1), (4, 1), (5, 3)},
+        {(2, "Einstein", 1)},
+    )
+
+
+def test_populate_db_resumes(empty_db):
+    with TestSession() as db:
+        populate_db(db, site=FakeSite())
+    complete = graph_rows()
+    init_tables()
+
+    interrupted = FakeSite(fail_after=4)
+    with TestSession() as db:
+        with pytest.raises(ConnectionError):
+            populate_db(db, site=interrupted, checkpoint_pages=3, workers=1)
+        assert get_build_state(db) == CRAWLING
+    assert interrupted.fetched == ["Albert Einstein", "Physics", "Ulm"]
+
+    resumed = FakeSite()
+    with TestSession() as db:
+        populate_db(db, resume=True, site=resumed, checkpoint_pages=2, workers=1)
+        assert get_build_state(db) == COMPLETE
+    assert resumed.fetched == ["Ulm", "Zurich"]
+    assert graph_rows() == complete
+
+    with TestSession() as db:
+        populate_db(db, resume=True, site=resumed)
+    assert resumed.fetched == ["Ulm", "Zurich"]
@@ -0,0 +1,118 @@
+"""
+This module contains tests for populating the article graph from SQL dumps.
+"""
+import gzip
+
+import pytest
+
+from database import Article, Link, Redirect
+from database.test.constants import TestSession
+from ..bulk_writer import IngestStats
+from ..dumps import dump_rows, load_dumps
+
+pytestmark = [pytest.mark.database]
+
+PAGE_DUMP = """-- MySQL dump
+DROP TABLE IF EXISTS `page`;
+CREATE TABLE `page` (
+  `page_id` int(8) unsigned NOT NULL AUTO_INCREMENT,
+  `page_namespace` int(11) NOT NULL DEFAULT 0,
+  `page_title` varbinary(255) NOT NULL DEFAULT '',
+  `page_is_redirect` tinyint(1) unsigned NOT NULL DEFAULT 0,
+  `page_len` int(8) unsigned NOT NULL DEFAULT 0,
+  PRIMARY KEY (`page_id`)
+) ENGINE=InnoDB;
+INSERT INTO `page` VALUES (1,0,'Albert_Einstein',0,10),(2,0,'Einstein',1,5),(3,1,'Albert_Einstein',0,3);
+INSERT INTO `page` VALUES (4,0,'Physics',0,8),(5,0,'Rock_\\'n\\'_roll',0,NULL);
+"""
+
+REDIRECT_DUMP = """CREATE TABLE `redirect` (
+  `rd_from` int(8) unsigned NOT NULL DEFAULT 0,
+  `rd_namespace` int(11) NOT NULL DEFAULT 0,
+  `rd_title` varbinary(255) NOT NULL DEFAULT '',
+  PRIMARY KEY (`rd_from`)
+);
+INSERT INTO `redirect` VALUES (2,0,'Albert_Einstein');
+"""
+
+PAGELINKS_DUMP = """CREATE TABLE `pagelinks` (
+  `pl_from` int(8) unsigned NOT NULL DEFAULT 0,
+  `pl_namespace` int(11) NOT NULL DEFAULT 0,
+  `pl_title` varbinary(255) NOT NULL DEFAULT '',
+  `pl_from_namespace` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`pl_from`,`pl_namespace`,`pl_title`)
+);
+INSERT INTO `pagelinks` VALUES (1,0,'Physics',0),(4,0,'Einstein',0),(5,0,'Missing',0);
+INSERT INTO `pagelinks` VALUES (3,0,'Physics',1),(5,1,'Physics',0),(5,0,'Rock_\\'n\\'_roll',0);
+INSERT INTO `pagelinks` VALUES (9,0,'Physics',0);
+"""
+
+LINKTARGET_DUMP = """CREATE TABLE `linktarget` (
+  `lt_id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `lt_namespace` int(11) NOT NULL,
+  `lt_title` varbinary(255) NOT NULL,
+  PRIMARY KEY (`lt_id`)
+);
+INSERT INTO `linktarget` VALUES (10,0,'Physics'),(11,0,'Einstein'),(12,1,'Physics');
+"""
+
+TARGET_PAGELINKS_DUMP = """CREATE TABLE `pagelinks` (
+  `pl_from` int(8) unsigned NOT NULL DEFAULT 0,
+  `pl_from_namespace` int(11) NOT NULL DEFAULT 0,
+  `pl_target_id` bigint(20) unsigned NOT NULL,
+  PRIMARY KEY (`pl_from`,`pl_target_id`)
+);
+INSERT INTO `pagelinks` VALUES (1,0,10),(4,0,11),(5,0,12),(3,1,10),(9,0,10);
+"""
+
+
+def write_dump(tmp_path, name: str, contents: str) -> str:
+    """:return: the path of a gzip-compressed dump with ``contents`` written to tmp_path"""
+    path = str(tmp_path / f"{name}.sql.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as dump:
+        dump.write(contents)
+    return path
+
+
+def test_dump_rows(tmp_path):
+    path = write_dump(tmp_path, "page", PAGE_DUMP)
+    assert list(dump_rows(path, ("page_title", "page_len"))) == [
+        ("Albert_Einstein", 10),
+        ("Einstein", 5),
+        ("Albert_Einstein", 3),
+        ("Physics", 8),
+        ("Rock_'n'_roll", None),
+    ]
+    with pytest.raises(ValueError):
+        list(dump_rows(path, ("page_touched",)))
+
+
+@pytest.mark.parametrize("link_targets", [False, True])
+def test_load_dumps(tmp_path, link_targets: bool, empty_db):
+    reports: list[IngestStats] = []
+    with TestSession() as db:
+        load_dumps(
+            db,
+            write_dump(tmp_path, "page", PAGE_DUMP),
+            write_dump(
+                tmp_path,
+                "pagelinks",
+                TARGET_PAGELINKS_DUMP if link_targets else PAGELINKS_DUMP,
+            ),
+            redirect_path=write_dump(tmp_path, "redirect", REDIRECT_DUMP),
+            linktarget_path=write_dump(tmp_path, "linktarget", LINKTARGET_DUMP),
+            batch_size=2,
+            report=lambda stats: reports.append(IngestStats(stats.table, stats.rows)),
+        )
+        assert {(a.id, a.title) for a in db.query(Article)} == {
+            (1, "Albert Einstein"),
+            (4, "Physics"),
+            (5, "Rock 'n' roll"),
+        }
+        expected_links = {(1, 4), (4, 1)} | (set() if link_targets else {(5, 5)})
+        assert {(link.src, link.dst) for link in db.query(Link)} == expected_links
+        assert [(r.id, r.title, r.target) for r in db.query(Redirect)] == [(2, "Einstein", 1)]
+    progress = [(stats.table, stats.rows) for stats in reports]
+    assert ("pagelinks", 7 if not link_targets else 5) in progress
+    assert ("page", 5) in progress
+    assert {"article", "link", "redirect"} <= {table for table, _ in progress}
@@ -0,0 +1,92 @@
+"""
+This module contains tests for incrementally updating the article graph.
+"""
+import pytest
+
+from database import Article, Link, Redirect, get_graph_version
+from database.test.constants import TestSession
+from ..updates import ChangedPage, LinkChanges, pages_from_xml_dump, update_links
+from .test_xml_dumps import write_dump
+
+pytestmark = [pytest.mark.database]
+
+
+@pytest.fixture
+def graph_db(empty_db):
+    with TestSession() as db:
+        for article_id, title in [(1, "Albert Einstein"), (4, "Physics"), (5, "Ulm")]:
+            db.add(Article(id=article_id, title=title))
+        db.add(Redirect(id=2, title="Einstein", target=1))
+        db.add_all([Link(src=1, dst=5), Link(src=4, dst=5), Link(src=5, dst=1)])
+        db.commit()
+    yield
+
+
+def test_update_links(graph_db):
+    reports: list[LinkChanges] = []
+    with TestSession() as db:
+        version = get_graph_version(db)
+        changes = update_links(
+            db,
+            [
+                ChangedPage(4, "Physics", ["Einstein", "Isaac Newton", "Einstein"]),
+                ChangedPage(6, "Isaac Newton", ["Physics"]),
+                ChangedPage(5, "Ulm, Germany", []),
+            ],
+            batch_size=2,
+            report=lambda stats: reports.append(LinkChanges(**vars(stats))),
+        )
+        assert changes == LinkChanges(pages=3, added=3, removed=2)
+        assert [stats.pages for stats in reports] == [2, 3]
+        assert {(a.id, a.title) for a in db.query(Article)} == {
+            (1, "Albert Einstein"),
+            (4, "Physics"),
+            (5, "Ulm, Germany"),
+            (6, "Isaac Newton"),
+        }
+        assert {(link.src, link.dst) for link in db.query(Link)} == {
+            (1, 5),
+            (4, 1),
+            (4, 6),
+            (6, 4),
+        }
+        assert get_graph_version(db) != version
+
+
+def test_update_links_to_page_added_by_later_batch(graph_db):
+    with TestSession() as db:
+        changes = update_links(
+            db,
+            [
+                ChangedPage(4, "Physics", ["Ulm", "Isaac Newton", "Nowhere"]),
+                ChangedPage(6, "Isaac Newton", []),
+            ],
+            batch_size=1,
+        )
+        assert changes == LinkChanges(pages=2, added=1, removed=0)
+        links = {(link.src, link.dst) for link in db.query(Link)}
+        assert links == {(1, 5), (4, 5), (4, 6), (5, 1)}
+
+
+def test_update_links_after_failed_update(graph_db):
+    def failing_pages():
+        yield ChangedPage(4, "Physics", ["Isaac Newton"])
+        raise RuntimeError("Connection lost")
+
+    with TestSession() as db:
+        with pytest.raises(RuntimeError):
+            update_links(db, failing_pages(), batch_size=1)
+        db.rollback()
+        update_links(db, [ChangedPage(6, "Isaac Newton", [])])
+        links = {(link.src, link.dst) for link in db.query(Link)}
+        assert links == {(1, 5), (5, 1)}
+
+
+def test_pages_from_xml_dump(tmp_path):
+    path = write_dump(tmp_path)
+    pages = list(pages_from_xml_dump(path, workers=1, chunk_size=1))
+    assert pages == [
+        ChangedPage(1, "Albert Einstein", ["Physics", "Ulm", "Albert Einstein"]),
+        ChangedPage(4, "Physics", ["Einstein", "Isaac Newton"]),
+    ]
+    assert list(pages_from_xml_dump(path, ["physics"], workers=1)) == pages[1:]
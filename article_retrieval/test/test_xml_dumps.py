@@ -0,0 +1,90 @@
+"""
+This module contains tests for populating the article graph from pages-articles XML dumps.
+"""
+import bz2
+
+import pytest
+
+from database import Article, Link, Redirect
+from database.test.constants import TestSession
+from ..xml_dumps import iter_pages, load_xml_dump, read_namespaces
+
+pytestmark = [pytest.mark.database]
+
+XML_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" version="0.10">
+  <siteinfo>
+    <sitename>Wikipedia</sitename>
+    <namespaces>
+      <namespace key="0" case="first-letter" />
+      <namespace key="14" case="first-letter">Category</namespace>
+    </namespaces>
+  </siteinfo>
+  <page>
+    <title>Albert Einstein</title>
+    <ns>0</ns>
+    <id>1</id>
+    <revision>
+      <id>100</id>
+      <text>A [[physics|physicist]] born in [[Ulm]]. [[Category:Physicists]] [[albert_Einstein]]</text>
+    </revision>
+  </page>
+  <page>
+    <title>Einstein</title>
+    <ns>0</ns>
+    <id>2</id>
+    <redirect title="Albert Einstein" />
+    <revision>
+      <id>101</id>
+      <text>#REDIRECT [[Albert Einstein]]</text>
+    </revision>
+  </page>
+  <page>
+    <title>Category:Physicists</title>
+    <ns>14</ns>
+    <id>3</id>
+    <revision>
+      <id>102</id>
+      <text>[[Physics]]</text>
+    </revision>
+  </page>
+  <page>
+    <title>Physics</title>
+    <ns>0</ns>
+    <id>4</id>
+    <revision>
+      <id>103</id>
+      <text>Studied by [[Einstein#Work|Einstein]] and {{cite|[[Isaac Newton]]}}.</text>
+    </revision>
+  </page>
+</mediawiki>
+"""
+
+
+def write_dump(tmp_path) -> str:
+    """:return: the path of a bzip2-compressed pages-articles dump written to tmp_path"""
+    path = str(tmp_path / "pages-articles.xml.bz2")
+    with bz2.open(path, "wt", encoding="utf-8") as dump:
+        dump.write(XML_DUMP)
+    return path
+
+
+def test_iter_pages(tmp_path):
+    path = write_dump(tmp_path)
+    assert read_namespaces(path) == {"Category"}
+    pages = list(iter_pages(path))
+    assert [(page.id, page.title, page.redirect) for page in pages] == [
+        (1, "Albert Einstein", None),
+        (2, "Einstein", "Albert Einstein"),
+        (4, "Physics", None),
+    ]
+
+
+def test_load_xml_dump(tmp_path, empty_db):
+    with TestSession() as db:
+        load_xml_dump(db, write_dump(tmp_path), workers=2, chunk_size=1, batch_size=2)
+        assert {(a.id, a.title) for a in db.query(Article)} == {
+            (1, "Albert Einstein"),
+            (4, "Physics"),
+        }
+        assert {(link.src, link.dst) for link in db.query(Link)} == {(1, 4), (1, 1), (4, 1)}
+        assert [(r.id, r.title, r.target) for r in db.query(Redirect)] == [(2, "Einstein", 1)]
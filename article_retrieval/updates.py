@@ -0,0 +1,285 @@
+"""
+This module contains incremental updates of the article graph database, which apply the links
+of pages which have changed since the graph was built instead of rebuilding the whole graph.
+
+The links each changed page now has are staged by title, resolved to articles, and compared
+against the links stored for the page, so that only links which were added or removed are
+written. Each batch of pages is applied in its own transaction, and links to titles which no
+article had yet are resolved again once every batch has been applied, in case a later batch
+added the article.
+"""
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, cast
+
+import pywikibot  # type: ignore
+from pywikibot.pagegenerators import PreloadingGenerator  # type: ignore
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    PrimaryKeyConstraint,
+    Table,
+    Text,
+    delete,
+    insert,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session as SessionTy
+
+from database import Article, Link, Redirect, bump_graph_version
+from game.utilities import normalize_title
+from .xml_dumps import DEFAULT_CHUNK_SIZE, extract_page_links, iter_pages, read_namespaces
+
+__all__ = [
+    "DEFAULT_UPDATE_BATCH_SIZE",
+    "ChangedPage",
+    "LinkChanges",
+    "read_change_list",
+    "pages_from_api",
+    "pages_from_xml_dump",
+    "update_links",
+]
+
+# number of changed pages applied in one transaction
+DEFAULT_UPDATE_BATCH_SIZE = 1_000
+
+_article = Article.__table__
+_link = Link.__table__
+_redirect = Redirect.__table__
+
+_staging = MetaData()
+# the titles each page in a batch now links to, and the articles those titles resolve to
+_wanted_links = Table(
+    "wanted_link",
+    _staging,
+    Column("src", Integer, nullable=False),
+    Column("title", Text, nullable=False),
+)
+_resolved_links = Table(
+    "resolved_link",
+    _staging,
+    Column("src", Integer, nullable=False),
+    Column("dst", Integer, nullable=False),
+    PrimaryKeyConstraint("src", "dst"),
+)
+# the titles linked to by applied pages which matched no article when their batch was applied
+_unresolved_links = Table(
+    "unresolved_link",
+    _staging,
+    Column("src", Integer, nullable=False),
+    Column("title", Text, nullable=False),
+)
+
+
+@dataclass
+class ChangedPage:
+    """An article which has changed, and the titles of the articles it now links to."""
+
+    id: int
+    title: str
+    links: list[str]
+
+
+@dataclass
+class LinkChanges:
+    """The changes made to the article graph by an update."""
+
+    pages: int = 0
+    added: int = 0
+    removed: int = 0
+
+
+def read_change_list(path: str) -> list[str]:
+    """
+    :param path: path of a change list, which holds the title of one changed page per line;
+                 blank lines and lines starting with ``#`` are ignored
+    :return: the titles in the change list, in order
+    """
+    with open(path, encoding="utf-8") as change_list:
+        lines = (line.strip() for line in change_list)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def pages_from_api(titles: Iterable[str]) -> Iterator[ChangedPage]:
+    """
+    Fetch the current links of pages from Wikipedia's API. Pages which do not exist or are
+    redirects are skipped.
+
+    :param titles: titles of the changed pages
+    :return: an iterator over the pages
+    """
+    site = pywikibot.Site("en")
+    for _page in PreloadingGenerator(pywikibot.Page(site, title) for title in titles):
+        page = cast(pywikibot.Page, _page)
+        if not page.exists() or page.isRedirectPage():
+            continue
+        yield ChangedPage(
+            page.pageid,
+            page.title(),
+            [linked.title() for linked in cast(Iterable[pywikibot.Page], page.linkedPages())],
+        )
+
+
+def pages_from_xml_dump(
+    path: str,
+    titles: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[ChangedPage]:
+    """
+    Read the links of pages from a pages-articles dump newer than the graph, extracting them in
+    worker processes as ``load_xml_dump`` does. Redirects are skipped.
+
+    :param path: path of the dump, which may be compressed with bzip2 or gzip
+    :param titles: titles of the changed pages; if not provided, every article in the dump is
+                   treated as changed
+    :param workers: number of worker processes extracting links; defaults to the number of CPUs
+    :param chunk_size: number of articles sent to a worker at a time
+    :return: an iterator over the pages, in the order of the dump
+    """
+    changed = None if titles is None else {normalize_title(title) for title in titles}
+    page_titles: dict[int, str] = {}
+
+    def texts() -> Iterator[tuple[int, str]]:
+        for page in iter_pages(path):
+            if page.redirect is None and (
+                changed is None or normalize_title(page.title) in changed
+            ):
+                page_titles[page.id] = page.title
+                yield page.id, page.text
+
+    for page_id, links in extract_page_links(
+        texts(), read_namespaces(path), workers, chunk_size
+    ):
+        yield ChangedPage(page_id, page_titles.pop(page_id), links)
+
+
+def update_links(
+    session: SessionTy,
+    pages: Iterable[ChangedPage],
+    batch_size: int = DEFAULT_UPDATE_BATCH_SIZE,
+    report: Optional[Callable[[LinkChanges], None]] = None,
+) -> LinkChanges:
+    """
+    Update the database which ``session`` can modify so that each of ``pages`` is an article
+    linking to exactly the articles titled as its links, or which redirects titled as its links
+    lead to. Titles are matched exactly, so links should already be normalized, as
+    ``pages_from_api`` and ``pages_from_xml_dump`` return them. Changed pages missing from the database are added, and renamed pages retitled. Links to
+    titles matching no article once every page has been applied are dropped, as they are when
+    the graph is built.
+
+    Pages deleted from the wiki, and redirects, are not changed. The graph version is bumped
+    both before and after updating, so that results cached for the graph before or while it
+    is updated are not used afterwards.
+
+    :param session: database session
+    :param pages: pages which have changed
+    :param batch_size: number of pages applied in one transaction
+    :param report: if provided, called with the changes made so far after every batch
+    :return: the changes made
+    """
+    bump_graph_version(session)
+    session.commit()
+    # staging tables left behind by an update which failed part way through are recreated
+    _staging.drop_all(bind=session.connection())
+    _staging.create_all(bind=session.connection())
+    changes = LinkChanges()
+    batch: list[ChangedPage] = []
+    for page in pages:
+        batch.append(page)
+        if len(batch) == batch_size:
+            _apply_batch(session, batch, changes, report)
+            batch = []
+    if batch:
+        _apply_batch(session, batch, changes, report)
+    _apply_unresolved(session, changes)
+    _staging.drop_all(bind=session.connection())
+    bump_graph_version(session)
+    session.commit()
+    return changes
+
+
+def _apply_batch(
+    session: SessionTy,
+    batch: list[ChangedPage],
+    changes: LinkChanges,
+    report: Optional[Callable[[LinkChanges], None]],
+) -> None:
+    """Apply the links of the pages in ``batch`` in one transaction, counting the changes."""
+    upsert = sqlite.insert(_article)
+    session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[_article.c.id], set_={"title": upsert.excluded.title}
+        ),
+        [{"id": page.id, "title": page.title} for page in batch],
+    )
+    page_ids = [page.id for page in batch]
+    session.execute(delete(_unresolved_links).where(_unresolved_links.c.src.in_(page_ids)))
+    wanted = [{"src": page.id, "title": title} for page in batch for title in page.links]
+    if wanted:
+        session.execute(insert(_wanted_links), wanted)
+    _resolve_wanted(session, _wanted_links)
+    session.execute(
+        insert(_unresolved_links).from_select(
+            ["src", "title"],
+            select([_wanted_links.c.src, _wanted_links.c.title])
+            .where(_wanted_links.c.title.notin_(select([_article.c.title])))
+            .where(_wanted_links.c.title.notin_(select([_redirect.c.title]))),
+        )
+    )
+    changes.removed += session.execute(
+        delete(_link)
+        .where(_link.c.src.in_(page_ids))
+        .where(
+            tuple_(_link.c.src, _link.c.dst).notin_(
+                select([_resolved_links.c.src, _resolved_links.c.dst])
+            )
+        )
+    ).rowcount
+    changes.added += session.execute(
+        insert(_link)
+        .prefix_with("OR IGNORE")
+        .from_select(["src", "dst"], select([_resolved_links.c.src, _resolved_links.c.dst]))
+    ).rowcount
+    session.execute(delete(_wanted_links))
+    session.execute(delete(_resolved_links))
+    session.commit()
+    changes.pages += len(batch)
+    if report is not None:
+        report(changes)
+
+
+def _apply_unresolved(session: SessionTy, changes: LinkChanges) -> None:
+    """
+    Add the links to titles which matched no article when their batch was applied, but match
+    one now that every batch has been applied, counting the added links.
+    """
+    _resolve_wanted(session, _unresolved_links)
+    changes.added += session.execute(
+        insert(_link)
+        .prefix_with("OR IGNORE")
+        .from_select(["src", "dst"], select([_resolved_links.c.src, _resolved_links.c.dst]))
+    ).rowcount
+    session.execute(delete(_unresolved_links))
+    session.execute(delete(_resolved_links))
+    session.commit()
+
+
+def _resolve_wanted(session: SessionTy, wanted: Table) -> None:
+    """Stage the articles the titles in ``wanted`` resolve to, directly or by a redirect."""
+    for table, dst, title in (
+        (_article, _article.c.id, _article.c.title),
+        (_redirect, _redirect.c.target, _redirect.c.title),
+    ):
+        session.execute(
+            insert(_resolved_links)
+            .prefix_with("OR IGNORE")
+            .from_select(
+                ["src", "dst"],
+                select([wanted.c.src, dst]).select_from(
+                    wanted.join(table, title == wanted.c.title)
+                ),
+            )
+        )
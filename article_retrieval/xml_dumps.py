@@ -0,0 +1,302 @@
+"""
+This module contains the population of the article graph database from a locally downloaded
+pages-articles XML dump, extracting the links of each article from its wikitext.
+
+The dump is read incrementally, and the wikitext of articles is sent in chunks to a pool of
+worker processes which extract and normalize wikilinks, while the calling process writes
+articles and links to the database. Only a bounded number of chunks are in flight at once, so
+memory use does not grow with the size of the dump. Links are staged by title, and resolved
+to articles once every article has been written.
+"""
+import bz2
+import gzip
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import IO, Callable, Iterable, Iterator, Optional, cast
+from xml.etree import ElementTree
+
+import wikitextparser  # type: ignore
+from sqlalchemy import Column, Integer, MetaData, Table, Text, insert, select
+from sqlalchemy.orm import Session as SessionTy
+
+from database import Article, Link, Redirect, bump_graph_version, collapse_redirects
+from game.utilities import normalize_title
+from .bulk_writer import DEFAULT_BATCH_SIZE, BulkWriter, IngestStats
+from .dumps import ARTICLE_NAMESPACE
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "XmlPage",
+    "read_namespaces",
+    "iter_pages",
+    "extract_links",
+    "extract_page_links",
+    "load_xml_dump",
+]
+
+# number of articles sent to a worker at a time
+DEFAULT_CHUNK_SIZE = 64
+
+_staging = MetaData()
+# links and redirects by the title of the article they lead to, before titles are resolved
+_pending_links = Table(
+    "pending_link",
+    _staging,
+    Column("src", Integer, nullable=False),
+    Column("title", Text, nullable=False),
+)
+_pending_redirects = Table(
+    "pending_redirect",
+    _staging,
+    Column("src", Integer, nullable=False),
+    Column("title", Text, nullable=False),
+)
+
+_worker_namespaces: frozenset[str] = frozenset()
+
+
+@dataclass
+class XmlPage:
+    """An article read from a pages-articles dump."""
+
+    id: int
+    title: str
+    # title of the page this page redirects to, if it is a redirect
+    redirect: Optional[str]
+    text: str
+
+
+def read_namespaces(path: str) -> frozenset[str]:
+    """
+    :param path: path of a pages-articles dump, which may be compressed with bzip2 or gzip
+    :return: the normalized names of the namespaces other than the main namespace, which
+            prefix the titles of pages which are not articles
+    """
+    names: set[str] = set()
+    with _open_xml(path) as dump:
+        for _, element in ElementTree.iterparse(dump):
+            tag = _local_name(element.tag)
+            if tag == "namespace" and element.text:
+                names.add(normalize_title(element.text))
+            elif tag == "siteinfo":
+                break
+    return frozenset(names)
+
+
+def iter_pages(path: str) -> Iterator[XmlPage]:
+    """
+    Stream the articles in a pages-articles dump, discarding each page once it has been read.
+
+    :param path: path of a pages-articles dump, which may be compressed with bzip2 or gzip
+    :return: an iterator over the pages in the main namespace
+    """
+    with _open_xml(path) as dump:
+        events = ElementTree.iterparse(dump, events=("start", "end"))
+        _, root = next(events)
+        for event, element in events:
+            if event != "end" or _local_name(element.tag) != "page":
+                continue
+            fields: dict[str, ElementTree.Element] = {}
+            for child in element.iter():
+                fields.setdefault(_local_name(child.tag), child)
+            namespace = fields.get("ns")
+            if namespace is not None and int(namespace.text or 0) == ARTICLE_NAMESPACE:
+                redirect = fields.get("redirect")
+                yield XmlPage(
+                    id=int(fields["id"].text or 0),
+                    title=fields["title"].text or "",
+                    redirect=None if redirect is None else redirect.get("title"),
+                    text=(fields["text"].text or "") if "text" in fields else "",
+                )
+            root.clear()
+
+
+def extract_links(text: str, namespaces: Iterable[str] = ()) -> list[str]:
+    """
+    :param text: wikitext of an article
+    :param namespaces: normalized names of namespaces whose pages are not articles
+    :return: the normalized titles of the articles which the wikilinks in text lead to, without
+            duplicates and in order of first appearance
+
+    >>> extract_links("[[physics#History|Physics]] and [[Category:Science]], [[#Notes]]",
+    ...               ["Category"])
+    ['Physics']
+    """
+    namespaces = frozenset(namespaces)
+    titles: dict[str, None] = {}
+    for link in wikitextparser.parse(text).wikilinks:
+        title = link.title.strip().lstrip(":")
+        prefix, colon, _ = title.partition(":")
+        if not title or (colon and normalize_title(prefix) in namespaces):
+            continue
+        titles[normalize_title(title)] = None
+    return list(titles)
+
+
+def load_xml_dump(
+    session: SessionTy,
+    path: str,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report: Optional[Callable[[IngestStats], None]] = None,
+) -> None:
+    """
+    Populate the database which ``session`` can modify from a pages-articles dump, with pages in
+    the main namespace as articles and the wikilinks between them as edges. Redirects are
+    collapsed out of the graph as they are by ``populate_db``.
+
+    The graph version is bumped both before and after populating, so that results cached for
+    the graph before or while it is populated are not used afterwards.
+
+    :param session: database session
+    :param path: path of the dump, which may be compressed with bzip2 or gzip
+    :param workers: number of worker processes extracting links; defaults to the number of CPUs
+    :param chunk_size: number of articles sent to a worker at a time
+    :param batch_size: number of rows inserted into the database at a time
+    :param report: if provided, called with the number of pages read after every batch_size
+                   pages and once the dump has been read, and with the rows written to each
+                   table after every batch
+    """
+    bump_graph_version(session)
+    session.commit()
+    # staging tables left behind by a build which failed part way through are recreated
+    _staging.drop_all(bind=session.connection())
+    _staging.create_all(bind=session.connection())
+    session.commit()
+    with BulkWriter(session.get_bind(), batch_size, report) as writer:
+        texts = _write_articles(iter_pages(path), writer, report)
+        for src, titles in extract_page_links(
+            texts, read_namespaces(path), workers, chunk_size
+        ):
+            for title in titles:
+                writer.add(_pending_links, {"src": src, "title": title})
+    _resolve_titles(session)
+    _staging.drop_all(bind=session.connection())
+    collapse_redirects(session)
+    bump_graph_version(session)
+    session.commit()
+
+
+def extract_page_links(
+    texts: Iterable[tuple[int, str]],
+    namespaces: frozenset[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[int, list[str]]]:
+    """
+    Extract the links of articles as ``extract_links`` does, in chunks sent to a pool of worker
+    processes. Only a bounded number of chunks are in flight at once, so texts is read only as
+    fast as links are extracted.
+
+    :param texts: the id and wikitext of each article
+    :param namespaces: normalized names of namespaces whose pages are not articles
+    :param workers: number of worker processes extracting links; defaults to the number of CPUs
+    :param chunk_size: number of articles sent to a worker at a time
+    :return: an iterator over the id of each article and the titles it links to, in the order
+            of texts
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_set_namespaces, initargs=(namespaces,)
+    ) as executor:
+        in_flight: deque[Future] = deque()
+        chunk: list[tuple[int, str]] = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) == chunk_size:
+                in_flight.append(executor.submit(_extract_chunk, chunk))
+                chunk = []
+                if len(in_flight) >= 2 * workers:
+                    yield from in_flight.popleft().result()
+        if chunk:
+            in_flight.append(executor.submit(_extract_chunk, chunk))
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _write_articles(
+    pages: Iterable[XmlPage],
+    writer: BulkWriter,
+    report: Optional[Callable[[IngestStats], None]],
+) -> Iterator[tuple[int, str]]:
+    """
+    Write each of ``pages`` as an article, staging the targets of redirects.
+
+    :return: an iterator over the id and wikitext of the pages which are not redirects
+    """
+    stats = IngestStats("pages-articles")
+    start = time.perf_counter()
+    for page in pages:
+        stats.rows += 1
+        writer.add(Article, {"id": page.id, "title": page.title})
+        if page.redirect is not None:
+            writer.add(
+                _pending_redirects, {"src": page.id, "title": normalize_title(page.redirect)}
+            )
+        else:
+            yield page.id, page.text
+        if report is not None and stats.rows % writer.batch_size == 0:
+            stats.seconds = time.perf_counter() - start
+            report(stats)
+    if report is not None:
+        stats.seconds = time.perf_counter() - start
+        report(stats)
+
+
+def _resolve_titles(session: SessionTy) -> None:
+    """Add the staged links and redirects whose titles match an article."""
+    article = Article.__table__
+    session.execute(
+        insert(Link.__table__)
+        .prefix_with("OR IGNORE")
+        .from_select(
+            ["src", "dst"],
+            select([_pending_links.c.src, article.c.id]).select_from(
+                _pending_links.join(article, article.c.title == _pending_links.c.title)
+            ),
+        )
+    )
+    source = article.alias()
+    session.execute(
+        insert(Redirect.__table__)
+        .prefix_with("OR IGNORE")
+        .from_select(
+            ["id", "title", "target"],
+            select([_pending_redirects.c.src, source.c.title, article.c.id])
+            .select_from(
+                _pending_redirects.join(
+                    article, article.c.title == _pending_redirects.c.title
+                ).join(source, source.c.id == _pending_redirects.c.src)
+            )
+            .where(article.c.id != _pending_redirects.c.src),
+        )
+    )
+
+
+def _set_namespaces(namespaces: frozenset[str]) -> None:
+    """Store the namespaces of the dump in a newly started worker process."""
+    global _worker_namespaces
+    _worker_namespaces = namespaces
+
+
+def _extract_chunk(chunk: list[tuple[int, str]]) -> list[tuple[int, list[str]]]:
+    """:return: the id of each article in chunk and the titles it links to"""
+    return [(page_id, extract_links(text, _worker_namespaces)) for page_id, text in chunk]
+
+
+def _open_xml(path: str) -> IO[bytes]:
+    """:return: the dump at ``path`` opened for reading bytes, decompressing it if needed"""
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return cast(IO[bytes], gzip.open(path, "rb"))
+    return open(path, "rb")
+
+
+def _local_name(tag: str) -> str:
+    """:return: tag without its XML namespace"""
+    return tag.rpartition("}")[2]
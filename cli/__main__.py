@@ -7,58 +7,280 @@ from typing import Optional
 import typer
 from sqlalchemy.orm.session import Session
 
-from database import get_db
-from game.pathfinding import follow_parent_pointers, multi_target_bfs, bidi_bfs
-from game.utilities import id_to_title, title_to_id
+from database import get_db, get_graph, get_snapshot
+from game.completion import DEFAULT_COMPLETIONS, complete_titles, get_completions
+from game.labeling import get_labels
+from game.landmarks import get_landmarks
+from game.pathfinding import (
+    SearchStats,
+    WorkerStats,
+    bidi_bfs,
+    click_distance,
+    follow_parent_pointers,
+    is_reachable,
+    solve_many,
+    targeted_bfs,
+)
+from game.reachability import get_reachability
+from game.result_cache import Outcome, cached_path_query, get_result_cache
+from game.tree_cache import get_tree_cache
+from game.utilities import title_to_id, titles_for_ids
 
 app = typer.Typer()
 
+_BATCHED_HELP = "Expand each search level with batched SQL queries instead of the snapshot"
+_STATS_HELP = "Report the work done by the search, such as the SQL statements issued"
+
 
 @app.command("single")
 def single_target(
     src: str = typer.Argument(..., help="Starting article"),
     dst: str = typer.Argument(..., help="Ending article"),
+    batched: bool = typer.Option(False, help=_BATCHED_HELP),
+    show_stats: bool = typer.Option(False, "--stats", help=_STATS_HELP),
+    cached: bool = typer.Option(
+        False, help="Reuse and store the result in the result cache kept in the database"
+    ),
 ) -> None:
     """
     Find a shortest path of articles between src and dst.
     """
     session: Session = next(get_db())
-    try:
-        path = bidi_bfs(session, src, dst)
-    except ValueError as e:
-        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
-        typer.echo(msg, err=True)
-        raise typer.Exit(code=1)
+    stats = SearchStats()
+    graph = None if batched else get_graph()
+    landmarks = None if graph is None else get_landmarks(graph)
+    reachability = None if graph is None else get_reachability(graph)
+
+    def search() -> Optional[list[str]]:
+        return bidi_bfs(
+            session,
+            src,
+            dst,
+            graph=graph,
+            batched=batched,
+            stats=stats,
+            landmarks=landmarks,
+            tree_cache=get_tree_cache(),
+            reachability=reachability,
+        )
+
+    if cached:
+        result_cache = get_result_cache("sqlite")
+        result = cached_path_query(session, result_cache, src, dst, search, graph=graph)
+        if result.outcome is Outcome.UNKNOWN_TITLE:
+            msg = typer.style(
+                f"Could not find matching article for at least one of {src} and {dst}",
+                fg=typer.colors.WHITE,
+                bg=typer.colors.RED,
+            )
+            typer.echo(msg, err=True)
+            raise typer.Exit(code=1)
+        path = None if result.articles is None else [title for _, title in result.articles]
+    else:
+        try:
+            path = search()
+        except ValueError as e:
+            msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+            typer.echo(msg, err=True)
+            raise typer.Exit(code=1)
     typer.echo(_display_path(src, dst, path))
+    if show_stats:
+        typer.echo(stats, err=True)
+        typer.echo(get_tree_cache().stats, err=True)
+        if cached:
+            typer.echo(get_result_cache("sqlite").stats, err=True)
 
 
 @app.command("multi")
 def multi_target(
     src: str = typer.Argument(..., help="Starting article"),
     dsts: list[str] = typer.Argument(..., help="Ending articles"),
+    batched: bool = typer.Option(False, help=_BATCHED_HELP),
+    show_stats: bool = typer.Option(False, "--stats", help=_STATS_HELP),
 ) -> None:
     """
     Find a shortest path of articles between src and destination, for each destination in dsts.
     """
     session: Session = next(get_db())
-    try:
-        parents = multi_target_bfs(session, src)
-    except ValueError as e:
-        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
-        typer.echo(msg, err=True)
-        raise typer.Exit(code=1)
+    stats = SearchStats()
+    graph = None if batched else get_graph()
+    snapshot = None if batched else get_snapshot()
+    dst_ids: dict[str, int] = {}
     for dst in dsts:
         try:
-            dst_id = title_to_id(session, dst)
+            dst_ids[dst] = title_to_id(session, dst)
         except ValueError as e:
             msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
             typer.echo(msg, err=True)
-        else:
-            path = follow_parent_pointers(dst_id, parents)
-            article_path = (
-                None if path is None else [id_to_title(session, id_) for id_ in path]
+    try:
+        parents = targeted_bfs(
+            session,
+            src,
+            list(dst_ids.values()),
+            graph=graph,
+            batched=batched,
+            stats=stats,
+            tree_cache=get_tree_cache(),
+        )
+    except ValueError as e:
+        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+        typer.echo(msg, err=True)
+        raise typer.Exit(code=1)
+    for dst, dst_id in dst_ids.items():
+        path = follow_parent_pointers(dst_id, parents)
+        article_path = None if path is None else titles_for_ids(session, path, snapshot)
+        typer.echo(_display_path(src, dst, article_path))
+    if show_stats:
+        typer.echo(stats, err=True)
+        typer.echo(get_tree_cache().stats, err=True)
+
+
+@app.command("batch")
+def batch(
+    pairs_file: typer.FileText = typer.Argument(
+        ..., help="File of tab-separated starting and ending articles, one pair per line"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, help="Number of worker processes, defaulting to the number of CPUs"
+    ),
+    show_stats: bool = typer.Option(
+        False, "--stats", help="Report the number of pairs each worker solved per second"
+    ),
+) -> None:
+    """
+    Find a shortest path of articles for each pair in pairs_file, searching the graph snapshot
+    from several processes at once.
+    """
+    session: Session = next(get_db())
+    pairs = []
+    for line_number, line in enumerate(pairs_file, start=1):
+        if not line.strip():
+            continue
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) != 2 or not all(fields):
+            raise typer.BadParameter(
+                f"line {line_number} is not a starting and ending article separated by a tab",
+                param_hint="PAIRS_FILE",
+            )
+        src, dst = fields
+        pairs.append((src, dst))
+    worker_stats: dict[int, WorkerStats] = {}
+    try:
+        paths = solve_many(session, pairs, workers=workers, worker_stats=worker_stats)
+        for (src, dst), path in zip(pairs, paths):
+            typer.echo(_display_path(src, dst, path))
+    except ValueError as e:
+        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+        typer.echo(msg, err=True)
+        raise typer.Exit(code=1)
+    if show_stats:
+        for pid, stats in sorted(worker_stats.items()):
+            typer.echo(
+                f"Worker {pid}: {stats.pairs} pairs in {stats.seconds:.2f}s "
+                f"({stats.pairs_per_second:.1f} pairs/s)",
+                err=True,
             )
-            typer.echo(_display_path(src, dst, article_path))
+
+
+@app.command("distance")
+def distance(
+    src: str = typer.Argument(..., help="Starting article"),
+    dst: str = typer.Argument(..., help="Ending article"),
+    batched: bool = typer.Option(False, help=_BATCHED_HELP),
+    show_stats: bool = typer.Option(False, "--stats", help=_STATS_HELP),
+) -> None:
+    """
+    Find the number of clicks on a shortest path of articles between src and dst.
+    """
+    session: Session = next(get_db())
+    stats = SearchStats()
+    graph = None if batched else get_graph()
+    labels = None if graph is None else get_labels(graph)
+    reachability = None if graph is None else get_reachability(graph)
+    try:
+        clicks = click_distance(
+            session,
+            src,
+            dst,
+            graph=graph,
+            labels=labels,
+            batched=batched,
+            stats=stats,
+            reachability=reachability,
+        )
+    except ValueError as e:
+        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+        typer.echo(msg, err=True)
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"No path found between {src} and {dst}"
+        if clicks is None
+        else f"Distance from {src} to {dst}: {clicks} clicks"
+    )
+    if show_stats:
+        typer.echo(stats, err=True)
+
+
+@app.command("reachable")
+def reachable(
+    src: str = typer.Argument(..., help="Starting article"),
+    dst: str = typer.Argument(..., help="Ending article"),
+    batched: bool = typer.Option(False, help=_BATCHED_HELP),
+    show_stats: bool = typer.Option(False, "--stats", help=_STATS_HELP),
+) -> None:
+    """
+    Find whether any path of articles leads from src to dst.
+    """
+    session: Session = next(get_db())
+    stats = SearchStats()
+    graph = None if batched else get_graph()
+    reachability = None if graph is None else get_reachability(graph)
+    try:
+        found = is_reachable(
+            session,
+            src,
+            dst,
+            graph=graph,
+            reachability=reachability,
+            batched=batched,
+            stats=stats,
+        )
+    except ValueError as e:
+        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+        typer.echo(msg, err=True)
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"A path leads from {src} to {dst}"
+        if found
+        else f"No path found between {src} and {dst}"
+    )
+    if show_stats:
+        typer.echo(stats, err=True)
+
+
+@app.command("complete")
+def complete(
+    prefix: str = typer.Argument(..., help="Typed start of the titles, in any case"),
+    limit: int = typer.Option(DEFAULT_COMPLETIONS, min=1, help="Largest number of titles"),
+    ranked: bool = typer.Option(False, help="List the most linked articles first"),
+) -> None:
+    """
+    Complete the titles of articles starting with prefix.
+    """
+    session: Session = next(get_db())
+    graph = get_graph()
+    completions = None if graph is None else get_completions(graph)
+    titles = complete_titles(
+        session,
+        prefix,
+        limit,
+        graph=graph,
+        completions=completions,
+        snapshot=get_snapshot(),
+        ranked=ranked,
+    )
+    for title in titles:
+        typer.echo(title)
 
 
 def _display_path(src: str, dst: str, path: Optional[list[str]]) -> str:
@@ -1,5 +1,16 @@
+import pytest
 from hypothesis import settings, Verbosity
 
+from database.test.utilities import init_tables
+
 settings.register_profile("thorough", max_examples=1000)
 settings.register_profile("dev", max_examples=10)
 settings.register_profile("debug", max_examples=10, verbosity=Verbosity.verbose)
+
+
+@pytest.fixture
+def empty_db():
+    """Provide empty test database tables, which are emptied again afterwards."""
+    init_tables()
+    yield
+    init_tables()
@@ -2,5 +2,16 @@
 This module concerns the database used to represent articles as a graph.
 """
 from .constants import Session
-from .models import Article, Link
-from .utilities import clear_db, get_db
+from .frontier import FrontierLinks
+from .graph import CSRGraph
+from .migrations import cluster_links
+from .models import Article, CachedPath, Link, Metadata, Redirect
+from .redirects import collapse_redirects
+from .snapshot import GraphSnapshot, get_graph, get_snapshot
+from .utilities import (
+    bump_graph_version,
+    clear_db,
+    count_statements,
+    get_db,
+    get_graph_version,
+)
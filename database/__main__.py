@@ -1,13 +1,94 @@
 #!/usr/bin/env python3
 """
-Initializes database tables and foreign keys.
+Initializes database tables and foreign keys, migrates older databases, and builds derived
+artifacts such as the graph snapshot.
 """
-from sqlalchemy import event
+import random
+import time
+
+import typer
+from sqlalchemy import event, select
 from sqlalchemy.engine import Engine
 
-from .constants import Base, engine
+from .constants import SNAPSHOT_PATH, Base, Session, engine
+from .frontier import DEFAULT_CHUNK_SIZE, FrontierLinks
+from .migrations import cluster_links
+from .models import Article
+from .snapshot import build_snapshot
 from .utilities import set_sqlite_foreign_key_pragma
 
 Base.metadata.create_all(bind=engine)
+# create_all only creates the indexes of tables it creates, so add any missing from older tables
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)  # type: ignore
 
 event.listens_for(Engine, "connect")(set_sqlite_foreign_key_pragma)
+
+app = typer.Typer()
+
+
+@app.callback(invoke_without_command=True)
+def main() -> None:
+    """
+    Initialize database tables and foreign keys.
+    """
+
+
+@app.command("snapshot")
+def snapshot(
+    path: str = typer.Option(SNAPSHOT_PATH, help="Where to write the snapshot"),
+) -> None:
+    """
+    Write a memory-mappable snapshot of the article graph.
+    """
+    start = time.perf_counter()
+    with Session() as db:
+        graph = build_snapshot(db, path)
+    typer.echo(
+        f"Wrote {len(graph)} articles and {graph.num_edges} links to {path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+@app.command("migrate")
+def migrate() -> None:
+    """
+    Bring a database created with older versions of the models up to date.
+    """
+    start = time.perf_counter()
+    if cluster_links(engine):
+        typer.echo(f"Clustered the link table in {time.perf_counter() - start:.2f}s")
+    else:
+        typer.echo("The database is up to date")
+
+
+@app.command("benchmark")
+def benchmark(
+    frontier_size: int = typer.Option(
+        DEFAULT_CHUNK_SIZE, min=1, help="Number of articles in each frontier"
+    ),
+    rounds: int = typer.Option(20, min=1, help="Number of frontiers expanded each way"),
+) -> None:
+    """
+    Time expanding frontiers of random articles along the links leaving and entering them.
+    """
+    with Session() as db:
+        ids = db.execute(select([Article.id])).scalars().all()
+        if not ids:
+            typer.echo("The database has no articles", err=True)
+            raise typer.Exit(code=1)
+        frontiers = [random.sample(ids, min(frontier_size, len(ids))) for _ in range(rounds)]
+        links = FrontierLinks(db)
+        for direction, expand in (("forward", links.out_links), ("reverse", links.in_links)):
+            start = time.perf_counter()
+            expanded = sum(1 for frontier in frontiers for _ in expand(frontier))
+            seconds = time.perf_counter() - start
+            typer.echo(
+                f"{direction}: {expanded} links in {seconds:.3f}s "
+                f"({seconds / rounds * 1000:.1f}ms per frontier)"
+            )
+
+
+if __name__ == "__main__":
+    app(prog_name="database")
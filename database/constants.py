@@ -8,10 +8,20 @@ from sqlalchemy.orm import sessionmaker
 MIN_SQLITE_INT: int = -1 * 2 ** 63
 MAX_SQLITE_INT: int = 2 ** 63 - 1
 
-__all__ = ["DB_URL", "engine", "Session", "Base", "MIN_SQLITE_INT", "MAX_SQLITE_INT"]
+__all__ = [
+    "DB_URL",
+    "SNAPSHOT_PATH",
+    "engine",
+    "Session",
+    "Base",
+    "MIN_SQLITE_INT",
+    "MAX_SQLITE_INT",
+]
 
 DB_URL = "sqlite:///./wikigame.db"
 
+SNAPSHOT_PATH = "./wikigame.graph"
+
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
 
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
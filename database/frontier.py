@@ -0,0 +1,55 @@
+"""
+This module contains batched reads of the links leaving or entering a whole set of articles,
+which let a search expand an entire BFS level with a handful of SQL statements.
+"""
+from typing import Iterator, Sequence
+
+from sqlalchemy import Column, select
+from sqlalchemy.orm import Session
+
+from .models import Link
+
+__all__ = ["DEFAULT_CHUNK_SIZE", "FrontierLinks"]
+
+# stays below SQLite's default limit of 999 bound parameters per statement
+DEFAULT_CHUNK_SIZE = 900
+
+_link = Link.__table__
+
+
+class FrontierLinks:
+    """
+    Reads the links of whole frontiers of articles from the ``link`` table with chunked
+    SQLAlchemy Core queries, without constructing any ORM objects.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        :param db: database session
+        :param chunk_size: maximum number of article ids bound to a single statement
+        """
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def out_links(self, frontier: Sequence[int]) -> Iterator[tuple[int, int]]:
+        """
+        :param frontier: ids of articles to expand
+        :return: (src, dst) for every link from an article in frontier
+        """
+        return self._links(_link.c.src, _link.c.dst, frontier)
+
+    def in_links(self, frontier: Sequence[int]) -> Iterator[tuple[int, int]]:
+        """
+        :param frontier: ids of articles to expand
+        :return: (dst, src) for every link to an article in frontier
+        """
+        return self._links(_link.c.dst, _link.c.src, frontier)
+
+    def _links(
+        self, key: Column, other: Column, frontier: Sequence[int]
+    ) -> Iterator[tuple[int, int]]:
+        for start in range(0, len(frontier), self.chunk_size):
+            chunk = frontier[start : start + self.chunk_size]
+            rows = self.db.execute(select([key, other]).where(key.in_(chunk))).all()
+            for expanded, linked in rows:
+                yield expanded, linked
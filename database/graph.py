@@ -0,0 +1,173 @@
+"""
+This module contains an in-memory representation of the article graph stored as compressed
+sparse row (CSR) arrays, which allows articles to be expanded without going through the ORM.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional, Sequence
+from zlib import crc32
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Article, Link
+
+__all__ = ["CSRGraph"]
+
+
+class CSRGraph:
+    """
+    A directed article graph stored as forward and reverse compressed sparse row arrays.
+
+    Articles are assigned dense indices in ``[0, len(graph))`` in increasing order of their ids,
+    so ``ids[i]`` is the id of the article with index ``i``. The articles linked to from index
+    ``i`` are ``fwd_targets[fwd_offsets[i]:fwd_offsets[i + 1]]``, and the articles linking to
+    index ``i`` are ``rev_targets[rev_offsets[i]:rev_offsets[i + 1]]``.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        fwd_offsets: Sequence[int],
+        fwd_targets: Sequence[int],
+        rev_offsets: Sequence[int],
+        rev_targets: Sequence[int],
+    ) -> None:
+        """
+        :param ids: article ids in increasing order, indexed by dense node index
+        :param fwd_offsets: offsets into fwd_targets, of length len(ids) + 1
+        :param fwd_targets: dense indices of the articles linked to from each node
+        :param rev_offsets: offsets into rev_targets, of length len(ids) + 1
+        :param rev_targets: dense indices of the articles linking to each node
+        :raises ValueError: if the arrays do not describe a graph over ids
+        """
+        if len(fwd_offsets) != len(ids) + 1 or len(rev_offsets) != len(ids) + 1:
+            raise ValueError("Expected one more offset than there are articles")
+        if len(fwd_targets) != len(rev_targets):
+            raise ValueError("Forward and reverse adjacency must contain the same links")
+        self.ids = ids
+        self.fwd_offsets = fwd_offsets
+        self.fwd_targets = fwd_targets
+        self.rev_offsets = rev_offsets
+        self.rev_targets = rev_targets
+        self._fingerprint: Optional[int] = None
+
+    @classmethod
+    def from_edges(cls, ids: Iterable[int], edges: Iterable[tuple[int, int]]) -> "CSRGraph":
+        """
+        Build a graph over the articles with ids ``ids`` from ``edges``.
+
+        :param ids: ids of all articles in the graph
+        :param edges: (src, dst) pairs of article ids
+        :return: the graph with the provided articles and links
+        :raises ValueError: if a link refers to an article not in ids
+
+        >>> graph = CSRGraph.from_edges([30, 10, 20], [(10, 20), (10, 30), (20, 30)])
+        >>> list(graph.ids)
+        [10, 20, 30]
+        >>> list(graph.out_neighbors(0)), list(graph.in_neighbors(2))
+        ([1, 2], [0, 1])
+        """
+        sorted_ids = array("q", sorted(set(ids)))
+        index = {article_id: i for i, article_id in enumerate(sorted_ids)}
+        srcs = array("i")
+        dsts = array("i")
+        for src, dst in edges:
+            try:
+                srcs.append(index[src])
+                dsts.append(index[dst])
+            except KeyError as e:
+                raise ValueError(f"Link ({src}, {dst}) refers to unknown article {e}") from e
+        fwd_offsets, fwd_targets = _compress(len(sorted_ids), srcs, dsts)
+        rev_offsets, rev_targets = _compress(len(sorted_ids), dsts, srcs)
+        return cls(sorted_ids, fwd_offsets, fwd_targets, rev_offsets, rev_targets)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "CSRGraph":
+        """
+        Load the whole article graph which session ``db`` accesses, reading the ``link`` table
+        exactly once.
+
+        :param db: database session
+        :return: the graph of all articles and links in the database
+        """
+        ids = db.execute(select([Article.id])).scalars()
+        edges = db.execute(select([Link.src, Link.dst]).order_by(Link.src, Link.dst))
+        return cls.from_edges(ids, ((src, dst) for src, dst in edges))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        """The number of links in the graph."""
+        return len(self.fwd_targets)
+
+    @property
+    def fingerprint(self) -> int:
+        """
+        A checksum of the articles and links of the graph, computed on first use, which lets
+        structures derived from the graph tell whether it has changed since they were built.
+        """
+        if self._fingerprint is None:
+            checksum = 0
+            for values, typecode in (
+                (self.ids, "q"),
+                (self.fwd_offsets, "q"),
+                (self.fwd_targets, "i"),
+            ):
+                if not isinstance(values, (array, memoryview)):
+                    values = array(typecode, values)
+                checksum = crc32(values, checksum)
+            self._fingerprint = checksum
+        return self._fingerprint
+
+    def index_of(self, article_id: int) -> int:
+        """
+        :param article_id: id of an article in the graph
+        :return: the dense index of the article with id article_id
+        :raises ValueError: if no article in the graph has id article_id
+        """
+        i = bisect_left(self.ids, article_id)
+        if i == len(self.ids) or self.ids[i] != article_id:
+            raise ValueError(f"No article with id={article_id} found in graph")
+        return i
+
+    def id_of(self, index: int) -> int:
+        """
+        :param index: dense index of an article in the graph
+        :return: the id of the article with dense index ``index``
+        """
+        return self.ids[index]
+
+    def out_neighbors(self, index: int) -> Sequence[int]:
+        """
+        :param index: dense index of an article in the graph
+        :return: dense indices of the articles which article ``index`` links to
+        """
+        return self.fwd_targets[self.fwd_offsets[index] : self.fwd_offsets[index + 1]]
+
+    def in_neighbors(self, index: int) -> Sequence[int]:
+        """
+        :param index: dense index of an article in the graph
+        :return: dense indices of the articles which link to article ``index``
+        """
+        return self.rev_targets[self.rev_offsets[index] : self.rev_offsets[index + 1]]
+
+
+def _compress(n: int, rows: Sequence[int], cols: Sequence[int]) -> tuple[array, array]:
+    """
+    Counting-sort the (row, col) pairs formed by ``rows`` and ``cols`` into CSR offsets and
+    targets over ``n`` rows, keeping the relative order of pairs within a row.
+    """
+    offsets = array("q", bytes(8 * (n + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", bytes(4 * len(cols)))
+    fill = offsets[:-1]
+    for row, col in zip(rows, cols):
+        targets[fill[row]] = col
+        fill[row] += 1
+    return offsets, targets
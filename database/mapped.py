@@ -0,0 +1,153 @@
+"""
+This module contains helpers for the versioned binary files used to store derived views of the
+article graph, which are memory-mapped read-only so that processes share one copy of them.
+
+Each file is a fixed-size header followed by array sections, each starting on an 8-byte
+boundary. The header starts with an 8-byte magic string, a format version and a byte order
+marker, followed by fields specific to the kind of file.
+"""
+import mmap
+import os
+import struct
+from array import array
+from typing import Callable, Generic, Iterable, Optional, TypeVar, Union
+
+__all__ = ["MappedFile", "MappedCache", "write_mapped_file"]
+
+_PREFIX = "=8sII"
+_BYTE_ORDER_MARK = 0x01020304
+_ALIGNMENT = 8
+
+Buffer = Union[bytes, bytearray, memoryview, array]
+T = TypeVar("T")
+
+
+class MappedFile:
+    """
+    A read-only memory map of a file written by ``write_mapped_file``, whose sections are read
+    in order as zero-copy memoryviews.
+    """
+
+    def __init__(self, path: str, magic: bytes, version: int, fields: str) -> None:
+        """
+        :param path: path of the file
+        :param magic: expected magic string of the file
+        :param version: expected format version of the file
+        :param fields: struct format of the header fields following the version
+        :raises ValueError: if the file is not of the expected kind and version
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: list[memoryview] = []
+        header = struct.Struct(_PREFIX + fields)
+        try:
+            if len(self._mmap) < header.size:
+                raise ValueError(f"{path} is too small to contain a header")
+            file_magic, file_version, bom, *self.fields = header.unpack_from(self._mmap)
+            if file_magic != magic:
+                raise ValueError(f"{path} is not a {magic.decode()} file")
+            if file_version != version:
+                raise ValueError(
+                    f"{path} has format version {file_version}, expected {version}"
+                )
+            if bom != _BYTE_ORDER_MARK:
+                raise ValueError(
+                    f"{path} was written on a machine with a different byte order"
+                )
+        except ValueError:
+            self.close()
+            raise
+        self._pos = header.size
+
+    def section(self, typecode: str, length: int) -> memoryview:
+        """
+        :param typecode: array typecode of the elements of the next section
+        :param length: number of elements in the next section
+        :return: a view of the next section of the file
+        :raises ValueError: if the file ends before the section does
+        """
+        start = _align(self._pos)
+        end = start + struct.calcsize(typecode) * length
+        if end > len(self._mmap):
+            raise ValueError(f"{self.path} is truncated")
+        self._pos = end
+        with memoryview(self._mmap) as buffer:
+            view = buffer[start:end].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def close(self) -> None:
+        """Unmap the file; views of its sections must not be used afterwards."""
+        for view in self._views:
+            view.release()
+        self._mmap.close()
+
+
+class MappedCache(Generic[T]):
+    """
+    Files loaded from their paths and shared across the process, each of which is loaded again
+    once the file at its path has been replaced, so that long-running processes pick up files
+    rebuilt after they were first loaded.
+
+    A replaced file is not unmapped, since it may still be in use; it is unmapped once nothing
+    refers to it.
+    """
+
+    def __init__(self, load: Callable[[str], T]) -> None:
+        """
+        :param load: loads the file at a path
+        """
+        self._load = load
+        self._files: dict[str, tuple[tuple[int, int], T]] = {}
+
+    def get(self, path: str) -> Optional[T]:
+        """
+        :param path: path of the file
+        :return: the file at path, loading it if it has not been loaded since it was last
+                replaced, or None if there is no file at path
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._files.pop(path, None)
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._files.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = stamp, self._load(path)
+            self._files[path] = cached
+        return cached[1]
+
+
+def write_mapped_file(
+    path: str,
+    magic: bytes,
+    version: int,
+    fields: str,
+    values: tuple,
+    sections: Iterable[Buffer],
+) -> None:
+    """
+    Write a file which ``MappedFile`` can read to a temporary file which then replaces
+    ``path``, so processes which have already mapped an older file at ``path`` are unaffected.
+
+    :param path: path of the file
+    :param magic: 8-byte magic string identifying the kind of file
+    :param version: format version of the file
+    :param fields: struct format of the header fields following the version
+    :param values: values of the header fields
+    :param sections: contents of each section, in order
+    """
+    header = struct.Struct(_PREFIX + fields)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.pack(magic, version, _BYTE_ORDER_MARK, *values))
+        for section in sections:
+            f.write(bytes(_align(f.tell()) - f.tell()))
+            f.write(memoryview(section))
+    os.replace(tmp_path, path)
+
+
+def _align(pos: int) -> int:
+    return -(-pos // _ALIGNMENT) * _ALIGNMENT
@@ -0,0 +1,50 @@
+"""
+This module contains migrations which bring databases created with older versions of the models
+up to date with the current ones.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+
+from .models import Link
+
+__all__ = ["cluster_links"]
+
+
+def cluster_links(engine: Engine) -> bool:
+    """
+    Rebuild the link table of a database created before links were stored clustered by their
+    primary key, as a table without rowids which has the reverse index on (dst, src).
+
+    :param engine: engine of the database to migrate
+    :return: whether the table was rebuilt; False if it was already clustered or does not exist
+    """
+    link = Link.__table__
+    old_name = f"{link.name}_rowid"
+    with engine.connect() as connection:
+        sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": link.name},
+        ).scalar()
+        if sql is None or "WITHOUT ROWID" in sql.upper():
+            return False
+        foreign_keys = connection.execute(text("PRAGMA foreign_keys")).scalar()
+        connection.execute(text("PRAGMA foreign_keys=OFF"))
+        try:
+            with connection.begin():
+                for index in link.indexes:
+                    index.drop(bind=connection, checkfirst=True)  # type: ignore
+                connection.execute(text(f"ALTER TABLE {link.name} RENAME TO {old_name}"))
+                connection.execute(CreateTable(link))
+                connection.execute(
+                    text(
+                        f"INSERT INTO {link.name} (src, dst) "
+                        f"SELECT src, dst FROM {old_name} ORDER BY src, dst"
+                    )
+                )
+                for index in link.indexes:
+                    index.create(bind=connection)
+                connection.execute(text(f"DROP TABLE {old_name}"))
+        finally:
+            connection.execute(text(f"PRAGMA foreign_keys={foreign_keys}"))
+    return True
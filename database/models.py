@@ -4,17 +4,21 @@ the article graph.
 """
 from typing import Iterable
 
-from sqlalchemy import Column, ForeignKey, Integer, Text, PrimaryKeyConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 
 from .constants import Base
 
-__all__ = ["Article", "Link"]
+__all__ = ["Article", "Link", "Redirect", "Metadata", "CachedPath"]
 
 
 class Link(Base):
     """
     A link between two articles.
+
+    Links are stored without rowids, clustered by their primary key, so the links leaving an
+    article are read from one range of the table, and the covering index on (dst, src) makes
+    reading the links entering an article just as cheap.
     """
 
     __tablename__ = "link"
@@ -22,7 +26,11 @@ class Link(Base):
     src = Column(Integer, ForeignKey("article.id"), nullable=False)
     dst = Column(Integer, ForeignKey("article.id"), nullable=False)
 
-    __table_args__ = (PrimaryKeyConstraint("src", "dst"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("src", "dst"),
+        Index("ix_link_dst_src", "dst", "src"),
+        {"sqlite_with_rowid": False},
+    )
 
 
 class Article(Base):
@@ -33,8 +41,48 @@ class Article(Base):
     __tablename__ = "article"
 
     id = Column(Integer, primary_key=True)
-    title = Column(Text, nullable=False)
+    title = Column(Text, nullable=False, index=True)
     in_links: Iterable[Link] = relationship(
         "Link", backref="destination", foreign_keys=[Link.dst]
     )
     out_links: Iterable[Link] = relationship("Link", backref="origin", foreign_keys=[Link.src])
+
+
+class Redirect(Base):
+    """
+    A page which redirects to an article, which is not itself an article of the graph, so that
+    its title still resolves to the article.
+    """
+
+    __tablename__ = "redirect"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(Text, nullable=False, index=True)
+    target = Column(Integer, ForeignKey("article.id"), nullable=False)
+
+
+class Metadata(Base):
+    """
+    A named value describing the database as a whole, such as the version of the article graph.
+    """
+
+    __tablename__ = "metadata"
+
+    key = Column(Text, primary_key=True)
+    value = Column(Text, nullable=False)
+
+
+class CachedPath(Base):
+    """
+    The result of a query for a shortest path between two titles, against one version of the
+    article graph.
+    """
+
+    __tablename__ = "cached_path"
+
+    version = Column(Text, primary_key=True)
+    src = Column(Text, primary_key=True)
+    dst = Column(Text, primary_key=True)
+    outcome = Column(Text, nullable=False)
+    # JSON list of the [id, title] pairs of the articles on the path, if one was found
+    articles = Column(Text)
@@ -0,0 +1,64 @@
+"""
+This module contains the collapsing of redirect pages out of the article graph, so that links
+to a redirect lead straight to the article it redirects to.
+"""
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session as SessionTy
+
+from .models import Article, Link, Redirect
+
+__all__ = ["MAX_REDIRECT_HOPS", "collapse_redirects"]
+
+# number of times chains of redirects to redirects are shortened, each by at least one hop
+MAX_REDIRECT_HOPS = 4
+
+_article = Article.__table__
+_link = Link.__table__
+_redirect = Redirect.__table__
+
+
+def collapse_redirects(db: SessionTy) -> int:
+    """
+    Remove the articles recorded as redirects from the graph which session ``db`` accesses,
+    rewriting links to a redirect to lead to the article it redirects to instead.
+
+    Chains of redirects are followed for at least MAX_REDIRECT_HOPS hops. Redirects which do
+    not then lead to an article, such as redirects in a cycle, are forgotten and left in the
+    graph as ordinary articles. The changes are committed with the session's
+    transaction.
+
+    :param db: database session
+    :return: the number of redirects removed from the graph
+    """
+    redirect_ids = select([_redirect.c.id])
+    next_redirect = _redirect.alias()
+    for _ in range(MAX_REDIRECT_HOPS):
+        db.execute(
+            update(_redirect)
+            .where(_redirect.c.target.in_(redirect_ids))
+            .values(
+                target=select([next_redirect.c.target])
+                .where(next_redirect.c.id == _redirect.c.target)
+                .scalar_subquery()  # type: ignore
+            )
+        )
+    db.execute(
+        delete(_redirect).where(
+            _redirect.c.target.in_(redirect_ids)
+            | _redirect.c.target.notin_(select([_article.c.id]))
+        )
+    )
+    db.execute(delete(_link).where(_link.c.src.in_(redirect_ids)))
+    db.execute(
+        insert(_link)
+        .prefix_with("OR IGNORE")
+        .from_select(
+            ["src", "dst"],
+            select([_link.c.src, _redirect.c.target])
+            .select_from(_link.join(_redirect, _link.c.dst == _redirect.c.id))
+            .where(_link.c.src != _redirect.c.target),
+        )
+    )
+    db.execute(delete(_link).where(_link.c.dst.in_(redirect_ids)))
+    removed = db.execute(delete(_article).where(_article.c.id.in_(redirect_ids)))
+    return removed.rowcount
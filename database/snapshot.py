@@ -0,0 +1,140 @@
+"""
+This module contains the on-disk snapshot format for the article graph, which lets processes
+memory-map a prebuilt graph instead of reading it out of the database on startup.
+
+After the header, a snapshot contains the following sections:
+
+- ``ids``: int64[n], article ids in increasing order
+- ``fwd_offsets``: int64[n + 1] and ``fwd_targets``: int32[m], the forward CSR arrays
+- ``rev_offsets``: int64[n + 1] and ``rev_targets``: int32[m], the reverse CSR arrays
+- ``title_offsets``: int64[n + 1] into ``titles``, the UTF-8 encoded titles of all articles
+"""
+from array import array
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .constants import SNAPSHOT_PATH
+from .graph import CSRGraph
+from .mapped import Buffer, MappedCache, MappedFile, write_mapped_file
+from .models import Article
+
+__all__ = [
+    "SNAPSHOT_VERSION",
+    "GraphSnapshot",
+    "write_snapshot",
+    "build_snapshot",
+    "get_snapshot",
+    "get_graph",
+]
+
+SNAPSHOT_MAGIC = b"WIKIGRPH"
+SNAPSHOT_VERSION = 1
+# number of articles, number of links, title bytes
+_FIELDS = "QQQ"
+
+_open_snapshots: MappedCache["GraphSnapshot"] = MappedCache(lambda path: GraphSnapshot(path))
+
+
+class GraphSnapshot:
+    """
+    An article graph and the titles of its articles, memory-mapped read-only from a snapshot
+    file so that every process opening the same file shares one page-cached copy.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: path of the snapshot file
+        :raises ValueError: if the file is not a snapshot of the current version
+        """
+        self._file = MappedFile(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _FIELDS)
+        try:
+            n, m, title_bytes = self._file.fields
+            ids = self._file.section("q", n)
+            fwd_offsets = self._file.section("q", n + 1)
+            fwd_targets = self._file.section("i", m)
+            rev_offsets = self._file.section("q", n + 1)
+            rev_targets = self._file.section("i", m)
+            self.graph = CSRGraph(ids, fwd_offsets, fwd_targets, rev_offsets, rev_targets)
+            self.title_offsets = self._file.section("q", n + 1)
+            self.titles = self._file.section("B", title_bytes)
+        except ValueError:
+            self._file.close()
+            raise
+
+    def title(self, index: int) -> str:
+        """
+        :param index: dense index of an article in the graph
+        :return: the title of the article with dense index ``index``
+        """
+        start, end = self.title_offsets[index], self.title_offsets[index + 1]
+        return bytes(self.titles[start:end]).decode("utf-8", errors="surrogatepass")
+
+    def close(self) -> None:
+        """Unmap the snapshot; the graph and titles must not be used afterwards."""
+        for name in ("graph", "title_offsets", "titles"):
+            self.__dict__.pop(name, None)
+        self._file.close()
+
+
+def write_snapshot(graph: CSRGraph, titles: Iterable[str], path: str = SNAPSHOT_PATH) -> None:
+    """
+    Write ``graph`` and the titles of its articles to a snapshot file at ``path``.
+
+    The snapshot is written to a temporary file which then replaces ``path``, so processes
+    which have already mapped an older snapshot at ``path`` are unaffected.
+
+    :param graph: article graph to write
+    :param titles: title of each article in the graph, in order of dense index
+    :param path: path of the snapshot file
+    :raises ValueError: if there is not exactly one title per article
+    """
+    title_offsets = array("q", [0])
+    title_blob = bytearray()
+    for title in titles:
+        title_blob += title.encode("utf-8", errors="surrogatepass")
+        title_offsets.append(len(title_blob))
+    if len(title_offsets) != len(graph) + 1:
+        raise ValueError(f"Expected {len(graph)} titles, got {len(title_offsets) - 1}")
+    sections: list[Buffer] = [
+        array("q", graph.ids),
+        array("q", graph.fwd_offsets),
+        array("i", graph.fwd_targets),
+        array("q", graph.rev_offsets),
+        array("i", graph.rev_targets),
+        title_offsets,
+        title_blob,
+    ]
+    values = (len(graph), graph.num_edges, len(title_blob))
+    write_mapped_file(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _FIELDS, values, sections)
+
+
+def build_snapshot(db: Session, path: str = SNAPSHOT_PATH) -> CSRGraph:
+    """
+    Write a snapshot of the article graph which session ``db`` accesses to ``path``.
+
+    :param db: database session
+    :param path: path of the snapshot file
+    :return: the graph which was written
+    """
+    graph = CSRGraph.from_db(db)
+    titles = db.execute(select([Article.title]).order_by(Article.id)).scalars()
+    write_snapshot(graph, titles, path)
+    return graph
+
+
+def get_snapshot(path: str = SNAPSHOT_PATH) -> Optional[GraphSnapshot]:
+    """
+    Return the snapshot at ``path``, mapping it on first use and sharing it across the process
+    until the snapshot is rebuilt, or None if no snapshot has been built at ``path``.
+    """
+    return _open_snapshots.get(path)
+
+
+def get_graph() -> Optional[CSRGraph]:
+    """
+    Return the article graph from the production snapshot, or None if it has not been built.
+    """
+    snapshot = get_snapshot()
+    return None if snapshot is None else snapshot.graph
@@ -8,11 +8,13 @@ from typing import TYPE_CHECKING
 import pytest
 from hypothesis import assume, strategies as st
 from hypothesis.stateful import Bundle, RuleBasedStateMachine, rule
+from sqlalchemy import select
 
-from .constants import TestSession, test_engine
-from ..__main__ import Base
+from .constants import TestSession
+from .utilities import init_tables
 from ..constants import MAX_SQLITE_INT, MIN_SQLITE_INT
 from ..models import Article, Link
+from ..utilities import count_statements
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -37,14 +39,6 @@ class MockLink:
     dst: int
 
 
-def init_tables() -> None:
-    """
-    Re-initialize the test database tables.
-    """
-    Base.metadata.drop_all(bind=test_engine, checkfirst=True)
-    Base.metadata.create_all(bind=test_engine, checkfirst=False)
-
-
 def is_valid_sqlite_int(n: int) -> bool:
     """
     :return: true if n is an integer which can be inserted into a SQLite database
@@ -151,3 +145,14 @@ class DatabaseInteractions(RuleBasedStateMachine):
 
 
 TestDatabaseInteractions = DatabaseInteractions.TestCase
+
+
+def test_count_statements_only_when_enabled():
+    with TestSession() as db:
+        with count_statements(db, enabled=False) as statements:
+            assert not db.in_transaction()
+            db.execute(select(Article.id)).all()
+        assert statements.count == 0
+        with count_statements(db) as statements:
+            db.execute(select(Article.id)).all()
+        assert statements.count == 1
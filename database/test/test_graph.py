@@ -0,0 +1,55 @@
+"""
+This module consists of tests for the in-memory CSR representation of the article graph.
+"""
+import pytest
+from hypothesis import given, strategies as st
+
+from .constants import TestSession
+from .utilities import init_tables
+from ..graph import CSRGraph
+from ..models import Article, Link
+
+pytestmark = [pytest.mark.database]
+
+edge_sets = st.sets(
+    st.tuples(st.integers(0, 30), st.integers(0, 30)).filter(lambda e: e[0] != e[1]),
+    max_size=200,
+)
+
+
+@given(edges=edge_sets, isolated=st.sets(st.integers(-10, 40), max_size=10))
+def test_from_edges_adjacency(edges: set[tuple[int, int]], isolated: set[int]):
+    ids = {n for edge in edges for n in edge} | isolated
+    graph = CSRGraph.from_edges(ids, edges)
+    assert list(graph.ids) == sorted(ids)
+    assert graph.num_edges == len(edges)
+    for article_id in ids:
+        i = graph.index_of(article_id)
+        assert graph.id_of(i) == article_id
+        out_ids = {graph.id_of(j) for j in graph.out_neighbors(i)}
+        in_ids = {graph.id_of(j) for j in graph.in_neighbors(i)}
+        assert out_ids == {dst for src, dst in edges if src == article_id}
+        assert in_ids == {src for src, dst in edges if dst == article_id}
+
+
+@given(edges=edge_sets)
+def test_from_db_matches_from_edges(edges: set[tuple[int, int]]):
+    init_tables()
+    ids = {n for edge in edges for n in edge}
+    with TestSession() as db:
+        db.add_all([Article(id=n, title=str(n)) for n in ids])
+        db.add_all([Link(src=src, dst=dst) for src, dst in edges])
+        db.commit()
+        from_db = CSRGraph.from_db(db)
+    from_edges = CSRGraph.from_edges(ids, edges)
+    assert list(from_db.ids) == list(from_edges.ids)
+    assert list(from_db.fwd_offsets) == list(from_edges.fwd_offsets)
+    assert list(from_db.rev_offsets) == list(from_edges.rev_offsets)
+    assert sorted(from_db.fwd_targets) == sorted(from_edges.fwd_targets)
+
+
+def test_unknown_article():
+    with pytest.raises(ValueError):
+        CSRGraph.from_edges([1], [(1, 2)])
+    with pytest.raises(ValueError):
+        CSRGraph.from_edges([1], []).index_of(2)
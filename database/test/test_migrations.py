@@ -0,0 +1,56 @@
+"""
+This module contains tests for migrating databases created with older versions of the models.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from ..constants import Base
+from ..migrations import cluster_links
+from ..models import Link
+
+pytestmark = [pytest.mark.database]
+
+OLD_SCHEMA = [
+    "CREATE TABLE article (id INTEGER NOT NULL PRIMARY KEY, title TEXT NOT NULL)",
+    "CREATE TABLE link (src INTEGER NOT NULL REFERENCES article (id), "
+    "dst INTEGER NOT NULL REFERENCES article (id), PRIMARY KEY (src, dst))",
+]
+
+
+def table_sql(engine, name: str) -> str:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name},
+        ).scalar()
+
+
+def test_cluster_links(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        for statement in OLD_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO article VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+        connection.execute(text("INSERT INTO link VALUES (3, 1), (1, 2), (2, 1), (1, 3)"))
+    assert cluster_links(engine)
+    assert "WITHOUT ROWID" in table_sql(engine, "link")
+    assert [index["name"] for index in inspect(engine).get_indexes("link")] == [
+        "ix_link_dst_src"
+    ]
+    with engine.connect() as connection:
+        links = connection.execute(select(Link.src, Link.dst)).all()
+    assert sorted(links) == [(1, 2), (1, 3), (2, 1), (3, 1)]
+    assert not cluster_links(engine)
+
+
+def test_links_expand_both_ways_by_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+    link = Link.__table__
+    with engine.connect() as connection:
+        for key, other in ((link.c.src, link.c.dst), (link.c.dst, link.c.src)):
+            query = select(key, other).where(key.in_([1, 2, 3]))
+            compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+            details = " ".join(row[-1] for row in plan)
+            assert "SEARCH" in details and "SCAN" not in details
@@ -0,0 +1,46 @@
+"""
+This module consists of tests for collapsing redirects out of the article graph.
+"""
+import pytest
+
+from .constants import TestSession
+from ..models import Article, Link, Redirect
+from ..redirects import MAX_REDIRECT_HOPS, collapse_redirects
+
+pytestmark = [pytest.mark.database]
+
+
+def test_links_to_redirects_rewritten(empty_db):
+    # 3 redirects to 4 through 2, and 5 and 6 redirect to each other
+    titles = {1: "A", 2: "B", 3: "C", 4: "D", 5: "E", 6: "F"}
+    links = [(1, 2), (1, 3), (1, 4), (2, 4), (3, 2), (4, 3), (4, 5), (5, 6), (6, 5)]
+    redirects = [(2, 4), (3, 2), (5, 6), (6, 5)]
+    with TestSession() as db:
+        db.add_all(Article(id=i, title=title) for i, title in titles.items())
+        db.flush()
+        db.add_all(Link(src=src, dst=dst) for src, dst in links)
+        db.add_all(Redirect(id=i, title=titles[i], target=target) for i, target in redirects)
+        db.commit()
+        assert collapse_redirects(db) == 2
+        db.commit()
+        assert {article.id for article in db.query(Article)} == {1, 4, 5, 6}
+        assert {(link.src, link.dst) for link in db.query(Link)} == {
+            (1, 4),
+            (4, 5),
+            (5, 6),
+            (6, 5),
+        }
+        assert {(r.id, r.target) for r in db.query(Redirect)} == {(2, 4), (3, 4)}
+
+
+def test_redirect_chains_followed(empty_db):
+    chain = range(MAX_REDIRECT_HOPS + 2)
+    with TestSession() as db:
+        db.add_all(Article(id=i, title=str(i)) for i in chain)
+        db.flush()
+        db.add_all(Redirect(id=i, title=str(i), target=i + 1) for i in chain[:-1])
+        db.commit()
+        assert collapse_redirects(db) == len(chain) - 1
+        db.commit()
+        assert [article.id for article in db.query(Article)] == [chain[-1]]
+        assert {r.target for r in db.query(Redirect)} == {chain[-1]}
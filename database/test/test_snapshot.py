@@ -0,0 +1,76 @@
+"""
+This module consists of tests for writing and memory-mapping graph snapshots.
+"""
+import struct
+
+import pytest
+from hypothesis import HealthCheck, given, settings, strategies as st
+
+from ..graph import CSRGraph
+from ..snapshot import SNAPSHOT_VERSION, GraphSnapshot, get_snapshot, write_snapshot
+
+pytestmark = [pytest.mark.database]
+
+
+@st.composite
+def graphs_and_titles(draw) -> tuple[CSRGraph, list[str]]:
+    """Generates small article graphs along with a title for each article."""
+    ids = draw(st.lists(st.integers(-(1 << 40), 1 << 40), unique=True, max_size=30))
+    edges = (
+        draw(st.sets(st.tuples(st.sampled_from(ids), st.sampled_from(ids)), max_size=100))
+        if ids
+        else set()
+    )
+    titles = draw(st.lists(st.text(), min_size=len(ids), max_size=len(ids)))
+    return CSRGraph.from_edges(ids, edges), titles
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(graph_titles=graphs_and_titles())
+def test_snapshot_roundtrip(tmp_path, graph_titles: tuple[CSRGraph, list[str]]):
+    graph, titles = graph_titles
+    path = str(tmp_path / "graph.snapshot")
+    write_snapshot(graph, titles, path)
+    snapshot = GraphSnapshot(path)
+    try:
+        mapped = snapshot.graph
+        assert list(mapped.ids) == list(graph.ids)
+        assert list(mapped.fwd_offsets) == list(graph.fwd_offsets)
+        assert list(mapped.fwd_targets) == list(graph.fwd_targets)
+        assert list(mapped.rev_offsets) == list(graph.rev_offsets)
+        assert list(mapped.rev_targets) == list(graph.rev_targets)
+        assert [snapshot.title(i) for i in range(len(mapped))] == titles
+        for i, article_id in enumerate(graph.ids):
+            assert mapped.index_of(article_id) == i
+    finally:
+        del mapped
+        snapshot.close()
+
+
+def test_snapshot_rejects_other_versions(tmp_path):
+    path = tmp_path / "graph.snapshot"
+    write_snapshot(CSRGraph.from_edges([1, 2], [(1, 2)]), ["a", "b"], str(path))
+    contents = bytearray(path.read_bytes())
+    struct.pack_into("=I", contents, 8, SNAPSHOT_VERSION + 1)
+    path.write_bytes(contents)
+    with pytest.raises(ValueError):
+        GraphSnapshot(str(path))
+
+
+def test_snapshot_rejects_title_mismatch(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(
+            CSRGraph.from_edges([1, 2], []), ["a"], str(tmp_path / "graph.snapshot")
+        )
+
+
+def test_get_snapshot_reloads_rebuilt_snapshot(tmp_path):
+    path = str(tmp_path / "graph.snapshot")
+    assert get_snapshot(path) is None
+    write_snapshot(CSRGraph.from_edges([1, 2], [(1, 2)]), ["a", "b"], path)
+    snapshot = get_snapshot(path)
+    assert snapshot is not None and get_snapshot(path) is snapshot
+    write_snapshot(CSRGraph.from_edges([1, 2, 3], [(1, 3)]), ["a", "b", "c"], path)
+    rebuilt = get_snapshot(path)
+    assert rebuilt is not snapshot and rebuilt is not None
+    assert len(rebuilt.graph) == 3 and len(snapshot.graph) == 2
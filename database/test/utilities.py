@@ -0,0 +1,15 @@
+"""
+This module contains utilities for testing against the test database.
+"""
+from database.constants import Base
+from .constants import test_engine
+
+__all__ = ["init_tables"]
+
+
+def init_tables() -> None:
+    """
+    Re-initialize the test database tables.
+    """
+    Base.metadata.drop_all(bind=test_engine, checkfirst=True)
+    Base.metadata.create_all(bind=test_engine, checkfirst=False)
@@ -2,13 +2,30 @@
 This module contains utilities for initializing and interacting with the database which is
 used to store the article graph.
 """
+import uuid
+from contextlib import contextmanager
 from sqlite3 import Connection as SQLite3Connection
+from typing import Iterator
 
+from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as SessionTy
 
 from .constants import Base, Session
+from .models import Metadata
 
-__all__ = ["set_sqlite_foreign_key_pragma", "get_db", "clear_db"]
+__all__ = [
+    "set_sqlite_foreign_key_pragma",
+    "get_db",
+    "clear_db",
+    "StatementCounter",
+    "count_statements",
+    "GRAPH_VERSION_KEY",
+    "get_graph_version",
+    "bump_graph_version",
+]
+
+GRAPH_VERSION_KEY = "graph_version"
 
 
 def set_sqlite_foreign_key_pragma(conn, _connection_record):
@@ -38,3 +55,59 @@ def clear_db(engine: Engine) -> None:
     """Drop and recreate all tables in the database with engine ``engine``."""
     Base.metadata.drop_all(bind=engine, checkfirst=True)
     Base.metadata.create_all(bind=engine, checkfirst=False)
+
+
+class StatementCounter:
+    """The number of SQL statements executed within a ``count_statements`` block."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _before_cursor_execute(self, *_args) -> None:
+        self.count += 1
+
+
+@contextmanager
+def count_statements(db: SessionTy, enabled: bool = True) -> Iterator[StatementCounter]:
+    """
+    Count the SQL statements which session ``db`` executes within the block, excluding those
+    of any other session sharing the same engine.
+
+    :param db: database session
+    :param enabled: whether to count statements; if not, the session is left untouched and the
+                    count stays 0
+    :return: a counter which is updated as statements are executed
+    """
+    counter = StatementCounter()
+    if not enabled:
+        yield counter
+        return
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(connection, "before_cursor_execute", counter._before_cursor_execute)
+
+
+def get_graph_version(db: SessionTy) -> str:
+    """
+    :param db: database session
+    :return: the stamp identifying the current contents of the article graph, or an empty
+            string if it has never been stamped
+    """
+    metadata = db.query(Metadata).get(GRAPH_VERSION_KEY)
+    return "" if metadata is None else metadata.value
+
+
+def bump_graph_version(db: SessionTy) -> str:
+    """
+    Stamp the article graph with a new version, which is never equal to an earlier one even
+    after the database is cleared. The change is committed with the session's transaction.
+
+    :param db: database session
+    :return: the new version stamp
+    """
+    version = uuid.uuid4().hex
+    db.merge(Metadata(key=GRAPH_VERSION_KEY, value=version))
+    return version
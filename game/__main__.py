@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Builds the precomputed indexes used to speed up pathfinding.
+"""
+import os
+import time
+
+import typer
+from sqlalchemy import select
+
+from database import Article, CSRGraph, Session, get_graph, get_snapshot
+from .completion import COMPLETIONS_PATH, TitleCompletions
+from .labeling import LABELS_PATH, DistanceLabels
+from .landmarks import (
+    DEFAULT_LANDMARK_COUNT,
+    DISTANCE_FORMATS,
+    LANDMARK_STRATEGIES,
+    LANDMARKS_PATH,
+    Landmarks,
+)
+from .reachability import DEFAULT_TRAVERSALS, REACHABILITY_PATH, ReachabilityIndex
+
+app = typer.Typer()
+
+
+@app.callback()
+def main() -> None:
+    """
+    Build the precomputed indexes used to speed up pathfinding.
+    """
+
+
+@app.command("landmarks")
+def build_landmarks(
+    count: int = typer.Option(DEFAULT_LANDMARK_COUNT, help="Number of landmarks to select"),
+    strategy: str = typer.Option(
+        "degree", help=f"How to select landmarks, one of {', '.join(LANDMARK_STRATEGIES)}"
+    ),
+    distance_format: str = typer.Option(
+        "uint8", help=f"How to store distances, one of {', '.join(DISTANCE_FORMATS)}"
+    ),
+    path: str = typer.Option(LANDMARKS_PATH, help="Where to write the landmarks"),
+) -> None:
+    """
+    Select landmark articles and store the distances between them and every article.
+    """
+    start = time.perf_counter()
+    graph = _load_graph()
+    try:
+        landmarks = Landmarks.from_graph(graph, count, strategy, distance_format)
+    except ValueError as e:
+        msg = typer.style(e, fg=typer.colors.WHITE, bg=typer.colors.RED)
+        typer.echo(msg, err=True)
+        raise typer.Exit(code=1)
+    landmarks.save(path)
+    typer.echo(
+        f"Wrote {landmarks.count} landmarks for {len(graph)} articles to {path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+@app.command("labels")
+def build_labels(
+    path: str = typer.Option(LABELS_PATH, help="Where to write the distance labels"),
+) -> None:
+    """
+    Label every article with the hubs which shortest paths to and from it pass through, so
+    that distances between articles can be looked up without a search.
+    """
+    start = time.perf_counter()
+    graph = _load_graph()
+    labels = DistanceLabels.from_graph(graph)
+    labels.save(path)
+    typer.echo(
+        f"Wrote {labels.num_entries} label entries "
+        f"({labels.num_entries / max(len(graph), 1):.1f} per article) for {len(graph)} "
+        f"articles to {path} ({os.path.getsize(path)} bytes) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+@app.command("reachability")
+def build_reachability(
+    traversals: int = typer.Option(
+        DEFAULT_TRAVERSALS, help="Number of interval labels of each component"
+    ),
+    path: str = typer.Option(REACHABILITY_PATH, help="Where to write the reachability index"),
+) -> None:
+    """
+    Group articles into strongly connected components and label the components, so that most
+    pairs of articles with no path between them are rejected without a search.
+    """
+    start = time.perf_counter()
+    graph = _load_graph()
+    index = ReachabilityIndex.from_graph(graph, traversals)
+    index.save(path)
+    typer.echo(
+        f"Wrote {index.num_components} components of {len(graph)} articles to {path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+@app.command("completions")
+def build_completions(
+    path: str = typer.Option(COMPLETIONS_PATH, help="Where to write the completion index"),
+) -> None:
+    """
+    Sort the case-folded titles of articles, so that titles can be completed from a prefix
+    by binary search.
+    """
+    start = time.perf_counter()
+    graph = _load_graph()
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.graph is graph:
+        completions = TitleCompletions.from_snapshot(snapshot)
+    else:
+        with Session() as db:
+            titles = dict(db.execute(select([Article.id, Article.title])).all())
+        completions = TitleCompletions.from_graph(
+            graph, [titles[graph.id_of(i)] for i in range(len(graph))]
+        )
+    completions.save(path)
+    typer.echo(
+        f"Wrote titles of {len(graph)} articles to {path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def _load_graph() -> CSRGraph:
+    graph = get_graph()
+    if graph is None:
+        with Session() as db:
+            graph = CSRGraph.from_db(db)
+    return graph
+
+
+if __name__ == "__main__":
+    app(prog_name="game")
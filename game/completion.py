@@ -0,0 +1,319 @@
+"""
+This module contains an index for completing the titles of articles from a typed prefix, so
+that players can be offered articles to start and end at as they type.
+
+Titles are case-folded and sorted, so that the titles starting with a prefix form a contiguous
+range of the sorted titles, which is found by binary search. Completions can also be ranked by
+the number of links to each article, using a segment tree over the sorted titles which holds
+the most linked article of each range.
+"""
+import re
+import sys
+from array import array
+from heapq import heappop, heappush
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+from sqlalchemy.orm import Session
+
+from database import Article, CSRGraph, GraphSnapshot
+from database.mapped import Buffer, MappedCache, MappedFile, write_mapped_file
+from .utilities import titles_for_ids
+
+__all__ = [
+    "COMPLETIONS_PATH",
+    "DEFAULT_COMPLETIONS",
+    "fold_title",
+    "TitleCompletions",
+    "get_completions",
+    "complete_titles",
+]
+
+COMPLETIONS_PATH = "./wikigame.complete"
+# number of completions returned when no limit is given
+DEFAULT_COMPLETIONS = 10
+
+COMPLETIONS_MAGIC = b"WIKICOMP"
+COMPLETIONS_VERSION = 2
+# number of articles, number of links, number of bytes of folded titles, fingerprint of the
+# graph
+_FIELDS = "QQQI"
+
+_SEPARATORS = re.compile(r"[\s_]+")
+
+_open_completions: MappedCache["TitleCompletions"] = MappedCache(
+    lambda path: TitleCompletions.load(path)
+)
+
+
+def fold_title(title: str) -> str:
+    """
+    :param title: title or prefix of a title, as typed
+    :return: title with underscores and runs of whitespace replaced by single spaces, leading
+            whitespace removed, and case folded, so that titles typed in any case match
+
+    >>> fold_title(" albert_EINSTEIN")
+    'albert einstein'
+    >>> fold_title("Straße ")
+    'strasse '
+    """
+    return _SEPARATORS.sub(" ", title).lstrip().casefold()
+
+
+class TitleCompletions:
+    """
+    The case-folded titles of the articles of a graph in sorted order, and the number of links
+    to each article.
+    """
+
+    def __init__(
+        self,
+        num_edges: int,
+        order: Sequence[int],
+        degrees: Sequence[int],
+        best: Sequence[int],
+        key_offsets: Sequence[int],
+        keys: Sequence[int],
+        fingerprint: int = 0,
+    ) -> None:
+        """
+        :param num_edges: number of links in the graph which was indexed
+        :param order: dense index of the article at each position in sorted order
+        :param degrees: number of links to the article at each position
+        :param best: segment tree over positions, holding the position of the most linked
+                     article in the range of each tree node, with leaves at len(order) onwards
+        :param key_offsets: offset of the folded title at each position in keys, and the
+                            length of keys
+        :param keys: UTF-8 encoded folded titles, in sorted order
+        :param fingerprint: fingerprint of the graph which was indexed
+        """
+        self.num_edges = num_edges
+        self.order = order
+        self.degrees = degrees
+        self.best = best
+        self.key_offsets = key_offsets
+        self.keys = keys
+        self.fingerprint = fingerprint
+        self._file: Optional[MappedFile] = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @classmethod
+    def from_graph(cls, graph: CSRGraph, titles: Sequence[str]) -> "TitleCompletions":
+        """
+        Sort the folded titles of the articles of ``graph``.
+
+        :param graph: article graph
+        :param titles: title of each article in graph, in order of dense index
+        :return: the completion index of graph
+        :raises ValueError: if there is not exactly one title per article
+        """
+        n = len(graph)
+        if len(titles) != n:
+            raise ValueError(f"Expected {n} titles, got {len(titles)}")
+        folded = [
+            fold_title(title).encode("utf-8", errors="surrogatepass") for title in titles
+        ]
+        order = array("i", sorted(range(n), key=lambda i: (folded[i], titles[i])))
+        degrees = array("i", (len(graph.in_neighbors(i)) for i in order))
+        best = array("i", [0]) * n + array("i", range(n))
+        for node in range(n - 1, 0, -1):
+            left, right = best[2 * node], best[2 * node + 1]
+            best[node] = right if degrees[right] > degrees[left] else left
+        key_offsets = array("q", [0])
+        keys = bytearray()
+        for i in order:
+            keys += folded[i]
+            key_offsets.append(len(keys))
+        return cls(graph.num_edges, order, degrees, best, key_offsets, keys, graph.fingerprint)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GraphSnapshot) -> "TitleCompletions":
+        """:return: the completion index of the graph in ``snapshot``"""
+        graph = snapshot.graph
+        return cls.from_graph(graph, [snapshot.title(i) for i in range(len(graph))])
+
+    def complete(
+        self, prefix: str, limit: int = DEFAULT_COMPLETIONS, ranked: bool = False
+    ) -> list[int]:
+        """
+        :param prefix: prefix of the titles to complete, as typed
+        :param limit: largest number of completions to return
+        :param ranked: whether to return the most linked articles first rather than the
+                       articles in order of title
+        :return: the dense indices of at most limit articles whose folded titles start with
+                the folded prefix
+        """
+        key = fold_title(prefix).encode("utf-8", errors="surrogatepass")
+        lo = self._bisect(key, 0, after=False)
+        hi = self._bisect(key, lo, after=True)
+        if not ranked:
+            return [self.order[pos] for pos in range(lo, min(hi, lo + limit))]
+        return [self.order[pos] for pos in self._most_linked(lo, hi, limit)]
+
+    def _bisect(self, key: bytes, lo: int, after: bool) -> int:
+        """
+        :return: the first position from lo onwards whose folded title, truncated to the length
+                of key, sorts after key if after is True, or does not sort before key otherwise
+        """
+        hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.key_offsets[mid]
+            end = min(start + len(key), self.key_offsets[mid + 1])
+            truncated = bytes(self.keys[start:end])
+            if truncated < key or (after and truncated == key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _most_linked(self, lo: int, hi: int, limit: int) -> list[int]:
+        """
+        :return: the positions from lo to hi of the at most limit most linked articles, most
+                linked first and in sorted order among articles with equally many links
+        """
+        n = len(self)
+        best, degrees = self.best, self.degrees
+        heap: list[tuple[int, int, int]] = []
+
+        def push(node: int) -> None:
+            pos = best[node]
+            heappush(heap, (-degrees[pos], pos, node))
+
+        # push the tree nodes whose ranges exactly cover lo to hi
+        lo, hi = lo + n, hi + n
+        while lo < hi:
+            if lo & 1:
+                push(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                push(hi)
+            lo, hi = lo // 2, hi // 2
+        positions: list[int] = []
+        while heap and len(positions) < limit:
+            _, pos, node = heappop(heap)
+            if node >= n:
+                positions.append(pos)
+            else:
+                push(2 * node)
+                push(2 * node + 1)
+        return positions
+
+    def save(self, path: str = COMPLETIONS_PATH) -> None:
+        """Write the index to a file at ``path``."""
+        values = (len(self), self.num_edges, len(self.keys), self.fingerprint)
+        sections: list[Buffer] = [
+            array("i", self.order),
+            array("i", self.degrees),
+            array("i", self.best),
+            array("q", self.key_offsets),
+            bytes(self.keys),
+        ]
+        write_mapped_file(
+            path, COMPLETIONS_MAGIC, COMPLETIONS_VERSION, _FIELDS, values, sections
+        )
+
+    @classmethod
+    def load(cls, path: str = COMPLETIONS_PATH) -> "TitleCompletions":
+        """
+        Memory-map the index written to ``path`` by ``save``.
+
+        :raises ValueError: if the file is not a completion index of the current version
+        """
+        file = MappedFile(path, COMPLETIONS_MAGIC, COMPLETIONS_VERSION, _FIELDS)
+        try:
+            n, m, key_bytes, fingerprint = file.fields
+            sections = (
+                file.section("i", n),
+                file.section("i", n),
+                file.section("i", 2 * n),
+                file.section("q", n + 1),
+                file.section("B", key_bytes),
+            )
+        except ValueError:
+            file.close()
+            raise
+        completions = cls(m, *sections, fingerprint)
+        completions._file = file
+        return completions
+
+
+def get_completions(
+    graph: CSRGraph, path: str = COMPLETIONS_PATH
+) -> Optional[TitleCompletions]:
+    """
+    Return the index at ``path``, mapping it on first use and sharing it across the process
+    until it is rebuilt, or None if no index for ``graph`` has been built there, as told by its
+    size and fingerprint.
+    """
+    completions = _open_completions.get(path)
+    if (
+        completions is None
+        or len(completions) != len(graph)
+        or completions.num_edges != graph.num_edges
+        or completions.fingerprint != graph.fingerprint
+    ):
+        return None
+    return completions
+
+
+def complete_titles(
+    db: Session,
+    prefix: str,
+    limit: int = DEFAULT_COMPLETIONS,
+    graph: Optional[CSRGraph] = None,
+    completions: Optional[TitleCompletions] = None,
+    snapshot: Optional[GraphSnapshot] = None,
+    ranked: bool = False,
+) -> list[str]:
+    """
+    Complete the titles of articles starting with ``prefix``.
+
+    :param db: database session
+    :param prefix: prefix of the titles to complete, as typed
+    :param limit: largest number of completions to return
+    :param graph: article graph
+    :param completions: completion index of ``graph``; if not provided along with graph, the
+                        titles are matched in the database instead, and are not ranked
+    :param snapshot: snapshot of the article graph, which titles are read from if provided
+    :param ranked: whether to return the titles of the most linked articles first
+    :return: at most limit titles starting with prefix, ignoring case; titles matched in the
+            database only ignore the case of their first letter, as Wikipedia does
+    """
+    if graph is None or completions is None:
+        return db.execute(_prefix_query(prefix, limit)).scalars().all()
+    indices = completions.complete(prefix, limit, ranked)
+    return titles_for_ids(db, [graph.id_of(i) for i in indices], snapshot)
+
+
+def _prefix_query(prefix: str, limit: int) -> Select:
+    """
+    Select the first ``limit`` titles starting with ``prefix`` as the range of titles between
+    the prefix and its successor, which SQLite finds by searching the index on titles.
+    """
+    prefix = _SEPARATORS.sub(" ", prefix).lstrip()
+    prefix = prefix[:1].upper() + prefix[1:]
+    query = select([Article.title]).where(Article.title >= prefix)
+    successor = _successor(prefix)
+    if successor is not None:
+        query = query.where(Article.title < successor)
+    return query.order_by(Article.title).limit(limit)
+
+
+def _successor(prefix: str) -> Optional[str]:
+    """
+    :return: the least string greater than every string starting with ``prefix`` in code point
+            order, or None if there is no such string
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    last = ord(stripped[-1]) + 1
+    # surrogates cannot be encoded, and sort between the code points around them in UTF-8
+    if 0xD800 <= last <= 0xDFFF:
+        last = 0xE000
+    return stripped[:-1] + chr(last)
@@ -0,0 +1,249 @@
+"""
+This module contains an exact distance oracle over the article graph built by pruned landmark
+labeling, which answers how many clicks separate two articles without running a search.
+
+Every node ``v`` gets an out-label of (hub, distance from v to hub) pairs and an in-label of
+(hub, distance from hub to v) pairs, such that a shortest path from ``u`` to ``v`` passes
+through some hub in both the out-label of ``u`` and the in-label of ``v``.
+"""
+from array import array
+from typing import Callable, Optional, Sequence
+
+from database import CSRGraph
+from database.mapped import MappedCache, MappedFile, write_mapped_file
+
+__all__ = ["LABELS_PATH", "DistanceLabels", "get_labels"]
+
+LABELS_PATH = "./wikigame.labels"
+
+LABELS_MAGIC = b"WIKILABL"
+LABELS_VERSION = 2
+# distance typecode, number of articles, out-label entries, in-label entries, fingerprint of
+# the graph
+_FIELDS = "4sQQQI"
+
+_open_labels: MappedCache["DistanceLabels"] = MappedCache(
+    lambda path: DistanceLabels.load(path)
+)
+
+
+class DistanceLabels:
+    """
+    Out-labels and in-labels of every node of a graph, stored in compressed sparse row form.
+    Hubs are identified by their rank in the order they were labeled in, and the entries of
+    each label are sorted by hub rank.
+    """
+
+    def __init__(
+        self,
+        out_offsets: Sequence[int],
+        out_hubs: Sequence[int],
+        out_dists: Sequence[int],
+        in_offsets: Sequence[int],
+        in_hubs: Sequence[int],
+        in_dists: Sequence[int],
+        fingerprint: int = 0,
+    ) -> None:
+        """
+        :param out_offsets: offsets into out_hubs and out_dists, of length n + 1
+        :param out_hubs: hub rank of each out-label entry
+        :param out_dists: distance from the labeled node to the hub of each out-label entry
+        :param in_offsets: offsets into in_hubs and in_dists, of length n + 1
+        :param in_hubs: hub rank of each in-label entry
+        :param in_dists: distance from the hub to the labeled node of each in-label entry
+        :param fingerprint: fingerprint of the graph the labels were computed on
+        """
+        self.out_offsets = out_offsets
+        self.out_hubs = out_hubs
+        self.out_dists = out_dists
+        self.in_offsets = in_offsets
+        self.in_hubs = in_hubs
+        self.in_dists = in_dists
+        self.fingerprint = fingerprint
+        self._file: Optional[MappedFile] = None
+
+    def __len__(self) -> int:
+        return len(self.out_offsets) - 1
+
+    @property
+    def num_entries(self) -> int:
+        """The total number of entries in all labels."""
+        return len(self.out_hubs) + len(self.in_hubs)
+
+    @classmethod
+    def from_graph(cls, graph: CSRGraph) -> "DistanceLabels":
+        """
+        Label every node of ``graph`` by running a pruned BFS forwards and backwards from each
+        node, in decreasing order of degree.
+
+        A BFS from a hub stops expanding a node once the labels built so far already prove a
+        path at most as short as the one the BFS found, so later hubs touch ever fewer nodes.
+
+        :param graph: article graph
+        :return: labels of every node of graph
+        """
+        n = len(graph)
+        order = sorted(
+            range(n),
+            key=lambda v: graph.fwd_offsets[v]
+            - graph.fwd_offsets[v + 1]
+            + graph.rev_offsets[v]
+            - graph.rev_offsets[v + 1],
+        )
+        out_hubs: list[list[int]] = [[] for _ in range(n)]
+        out_dists: list[list[int]] = [[] for _ in range(n)]
+        in_hubs: list[list[int]] = [[] for _ in range(n)]
+        in_dists: list[list[int]] = [[] for _ in range(n)]
+        # distances between the current hub and the hubs in its own label, indexed by rank
+        hub_dists = array("i", [-1]) * n
+        # number of the search which last visited each node
+        visited = array("q", [-1]) * n
+        for rank, hub in enumerate(order):
+            searches = (
+                (graph.out_neighbors, out_hubs[hub], out_dists[hub], in_hubs, in_dists),
+                (graph.in_neighbors, in_hubs[hub], in_dists[hub], out_hubs, out_dists),
+            )
+            for direction, (neighbors, own_hubs, own_dists, hubs, dists) in enumerate(
+                searches
+            ):
+                for h, d in zip(own_hubs, own_dists):
+                    hub_dists[h] = d
+                search = 2 * rank + direction
+                _pruned_bfs(hub, rank, search, neighbors, hub_dists, visited, hubs, dists)
+                for h in own_hubs:
+                    hub_dists[h] = -1
+        return cls(
+            *_compress(out_hubs, out_dists),
+            *_compress(in_hubs, in_dists),
+            graph.fingerprint,
+        )
+
+    def distance(self, src: int, dst: int) -> Optional[int]:
+        """
+        :param src: dense index of the node a path starts from
+        :param dst: dense index of the node a path ends at
+        :return: the length of a shortest path from src to dst, or None if no such path exists
+        """
+        out_start, out_end = self.out_offsets[src], self.out_offsets[src + 1]
+        in_start, in_end = self.in_offsets[dst], self.in_offsets[dst + 1]
+        to_hubs = dict(
+            zip(self.out_hubs[out_start:out_end], self.out_dists[out_start:out_end])
+        )
+        return min(
+            (
+                to_hubs[hub] + d
+                for hub, d in zip(
+                    self.in_hubs[in_start:in_end], self.in_dists[in_start:in_end]
+                )
+                if hub in to_hubs
+            ),
+            default=None,
+        )
+
+    def save(self, path: str = LABELS_PATH) -> None:
+        """Write the labels to a file at ``path``."""
+        longest = max(max(self.out_dists, default=0), max(self.in_dists, default=0))
+        typecode = "B" if longest < 256 else "H"
+        values = (
+            typecode.encode(),
+            len(self),
+            len(self.out_hubs),
+            len(self.in_hubs),
+            self.fingerprint,
+        )
+        sections = [
+            array("q", self.out_offsets),
+            array("i", self.out_hubs),
+            array(typecode, self.out_dists),
+            array("q", self.in_offsets),
+            array("i", self.in_hubs),
+            array(typecode, self.in_dists),
+        ]
+        write_mapped_file(path, LABELS_MAGIC, LABELS_VERSION, _FIELDS, values, sections)
+
+    @classmethod
+    def load(cls, path: str = LABELS_PATH) -> "DistanceLabels":
+        """
+        Memory-map the labels written to ``path`` by ``save``.
+
+        :raises ValueError: if the file is not a labels file of the current version
+        """
+        file = MappedFile(path, LABELS_MAGIC, LABELS_VERSION, _FIELDS)
+        try:
+            raw_typecode, n, num_out, num_in, fingerprint = file.fields
+            typecode = raw_typecode.rstrip(b"\0").decode()
+            if typecode not in ("B", "H"):
+                raise ValueError(f"{path} has unknown distance typecode {typecode}")
+            sections = (
+                file.section("q", n + 1),
+                file.section("i", num_out),
+                file.section(typecode, num_out),
+                file.section("q", n + 1),
+                file.section("i", num_in),
+                file.section(typecode, num_in),
+            )
+        except ValueError:
+            file.close()
+            raise
+        labels = cls(*sections, fingerprint)
+        labels._file = file
+        return labels
+
+
+def get_labels(graph: CSRGraph, path: str = LABELS_PATH) -> Optional[DistanceLabels]:
+    """
+    Return the labels at ``path``, mapping them on first use and sharing them across the
+    process until they are rebuilt, or None if no labels for ``graph`` have been built there,
+    as told by its size and fingerprint.
+    """
+    labels = _open_labels.get(path)
+    if labels is None or len(labels) != len(graph) or labels.fingerprint != graph.fingerprint:
+        return None
+    return labels
+
+
+def _pruned_bfs(
+    hub: int,
+    rank: int,
+    search: int,
+    neighbors: Callable[[int], Sequence[int]],
+    hub_dists: array,
+    visited: array,
+    labels_hubs: list[list[int]],
+    labels_dists: list[list[int]],
+) -> None:
+    """
+    Add ``(rank, distance)`` to the labels of every node the pruned BFS from ``hub`` reaches,
+    where ``hub_dists`` holds the distances in the opposite-direction label of hub and nodes
+    are marked visited by setting them to ``search`` in ``visited``.
+    """
+    frontier = [hub]
+    visited[hub] = search
+    depth = 0
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            if any(
+                hub_dists[h] != -1 and hub_dists[h] + d <= depth
+                for h, d in zip(labels_hubs[node], labels_dists[node])
+            ):
+                continue
+            labels_hubs[node].append(rank)
+            labels_dists[node].append(depth)
+            for linked in neighbors(node):
+                if visited[linked] != search:
+                    visited[linked] = search
+                    next_frontier.append(linked)
+        frontier = next_frontier
+        depth += 1
+
+
+def _compress(hubs: list[list[int]], dists: list[list[int]]) -> tuple[array, array, array]:
+    offsets = array("q", [0])
+    flat_hubs = array("i")
+    flat_dists = array("i")
+    for node_hubs, node_dists in zip(hubs, dists):
+        flat_hubs.extend(node_hubs)
+        flat_dists.extend(node_dists)
+        offsets.append(len(flat_hubs))
+    return offsets, flat_hubs, flat_dists
@@ -0,0 +1,375 @@
+"""
+This module contains landmark-based (ALT) goal-directed search, which uses precomputed
+distances to and from a few landmark articles to bound the distance between any two articles
+via the triangle inequality.
+"""
+import math
+import sys
+from array import array
+from heapq import heappop, heappush
+from typing import Optional, Sequence
+
+from database import CSRGraph
+from database.mapped import MappedCache, MappedFile, write_mapped_file
+from .limits import SearchLimits
+from .traversal import UNREACHED, bfs_distances
+
+__all__ = [
+    "LANDMARKS_PATH",
+    "DEFAULT_LANDMARK_COUNT",
+    "LANDMARK_STRATEGIES",
+    "DISTANCE_FORMATS",
+    "Landmarks",
+    "select_landmarks",
+    "alt_bidi_search",
+    "get_landmarks",
+]
+
+LANDMARKS_PATH = "./wikigame.landmarks"
+DEFAULT_LANDMARK_COUNT = 16
+LANDMARK_STRATEGIES = ("degree", "farthest")
+# names of the storage formats for distances, mapped to their array typecodes
+DISTANCE_FORMATS = {"uint8": "B", "uint16": "H"}
+
+LANDMARKS_MAGIC = b"WIKILMRK"
+LANDMARKS_VERSION = 2
+# distance typecode, number of landmarks, number of articles, fingerprint of the graph
+_FIELDS = "4sIQI"
+
+_open_landmarks: MappedCache["Landmarks"] = MappedCache(lambda path: Landmarks.load(path))
+
+
+class Landmarks:
+    """
+    Distances from each of a few landmark nodes to every node of a graph, and from every node
+    to each landmark.
+
+    Distances are stored node-major, so ``fwd_distances[v * count + k]`` is the distance from
+    landmark ``k`` to node ``v`` and ``rev_distances[v * count + k]`` is the distance from node
+    ``v`` to landmark ``k``. The largest value of the distance format marks unreachable pairs.
+    """
+
+    def __init__(
+        self,
+        landmarks: Sequence[int],
+        fwd_distances: Sequence[int],
+        rev_distances: Sequence[int],
+        num_nodes: int,
+        typecode: str,
+        fingerprint: int = 0,
+    ) -> None:
+        """
+        :param landmarks: dense indices of the landmark nodes
+        :param fwd_distances: distance from each landmark to each node
+        :param rev_distances: distance from each node to each landmark
+        :param num_nodes: number of nodes in the graph
+        :param typecode: array typecode the distances are stored with
+        :param fingerprint: fingerprint of the graph the distances were computed on
+        """
+        self.landmarks = landmarks
+        self.fwd_distances = fwd_distances
+        self.rev_distances = rev_distances
+        self.num_nodes = num_nodes
+        self.typecode = typecode
+        self.fingerprint = fingerprint
+        self.unreachable = _max_value(typecode)
+        self._file: Optional[MappedFile] = None
+
+    @property
+    def count(self) -> int:
+        """The number of landmarks."""
+        return len(self.landmarks)
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: CSRGraph,
+        count: int = DEFAULT_LANDMARK_COUNT,
+        strategy: str = "degree",
+        distance_format: str = "uint8",
+    ) -> "Landmarks":
+        """
+        Select landmarks of ``graph`` and compute the distances between them and every node.
+
+        :param graph: article graph
+        :param count: number of landmarks to select
+        :param strategy: one of LANDMARK_STRATEGIES, see ``select_landmarks``
+        :param distance_format: one of the keys of DISTANCE_FORMATS
+        :return: the landmarks of graph
+        :raises ValueError: if strategy or distance_format is unknown, or if a distance does
+                            not fit in distance_format
+        """
+        if distance_format not in DISTANCE_FORMATS:
+            raise ValueError(f"Unknown distance format {distance_format}")
+        typecode = DISTANCE_FORMATS[distance_format]
+        unreachable = _max_value(typecode)
+        landmarks, columns = _select(graph, count, strategy)
+        stride = len(landmarks)
+        fwd_distances = array(typecode, [unreachable]) * (len(graph) * stride)
+        rev_distances = array(typecode, fwd_distances)
+        for k, (fwd_column, rev_column) in enumerate(columns):
+            for distances, column in (
+                (fwd_distances, fwd_column),
+                (rev_distances, rev_column),
+            ):
+                if max(column, default=0) >= unreachable:
+                    raise ValueError(
+                        f"Distance {max(column)} does not fit in format {distance_format}"
+                    )
+                distances[k::stride] = array(
+                    typecode, (unreachable if d == UNREACHED else d for d in column)
+                )
+        return cls(
+            array("i", landmarks),
+            fwd_distances,
+            rev_distances,
+            len(graph),
+            typecode,
+            graph.fingerprint,
+        )
+
+    def save(self, path: str = LANDMARKS_PATH) -> None:
+        """Write the landmarks and their distances to a file at ``path``."""
+        values = (self.typecode.encode(), self.count, self.num_nodes, self.fingerprint)
+        sections = [
+            array("i", self.landmarks),
+            array(self.typecode, self.fwd_distances),
+            array(self.typecode, self.rev_distances),
+        ]
+        write_mapped_file(path, LANDMARKS_MAGIC, LANDMARKS_VERSION, _FIELDS, values, sections)
+
+    @classmethod
+    def load(cls, path: str = LANDMARKS_PATH) -> "Landmarks":
+        """
+        Memory-map the landmarks written to ``path`` by ``save``.
+
+        :raises ValueError: if the file is not a landmarks file of the current version
+        """
+        file = MappedFile(path, LANDMARKS_MAGIC, LANDMARKS_VERSION, _FIELDS)
+        try:
+            raw_typecode, count, num_nodes, fingerprint = file.fields
+            typecode = raw_typecode.rstrip(b"\0").decode()
+            if typecode not in DISTANCE_FORMATS.values():
+                raise ValueError(f"{path} has unknown distance typecode {typecode}")
+            landmarks = file.section("i", count)
+            fwd_distances = file.section(typecode, num_nodes * count)
+            rev_distances = file.section(typecode, num_nodes * count)
+        except ValueError:
+            file.close()
+            raise
+        result = cls(landmarks, fwd_distances, rev_distances, num_nodes, typecode, fingerprint)
+        result._file = file
+        return result
+
+    def lower_bound(self, u: int, w: int) -> Optional[int]:
+        """
+        :param u: dense index of the node a path starts from
+        :param w: dense index of the node a path ends at
+        :return: a lower bound on the length of a shortest path from u to w, or None if the
+                landmarks prove that no such path exists
+        """
+        k = self.count
+        inf = self.unreachable
+        bound = 0
+        for from_u, from_w, to_u, to_w in zip(
+            self.fwd_distances[u * k : (u + 1) * k],
+            self.fwd_distances[w * k : (w + 1) * k],
+            self.rev_distances[u * k : (u + 1) * k],
+            self.rev_distances[w * k : (w + 1) * k],
+        ):
+            # d(L, w) <= d(L, u) + d(u, w)
+            if from_u != inf:
+                if from_w == inf:
+                    return None
+                bound = max(bound, from_w - from_u)
+            # d(u, L) <= d(u, w) + d(w, L)
+            if to_w != inf:
+                if to_u == inf:
+                    return None
+                bound = max(bound, to_u - to_w)
+        return bound
+
+
+def select_landmarks(graph: CSRGraph, count: int, strategy: str = "degree") -> list[int]:
+    """
+    Select up to ``count`` landmark nodes of ``graph``.
+
+    With the "degree" strategy, the nodes with the most links to or from them are selected.
+    With the "farthest" strategy, the node with the highest degree is selected first, and each
+    following landmark is the node farthest from all landmarks selected so far, among the nodes
+    which can both reach and be reached from the first.
+
+    :param graph: article graph
+    :param count: number of landmarks to select
+    :param strategy: one of LANDMARK_STRATEGIES
+    :return: dense indices of the landmarks
+    :raises ValueError: if strategy is unknown
+    """
+    return _select(graph, count, strategy)[0]
+
+
+def _select(
+    graph: CSRGraph, count: int, strategy: str
+) -> tuple[list[int], list[tuple[array, array]]]:
+    """
+    :return: landmarks selected as in ``select_landmarks``, and for each landmark the forward
+            and reverse BFS distances from it
+    """
+    if strategy not in LANDMARK_STRATEGIES:
+        raise ValueError(f"Unknown landmark selection strategy {strategy}")
+    count = min(count, len(graph))
+    by_degree = sorted(range(len(graph)), key=lambda v: -_degree(graph, v))
+    landmarks: list[int] = []
+    columns: list[tuple[array, array]] = []
+    # for the farthest strategy, the smallest round-trip distance to any landmark so far
+    spread = array("q", [sys.maxsize]) * len(graph)
+    while len(landmarks) < count:
+        if strategy == "degree" or not landmarks:
+            landmark = next(v for v in by_degree if v not in landmarks)
+        else:
+            landmark = max(range(len(graph)), key=spread.__getitem__)
+            if spread[landmark] <= 0:
+                landmark = next(v for v in by_degree if v not in landmarks)
+        fwd_column = bfs_distances(graph, landmark)
+        rev_column = bfs_distances(graph, landmark, reverse=True)
+        if strategy == "farthest":
+            for v, (fwd, rev) in enumerate(zip(fwd_column, rev_column)):
+                if fwd == UNREACHED or rev == UNREACHED:
+                    spread[v] = -1
+                else:
+                    spread[v] = min(spread[v], fwd + rev)
+        landmarks.append(landmark)
+        columns.append((fwd_column, rev_column))
+    return landmarks, columns
+
+
+def alt_bidi_search(
+    graph: CSRGraph,
+    landmarks: Landmarks,
+    src: int,
+    dst: int,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[list[int]]:
+    """
+    Find a shortest path of dense indices from ``src`` to ``dst`` in ``graph``, or None if no
+    such path exists, with a bidirectional A* search guided by landmark lower bounds.
+
+    Both directions use the average of the forward and reverse landmark potentials, which keeps
+    the search exact, and never expand nodes which the landmarks prove are not on any path
+    from src to dst.
+
+    :param graph: article graph
+    :param landmarks: landmarks of graph
+    :param src: dense index of the node to start from
+    :param dst: dense index of the node to end at
+    :param limits: if provided, checked before settling each node
+    :return: a shortest path from src to dst, or None if no such path exists
+    :raises SearchCutOff: if the search reaches any of its limits
+    """
+    if src == dst:
+        return [src]
+    if landmarks.lower_bound(src, dst) is None:
+        return None
+    potentials: dict[int, Optional[int]] = {}
+
+    def potential(v: int) -> Optional[int]:
+        # twice the forward potential of v, or None if v is on no path from src to dst
+        if v not in potentials:
+            to_dst = landmarks.lower_bound(v, dst)
+            from_src = landmarks.lower_bound(src, v)
+            potentials[v] = None if to_dst is None or from_src is None else to_dst - from_src
+        return potentials[v]
+
+    fwd_dist = {src: 0}
+    rev_dist = {dst: 0}
+    fwd_parents: dict[int, Optional[int]] = {src: None}
+    rev_parents: dict[int, Optional[int]] = {dst: None}
+    src_potential, dst_potential = potential(src), potential(dst)
+    assert src_potential is not None and dst_potential is not None
+    fwd_heap = [(src_potential, src)]
+    rev_heap = [(-dst_potential, dst)]
+    settled: tuple[set[int], set[int]] = (set(), set())
+    best = math.inf
+    meeting: Optional[int] = None
+    while fwd_heap and rev_heap and fwd_heap[0][0] + rev_heap[0][0] < 2 * best:
+        forward = fwd_heap[0][0] <= rev_heap[0][0]
+        heap, dist, parents, opp_dist, done, neighbors, sign = (
+            (fwd_heap, fwd_dist, fwd_parents, rev_dist, settled[0], graph.out_neighbors, 1)
+            if forward
+            else (
+                rev_heap,
+                rev_dist,
+                rev_parents,
+                fwd_dist,
+                settled[1],
+                graph.in_neighbors,
+                -1,
+            )
+        )
+        _, node = heappop(heap)
+        if node in done:
+            continue
+        if limits is not None:
+            limits.expand()
+        done.add(node)
+        linked_dist = dist[node] + 1
+        for linked in neighbors(node):
+            if linked in done or dist.get(linked, linked_dist + 1) <= linked_dist:
+                continue
+            linked_potential = potential(linked)
+            if linked_potential is None:
+                continue
+            dist[linked] = linked_dist
+            parents[linked] = node
+            heappush(heap, (2 * linked_dist + sign * linked_potential, linked))
+            if linked in opp_dist and linked_dist + opp_dist[linked] < best:
+                best = linked_dist + opp_dist[linked]
+                meeting = linked
+    if meeting is None:
+        return None
+    return _path_through(meeting, fwd_parents, rev_parents)
+
+
+def _path_through(
+    meeting: int, fwd_parents: dict[int, Optional[int]], rev_parents: dict[int, Optional[int]]
+) -> list[int]:
+    path = [meeting]
+    curr = fwd_parents[meeting]
+    while curr is not None:
+        path.append(curr)
+        curr = fwd_parents[curr]
+    path.reverse()
+    curr = rev_parents[meeting]
+    while curr is not None:
+        path.append(curr)
+        curr = rev_parents[curr]
+    return path
+
+
+def get_landmarks(graph: CSRGraph, path: str = LANDMARKS_PATH) -> Optional[Landmarks]:
+    """
+    Return the landmarks at ``path``, mapping them on first use and sharing them across the
+    process until they are rebuilt, or None if no landmarks for ``graph`` have been built
+    there, as told by its size and fingerprint.
+    """
+    landmarks = _open_landmarks.get(path)
+    if (
+        landmarks is None
+        or landmarks.num_nodes != len(graph)
+        or landmarks.fingerprint != graph.fingerprint
+    ):
+        return None
+    return landmarks
+
+
+def _degree(graph: CSRGraph, v: int) -> int:
+    return (
+        graph.fwd_offsets[v + 1]
+        - graph.fwd_offsets[v]
+        + graph.rev_offsets[v + 1]
+        - graph.rev_offsets[v]
+    )
+
+
+def _max_value(typecode: str) -> int:
+    return 2 ** (8 * array(typecode).itemsize) - 1
@@ -0,0 +1,70 @@
+"""
+This module contains limits on the work a search may do, which let callers bound the time a
+single query can take and cancel searches whose results are no longer wanted.
+"""
+import threading
+import time
+from typing import Optional
+
+__all__ = ["CUT_OFF_REASONS", "SearchCutOff", "SearchLimits"]
+
+# reasons a search can be cut off for, as SearchCutOff.reason
+CUT_OFF_REASONS = ("expansions", "deadline", "cancelled")
+
+
+class SearchCutOff(Exception):
+    """Raised when a search is stopped by its limits before it has found an answer."""
+
+    def __init__(self, reason: str, expansions: int) -> None:
+        """
+        :param reason: one of CUT_OFF_REASONS
+        :param expansions: number of articles the search expanded before it was cut off
+        """
+        super().__init__(f"Search cut off by {reason} after {expansions} expansions")
+        self.reason = reason
+        self.expansions = expansions
+
+
+class SearchLimits:
+    """
+    The largest number of articles a search may expand and the time it may take, which a
+    search checks before expanding each article or level. Any thread may cancel the search.
+    """
+
+    def __init__(
+        self, max_expansions: Optional[int] = None, deadline: Optional[float] = None
+    ) -> None:
+        """
+        :param max_expansions: largest number of articles to expand, or None for no limit
+        :param deadline: seconds from now after which to stop searching, or None for no limit
+        """
+        self.max_expansions = max_expansions
+        self.expansions = 0
+        self._stop_at = None if deadline is None else time.monotonic() + deadline
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Cut off the search the next time it checks its limits."""
+        self._cancelled.set()
+
+    def expand(self, count: int = 1) -> None:
+        """
+        Record that the search is about to expand ``count`` more articles.
+
+        :raises SearchCutOff: if the search has been cancelled, has passed its deadline, or
+                              would expand more articles than it may
+
+        >>> limits = SearchLimits(max_expansions=3)
+        >>> limits.expand(2)
+        >>> limits.expand(2)
+        Traceback (most recent call last):
+        ...
+        game.limits.SearchCutOff: Search cut off by expansions after 2 expansions
+        """
+        if self._cancelled.is_set():
+            raise SearchCutOff("cancelled", self.expansions)
+        if self._stop_at is not None and time.monotonic() > self._stop_at:
+            raise SearchCutOff("deadline", self.expansions)
+        if self.max_expansions is not None and self.expansions + count > self.max_expansions:
+            raise SearchCutOff("expansions", self.expansions)
+        self.expansions += count
@@ -2,23 +2,115 @@
 This module contains pathfinding functions which use the article graph database for finding
 shortest paths between articles.
 """
+import os
+import time
 from collections import deque
-from typing import Mapping, Optional, cast
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    cast,
+)
 
 from sqlalchemy.orm import Session as SessionTy
 
-from database import Article
-from .utilities import id_to_title, title_to_id
+from database import Article, CSRGraph, FrontierLinks, count_statements
+from database.constants import SNAPSHOT_PATH
+from database.snapshot import get_snapshot
+from .labeling import DistanceLabels
+from .landmarks import LANDMARKS_PATH, Landmarks, alt_bidi_search, get_landmarks
+from .limits import SearchLimits
+from .reachability import REACHABILITY_PATH, ReachabilityIndex, get_reachability
+from .traversal import (
+    MAX_SOURCES,
+    ROOT,
+    UNREACHED,
+    LevelStats,
+    direction_optimizing_bfs,
+    level_bfs,
+    multi_source_bfs,
+    tree_path,
+)
+from .tree_cache import TreeCache
+from .utilities import ids_for_titles, title_to_id, titles_for_ids
 
-__all__ = ["bidi_bfs", "multi_target_bfs", "follow_parent_pointers"]
+__all__ = [
+    "SearchStats",
+    "ShortestPathTree",
+    "WorkerStats",
+    "bidi_bfs",
+    "solve_many",
+    "click_distance",
+    "is_reachable",
+    "multi_target_bfs",
+    "batch_multi_target_bfs",
+    "targeted_bfs",
+    "follow_parent_pointers",
+]
 
 ParentMapping = Mapping[int, Optional[int]]
 ParentDict = dict[int, Optional[int]]
 IDPath = list[int]
 TitlePath = list[str]
+LevelExpander = Callable[[Sequence[int]], Iterable[tuple[int, int]]]
 
+# targeted_bfs runs one bidirectional search per target for at most this many targets
+MAX_BACKWARD_TARGETS = 4
+# number of pairs solve_many sends to a worker at a time
+DEFAULT_CHUNK_SIZE = 16
 
-def bidi_bfs(db: SessionTy, src_title: str, dst_title: str) -> Optional[TitlePath]:
+
+@dataclass
+class SearchStats:
+    """Counters describing the work done by a single search."""
+
+    sql_statements: int = 0
+    # statistics of each level of a full search of the in-memory graph
+    levels: list[LevelStats] = field(default_factory=list)
+
+
+@dataclass
+class WorkerStats:
+    """Counters describing the work done by one worker process of a batch of searches."""
+
+    pairs: int = 0
+    # time spent searching, excluding time spent waiting for pairs
+    seconds: float = 0.0
+
+    @property
+    def pairs_per_second(self) -> float:
+        """The number of pairs the worker solved per second spent searching."""
+        return self.pairs / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class ShortestPathTree:
+    """Shortest paths from one article to all articles it can reach."""
+
+    # number of clicks from the source to each reachable article
+    distances: dict[int, int]
+    # mapping from each reachable article to its ancestor, as multi_target_bfs returns
+    parents: ParentDict
+
+
+def bidi_bfs(
+    db: SessionTy,
+    src_title: str,
+    dst_title: str,
+    graph: Optional[CSRGraph] = None,
+    batched: bool = False,
+    stats: Optional[SearchStats] = None,
+    landmarks: Optional[Landmarks] = None,
+    tree_cache: Optional[TreeCache] = None,
+    reachability: Optional[ReachabilityIndex] = None,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[TitlePath]:
     """
     Given a graph represented in the database which session ``db`` accesses, find the shortest
     path from the article with title ``src_title`` to the article with title ``dst_title``, or
@@ -27,14 +119,270 @@ def bidi_bfs(db: SessionTy, src_title: str, dst_title: str) -> Optional[TitlePat
     :param db: database session
     :param src_title: title of the article to start from
     :param dst_title: title of the article to end at
+    :param graph: in-memory copy of the article graph to traverse instead of loading links
+                  through ``db``; titles are still resolved through ``db``
+    :param batched: if no graph is provided, expand a whole level of the search per batch of
+                    SQL statements instead of loading each article's links through the ORM
+    :param stats: if provided, updated with the work done by the search
+    :param landmarks: landmarks of ``graph``; if provided along with graph, the search is
+                      guided towards dst_title by landmark distance bounds
+    :param tree_cache: cache of shortest-path trees of ``graph``; if it holds the tree from
+                       src_title, the path is read from the tree instead of searched for
+    :param reachability: reachability index of ``graph``; if provided along with graph, no
+                         search is run when the index proves that no path exists
+    :param limits: if provided, bounds the work done by the search
     :return: a shortest path starting from src_title and ending at dst_title,
             or None if no such path exists
     :raises ValueError: if either src_id or dst_id cannot be found from a title
+    :raises SearchCutOff: if the search reaches any of its limits
     """
     if src_title == dst_title:
         return [src_title]
-    src_id = title_to_id(db, src_title)
-    dst_id = title_to_id(db, dst_title)
+    with count_statements(db, enabled=stats is not None) as statements:
+        try:
+            src_id, dst_id = ids_for_titles(db, [src_title, dst_title])
+            id_path = _bidi_bfs(
+                db,
+                src_id,
+                dst_id,
+                graph,
+                batched,
+                landmarks,
+                tree_cache,
+                reachability,
+                limits,
+            )
+            return None if id_path is None else titles_for_ids(db, id_path)
+        finally:
+            if stats is not None:
+                stats.sql_statements += statements.count
+
+
+def solve_many(
+    db: SessionTy,
+    pairs: Iterable[tuple[str, str]],
+    workers: Optional[int] = None,
+    snapshot_path: str = SNAPSHOT_PATH,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    worker_stats: Optional[dict[int, WorkerStats]] = None,
+    landmarks_path: str = LANDMARKS_PATH,
+    reachability_path: str = REACHABILITY_PATH,
+) -> Iterator[Optional[TitlePath]]:
+    """
+    Find a shortest path for each (source title, destination title) pair in ``pairs``, fanning
+    the searches out to a pool of worker processes.
+
+    Every worker memory-maps the graph snapshot at ``snapshot_path``, so they share one
+    page-cached copy of the graph and read the titles on each path from it, while only the
+    calling process resolves titles through ``db``. Workers also use the landmarks and
+    reachability index of the snapshot when they have been built.
+
+    :param db: database session
+    :param pairs: titles of the articles to start and end each path at
+    :param workers: number of worker processes; defaults to the number of CPUs
+    :param snapshot_path: path of the graph snapshot the workers search
+    :param chunk_size: number of pairs sent to a worker at a time
+    :param worker_stats: if provided, updated with the work done by each worker, keyed by the
+                         worker's process id
+    :param landmarks_path: path of the landmarks of the snapshot, used if built there
+    :param reachability_path: path of the reachability index of the snapshot, used if built
+                              there
+    :return: an iterator over a shortest path for each pair, in the order of pairs, or None
+            for pairs with no path, yielding paths as they are found
+    :raises ValueError: if no snapshot has been built at snapshot_path, or if any article
+                        cannot be found from a title; raised before any search starts
+    """
+    if get_snapshot(snapshot_path) is None:
+        raise ValueError(f"No graph snapshot found at {snapshot_path}")
+    pairs = list(pairs)
+    ids = ids_for_titles(db, [title for pair in pairs for title in pair])
+    id_pairs = list(zip(ids[::2], ids[1::2]))
+    chunks = [
+        id_pairs[start : start + chunk_size] for start in range(0, len(id_pairs), chunk_size)
+    ]
+    paths = (snapshot_path, landmarks_path, reachability_path)
+    return _solve_chunks(chunks, workers, paths, worker_stats)
+
+
+def _solve_chunks(
+    chunks: list[list[tuple[int, int]]],
+    workers: Optional[int],
+    paths: tuple[str, str, str],
+    worker_stats: Optional[dict[int, WorkerStats]],
+) -> Iterator[Optional[TitlePath]]:
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_attach_snapshot, initargs=paths
+    ) as executor:
+        for pid, seconds, chunk_paths in executor.map(_solve_chunk, chunks):
+            if worker_stats is not None:
+                stats = worker_stats.setdefault(pid, WorkerStats())
+                stats.pairs += len(chunk_paths)
+                stats.seconds += seconds
+            yield from chunk_paths
+
+
+# paths of the snapshot, landmarks and reachability index searched by this worker process
+_worker_paths: Optional[tuple[str, str, str]] = None
+
+
+def _attach_snapshot(snapshot_path: str, landmarks_path: str, reachability_path: str) -> None:
+    """Map the snapshot searched by solve_many into a newly started worker process."""
+    global _worker_paths
+    _worker_paths = (snapshot_path, landmarks_path, reachability_path)
+    get_snapshot(snapshot_path)
+
+
+def _solve_chunk(
+    id_pairs: list[tuple[int, int]]
+) -> tuple[int, float, list[Optional[TitlePath]]]:
+    """
+    Search the graph snapshot of this worker for a shortest path between each pair of
+    articles in ``id_pairs``.
+
+    :return: the id of this process, the time spent searching, and the titles on a shortest
+            path for each pair
+    """
+    assert _worker_paths is not None
+    snapshot_path, landmarks_path, reachability_path = _worker_paths
+    snapshot = get_snapshot(snapshot_path)
+    assert snapshot is not None
+    graph = snapshot.graph
+    landmarks = get_landmarks(graph, landmarks_path)
+    reachability = get_reachability(graph, reachability_path)
+    start = time.perf_counter()
+    paths: list[Optional[TitlePath]] = []
+    for src_id, dst_id in id_pairs:
+        index_path = _graph_bidi_bfs(
+            graph, graph.index_of(src_id), graph.index_of(dst_id), landmarks, reachability
+        )
+        paths.append(
+            None if index_path is None else [snapshot.title(index) for index in index_path]
+        )
+    return os.getpid(), time.perf_counter() - start, paths
+
+
+def click_distance(
+    db: SessionTy,
+    src_title: str,
+    dst_title: str,
+    graph: Optional[CSRGraph] = None,
+    labels: Optional[DistanceLabels] = None,
+    batched: bool = False,
+    stats: Optional[SearchStats] = None,
+    reachability: Optional[ReachabilityIndex] = None,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[int]:
+    """
+    Find the number of clicks on a shortest path from the article with title ``src_title`` to
+    the article with title ``dst_title``, or None if no such path exists.
+
+    :param db: database session
+    :param src_title: title of the article to start from
+    :param dst_title: title of the article to end at
+    :param graph: in-memory copy of the article graph
+    :param labels: distance labels of ``graph``; if provided along with graph, the distance is
+                   looked up from the labels instead of found by a search
+    :param batched: as in ``bidi_bfs``, used if no labels are provided
+    :param stats: if provided, updated with the work done
+    :param reachability: as in ``bidi_bfs``, used if no labels are provided
+    :param limits: as in ``bidi_bfs``, used if no labels are provided
+    :return: the length of a shortest path from src_title to dst_title, or None if no such
+            path exists
+    :raises ValueError: if either src_id or dst_id cannot be found from a title
+    :raises SearchCutOff: if a search is run and reaches any of its limits
+    """
+    if graph is None or labels is None:
+        path = bidi_bfs(
+            db,
+            src_title,
+            dst_title,
+            graph=graph,
+            batched=batched,
+            stats=stats,
+            reachability=reachability,
+            limits=limits,
+        )
+        return None if path is None else len(path) - 1
+    with count_statements(db, enabled=stats is not None) as statements:
+        try:
+            src_id, dst_id = ids_for_titles(db, [src_title, dst_title])
+            return labels.distance(graph.index_of(src_id), graph.index_of(dst_id))
+        finally:
+            if stats is not None:
+                stats.sql_statements += statements.count
+
+
+def is_reachable(
+    db: SessionTy,
+    src_title: str,
+    dst_title: str,
+    graph: Optional[CSRGraph] = None,
+    reachability: Optional[ReachabilityIndex] = None,
+    batched: bool = False,
+    stats: Optional[SearchStats] = None,
+    limits: Optional[SearchLimits] = None,
+) -> bool:
+    """
+    Find whether any path leads from the article with title ``src_title`` to the article with
+    title ``dst_title``.
+
+    :param db: database session
+    :param src_title: title of the article to start from
+    :param dst_title: title of the article to end at
+    :param graph: in-memory copy of the article graph
+    :param reachability: reachability index of ``graph``; if provided along with graph, the
+                         answer is read from the index, and a search is only run for pairs
+                         which the index cannot decide
+    :param batched: as in ``bidi_bfs``, used if the index cannot decide
+    :param stats: if provided, updated with the work done
+    :param limits: as in ``bidi_bfs``, used if the index cannot decide
+    :return: whether a path from src_title to dst_title exists
+    :raises ValueError: if either src_id or dst_id cannot be found from a title
+    :raises SearchCutOff: if a search is run and reaches any of its limits
+    """
+    if graph is not None and reachability is not None:
+        with count_statements(db, enabled=stats is not None) as statements:
+            try:
+                src, dst = map(graph.index_of, ids_for_titles(db, [src_title, dst_title]))
+            finally:
+                if stats is not None:
+                    stats.sql_statements += statements.count
+        known = reachability.reachable(src, dst)
+        if known is not None:
+            return known
+    path = bidi_bfs(
+        db, src_title, dst_title, graph=graph, batched=batched, stats=stats, limits=limits
+    )
+    return path is not None
+
+
+def _bidi_bfs(
+    db: SessionTy,
+    src_id: int,
+    dst_id: int,
+    graph: Optional[CSRGraph],
+    batched: bool,
+    landmarks: Optional[Landmarks] = None,
+    tree_cache: Optional[TreeCache] = None,
+    reachability: Optional[ReachabilityIndex] = None,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[IDPath]:
+    if src_id == dst_id:
+        return [src_id]
+    if graph is not None:
+        src, dst = graph.index_of(src_id), graph.index_of(dst_id)
+        tree = None if tree_cache is None else tree_cache.get(graph, src_id)
+        index_path = (
+            _graph_bidi_bfs(graph, src, dst, landmarks, reachability, limits)
+            if tree is None
+            else tree_path(tree, dst)
+        )
+        return None if index_path is None else [graph.id_of(i) for i in index_path]
+    if batched:
+        frontier_links = FrontierLinks(db)
+        return _level_bidi_bfs(
+            src_id, dst_id, frontier_links.out_links, frontier_links.in_links, limits
+        )
     fwd_parents: ParentDict = {src_id: None}
     rev_parents: ParentDict = {dst_id: None}
     fwq_q = deque([src_id])
@@ -61,6 +409,8 @@ def bidi_bfs(db: SessionTy, src_title: str, dst_title: str) -> Optional[TitlePat
                 rev_expanded,
             )
         )
+        if limits is not None:
+            limits.expand()
         article_id = q.popleft()
         expanded.add(article_id)
         db_article: Optional[Article] = db.query(Article).get(article_id)
@@ -77,11 +427,11 @@ def bidi_bfs(db: SessionTy, src_title: str, dst_title: str) -> Optional[TitlePat
     if dst_id in fwd_parents:
         shortest_path = follow_parent_pointers(dst_id, fwd_parents)
         assert shortest_path is not None
-        return _id_path_to_title_path(db, shortest_path)
+        return shortest_path
     if src_id in rev_parents:
         rev_shortest_path = follow_parent_pointers(src_id, rev_parents)
         assert rev_shortest_path is not None
-        return _id_path_to_title_path(db, rev_shortest_path[::-1])
+        return rev_shortest_path[::-1]
     common = fwd_parents.keys() & rev_parents.keys()
     if not common:
         return None
@@ -93,11 +443,40 @@ def bidi_bfs(db: SessionTy, src_title: str, dst_title: str) -> Optional[TitlePat
     assert src_to_common is not None
     common_to_dst = follow_parent_pointers(common_node, rev_parents)
     assert common_to_dst is not None
-    shortest_path = src_to_common[:-1] + common_to_dst[::-1]
-    return _id_path_to_title_path(db, shortest_path)
+    return src_to_common[:-1] + common_to_dst[::-1]
+
+
+def _graph_bidi_bfs(
+    graph: CSRGraph,
+    src: int,
+    dst: int,
+    landmarks: Optional[Landmarks],
+    reachability: Optional[ReachabilityIndex] = None,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[IDPath]:
+    """Find a shortest path of dense indices from ``src`` to ``dst`` in ``graph``."""
+    if reachability is not None and reachability.reachable(src, dst) is False:
+        return None
+    if landmarks is not None:
+        return alt_bidi_search(graph, landmarks, src, dst, limits)
+    return _level_bidi_bfs(
+        src,
+        dst,
+        _csr_expander(graph.out_neighbors),
+        _csr_expander(graph.in_neighbors),
+        limits,
+    )
 
 
-def multi_target_bfs(db: SessionTy, src_title: str) -> ParentMapping:
+def multi_target_bfs(
+    db: SessionTy,
+    src_title: str,
+    graph: Optional[CSRGraph] = None,
+    batched: bool = False,
+    stats: Optional[SearchStats] = None,
+    tree_cache: Optional[TreeCache] = None,
+    limits: Optional[SearchLimits] = None,
+) -> ParentMapping:
     """
     Given a graph represented in the database which session ``db`` accesses, find the shortest
     path from the article with title ``src_title`` to all other reachable articles,
@@ -105,22 +484,187 @@ def multi_target_bfs(db: SessionTy, src_title: str) -> ParentMapping:
 
     :param db: database session
     :param src_title: title of the article to start from
+    :param graph: in-memory copy of the article graph to traverse instead of loading links
+                  through ``db``; titles are still resolved through ``db``. The graph is
+                  searched with ``direction_optimizing_bfs``
+    :param batched: if no graph is provided, expand a whole level of the search per batch of
+                    SQL statements instead of loading each article's links through the ORM
+    :param stats: if provided, updated with the work done by the search, including each
+                  level of a search of graph
+    :param tree_cache: cache of shortest-path trees of ``graph``, which the tree from
+                       src_title is read from or added to
+    :param limits: if provided, bounds the work done by the search
     :return: a mapping from articles to their ancestors in the shortest path from the article
             with title src_title
+    :raises SearchCutOff: if the search reaches any of its limits
+    """
+    with count_statements(db, enabled=stats is not None) as statements:
+        try:
+            src_id = title_to_id(db, src_title)
+            if graph is not None and tree_cache is not None:
+                tree = tree_cache.tree(graph, src_id, limits)
+                return _graph_parents_to_id_parents(graph, tree)
+            if graph is not None:
+                graph_parents = direction_optimizing_bfs(
+                    graph,
+                    graph.index_of(src_id),
+                    stats=None if stats is None else stats.levels,
+                    limits=limits,
+                )
+                return _graph_parents_to_id_parents(graph, graph_parents)
+            return _multi_target_bfs(db, src_id, graph, batched, limits=limits)
+        finally:
+            if stats is not None:
+                stats.sql_statements += statements.count
+
+
+def batch_multi_target_bfs(
+    db: SessionTy,
+    src_titles: Sequence[str],
+    graph: Optional[CSRGraph] = None,
+    stats: Optional[SearchStats] = None,
+) -> Iterator[tuple[str, ShortestPathTree]]:
+    """
+    Find the shortest paths from each article in ``src_titles`` to all other reachable
+    articles, searching from up to MAX_SOURCES sources with a single traversal of the graph.
+
+    :param db: database session
+    :param src_titles: titles of the articles to start from
+    :param graph: in-memory copy of the article graph; loaded through ``db`` if not provided
+    :param stats: if provided, updated with the work done to resolve titles and load the graph
+    :return: an iterator over each title in src_titles, in order, and the shortest paths
+            from the article with that title
+    :raises ValueError: if any article cannot be found from a title
     """
-    src_id = title_to_id(db, src_title)
+    with count_statements(db, enabled=stats is not None) as statements:
+        try:
+            src_ids = ids_for_titles(db, src_titles)
+            if graph is None:
+                graph = CSRGraph.from_db(db)
+        finally:
+            if stats is not None:
+                stats.sql_statements += statements.count
+    return _batch_multi_target_bfs(graph, list(zip(src_titles, src_ids)))
+
+
+def _batch_multi_target_bfs(
+    graph: CSRGraph, sources: list[tuple[str, int]]
+) -> Iterator[tuple[str, ShortestPathTree]]:
+    for start in range(0, len(sources), MAX_SOURCES):
+        batch = sources[start : start + MAX_SOURCES]
+        all_distances, all_parents = multi_source_bfs(
+            graph, [graph.index_of(src_id) for _, src_id in batch]
+        )
+        for (src_title, _), distances, parents in zip(batch, all_distances, all_parents):
+            id_distances = {
+                graph.id_of(node): distance
+                for node, distance in enumerate(distances)
+                if distance != UNREACHED
+            }
+            yield src_title, ShortestPathTree(
+                id_distances, _graph_parents_to_id_parents(graph, parents)
+            )
+
+
+def targeted_bfs(
+    db: SessionTy,
+    src_title: str,
+    dst_ids: Collection[int],
+    graph: Optional[CSRGraph] = None,
+    batched: bool = False,
+    stats: Optional[SearchStats] = None,
+    max_backward_targets: int = MAX_BACKWARD_TARGETS,
+    tree_cache: Optional[TreeCache] = None,
+    limits: Optional[SearchLimits] = None,
+) -> ParentMapping:
+    """
+    Given a graph represented in the database which session ``db`` accesses, find the shortest
+    path from the article with title ``src_title`` to each article in ``dst_ids``, represented
+    via the returned parent mapping.
+
+    Unlike ``multi_target_bfs``, the search stops as soon as every article in ``dst_ids`` has
+    been reached, and when there are at most ``max_backward_targets`` of them, each is instead
+    found by a bidirectional search which also searches backward from that article.
+
+    :param db: database session
+    :param src_title: title of the article to start from
+    :param dst_ids: ids of the articles to find shortest paths to
+    :param graph: in-memory copy of the article graph to traverse instead of loading links
+                  through ``db``; titles are still resolved through ``db``
+    :param batched: if no graph is provided, expand a whole level of the search per batch of
+                    SQL statements instead of loading each article's links through the ORM
+    :param stats: if provided, updated with the work done by the search
+    :param max_backward_targets: largest number of targets to search backward from
+    :param tree_cache: cache of shortest-path trees of ``graph``; if provided along with graph,
+                       paths are read from the whole tree from src_title if it is cached, or
+                       if src_title has been searched from before, in which case the tree is
+                       built and cached first
+    :param limits: if provided, bounds the work done by the search
+    :return: a mapping from articles to their ancestors in the shortest path from the article
+            with title src_title, which contains every reachable article in dst_ids
+    :raises SearchCutOff: if the search reaches any of its limits
+    """
+    with count_statements(db, enabled=stats is not None) as statements:
+        try:
+            src_id = title_to_id(db, src_title)
+            if graph is not None and tree_cache is not None:
+                tree = tree_cache.repeated_tree(graph, src_id, limits)
+                if tree is not None:
+                    return _tree_id_parents(graph, src_id, tree, dst_ids)
+            if len(dst_ids) > max_backward_targets:
+                return _multi_target_bfs(
+                    db, src_id, graph, batched, targets=dst_ids, limits=limits
+                )
+            parents: ParentDict = {src_id: None}
+            for dst_id in dst_ids:
+                path = _bidi_bfs(db, src_id, dst_id, graph, batched, limits=limits)
+                if path is not None:
+                    parents |= {node: parent for parent, node in zip(path, path[1:])}
+            return parents
+        finally:
+            if stats is not None:
+                stats.sql_statements += statements.count
+
+
+def _multi_target_bfs(
+    db: SessionTy,
+    src_id: int,
+    graph: Optional[CSRGraph],
+    batched: bool,
+    targets: Optional[Collection[int]] = None,
+    limits: Optional[SearchLimits] = None,
+) -> ParentMapping:
+    """
+    Find a parent mapping of shortest paths from ``src_id``, stopping once every article in
+    ``targets`` has a parent if targets are provided.
+    """
+    if graph is not None:
+        graph_targets = None if targets is None else [graph.index_of(t) for t in targets]
+        graph_parents = level_bfs(
+            graph, graph.index_of(src_id), targets=graph_targets, limits=limits
+        )
+        return _graph_parents_to_id_parents(graph, graph_parents)
     parents: ParentDict = {src_id: None}
+    remaining = None if targets is None else set(targets) - {src_id}
+    if batched:
+        frontier = [src_id]
+        out_links = FrontierLinks(db).out_links
+        while frontier and (remaining is None or remaining):
+            frontier, _ = _expand_level(frontier, out_links, parents, {}, limits)
+            if remaining is not None:
+                remaining.difference_update(frontier)
+        return parents
     q: deque[int] = deque([src_id])
-    while q:
+    while q and (remaining is None or remaining):
+        if limits is not None:
+            limits.expand()
         q, parents = _bfs_update_step(db, q, parents)
+        if remaining is not None:
+            remaining = {target for target in remaining if target not in parents}
     assert parents[src_id] is None
     return parents
 
 
-def _id_path_to_title_path(db: SessionTy, id_path: list[int]) -> list[str]:
-    return [id_to_title(db, id_) for id_ in id_path]
-
-
 def _bfs_update_step(
     db: SessionTy, q: deque[int], parents: ParentDict
 ) -> tuple[deque[int], ParentDict]:
@@ -135,6 +679,91 @@ def _bfs_update_step(
     return q, parents
 
 
+def _level_bidi_bfs(
+    src: int,
+    dst: int,
+    expand_fwd: LevelExpander,
+    expand_rev: LevelExpander,
+    limits: Optional[SearchLimits] = None,
+) -> Optional[IDPath]:
+    """
+    Find a shortest path from ``src`` to ``dst``, or None if no such path exists, where
+    ``expand_fwd`` and ``expand_rev`` yield (node, linked) for every link leaving or entering
+    each node of a frontier, respectively.
+
+    Whichever side has the smaller frontier expands a whole level at a time, so the first link
+    found between the two searched regions lies on a shortest path.
+    """
+    if src == dst:
+        return [src]
+    fwd_parents: ParentDict = {src: None}
+    rev_parents: ParentDict = {dst: None}
+    fwd_frontier = [src]
+    rev_frontier = [dst]
+    while fwd_frontier and rev_frontier:
+        if len(fwd_frontier) <= len(rev_frontier):
+            fwd_frontier, meeting = _expand_level(
+                fwd_frontier, expand_fwd, fwd_parents, rev_parents, limits
+            )
+        else:
+            rev_frontier, meeting = _expand_level(
+                rev_frontier, expand_rev, rev_parents, fwd_parents, limits
+            )
+        if meeting is not None:
+            src_to_meeting = follow_parent_pointers(meeting, fwd_parents)
+            meeting_to_dst = follow_parent_pointers(meeting, rev_parents)
+            assert src_to_meeting is not None and meeting_to_dst is not None
+            return src_to_meeting[:-1] + meeting_to_dst[::-1]
+    return None
+
+
+def _expand_level(
+    frontier: list[int],
+    expand: LevelExpander,
+    parents: ParentDict,
+    opp_dir_parents: ParentMapping,
+    limits: Optional[SearchLimits] = None,
+) -> tuple[list[int], Optional[int]]:
+    if limits is not None:
+        limits.expand(len(frontier))
+    next_frontier: list[int] = []
+    for node, linked in expand(frontier):
+        if linked in parents:
+            continue
+        parents[linked] = node
+        if linked in opp_dir_parents:
+            return next_frontier, linked
+        next_frontier.append(linked)
+    return next_frontier, None
+
+
+def _csr_expander(neighbors: Callable[[int], Sequence[int]]) -> LevelExpander:
+    def expand(frontier: Sequence[int]) -> Iterable[tuple[int, int]]:
+        return ((node, linked) for node in frontier for linked in neighbors(node))
+
+    return expand
+
+
+def _tree_id_parents(
+    graph: CSRGraph, src_id: int, parents: Sequence[int], dst_ids: Collection[int]
+) -> ParentDict:
+    """:return: the parent mapping of only the paths to ``dst_ids`` in the tree from src_id"""
+    id_parents: ParentDict = {src_id: None}
+    for dst_id in dst_ids:
+        path = tree_path(parents, graph.index_of(dst_id))
+        if path is not None:
+            id_parents |= {graph.id_of(n): graph.id_of(p) for p, n in zip(path, path[1:])}
+    return id_parents
+
+
+def _graph_parents_to_id_parents(graph: CSRGraph, parents: Sequence[int]) -> ParentDict:
+    return {
+        graph.id_of(node): None if parent == ROOT else graph.id_of(parent)
+        for node, parent in enumerate(parents)
+        if parent != UNREACHED
+    }
+
+
 def follow_parent_pointers(dst_id: int, parents: ParentMapping) -> Optional[IDPath]:
     """
     Given a parent-pointer mapping ``parents``, find a shortest path starting from ``src_id``
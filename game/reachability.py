@@ -0,0 +1,300 @@
+"""
+This module contains a reachability index over the article graph, which proves that no path
+exists between most pairs of articles which cannot reach each other without running a search.
+
+Articles are grouped into strongly connected components, which are numbered in topological
+order of the condensation of the graph, so that links only lead from lower to higher numbered
+components. Each component is labeled with intervals from several randomized post-order
+traversals of the condensation, such that a component can only reach another whose intervals
+are all contained in its own.
+"""
+import random
+from array import array
+from typing import Optional, Sequence
+
+from database import CSRGraph
+from database.mapped import MappedCache, MappedFile, write_mapped_file
+
+__all__ = ["REACHABILITY_PATH", "DEFAULT_TRAVERSALS", "ReachabilityIndex", "get_reachability"]
+
+REACHABILITY_PATH = "./wikigame.reach"
+# number of interval labels of each component
+DEFAULT_TRAVERSALS = 3
+
+REACHABILITY_MAGIC = b"WIKIREAC"
+REACHABILITY_VERSION = 2
+# number of articles, number of links, number of components, number of traversals,
+# fingerprint of the graph
+_FIELDS = "QQQQI"
+
+# flags of components with no links entering or leaving them from other components
+_SOURCE = 1
+_SINK = 2
+
+_open_indexes: MappedCache["ReachabilityIndex"] = MappedCache(
+    lambda path: ReachabilityIndex.load(path)
+)
+
+
+class ReachabilityIndex:
+    """
+    The strongly connected component of every node of a graph, and interval labels of the
+    components over the condensation of the graph.
+    """
+
+    def __init__(
+        self,
+        num_edges: int,
+        components: Sequence[int],
+        flags: Sequence[int],
+        lows: Sequence[int],
+        posts: Sequence[int],
+        fingerprint: int = 0,
+    ) -> None:
+        """
+        :param num_edges: number of links in the graph which was indexed
+        :param components: component of each node, numbered in topological order
+        :param flags: whether each component is a source or sink of the condensation
+        :param lows: lowest post-order rank in the subtree of each component, for each
+                     traversal in turn
+        :param posts: post-order rank of each component, for each traversal in turn
+        :param fingerprint: fingerprint of the graph which was indexed
+        """
+        self.num_edges = num_edges
+        self.components = components
+        self.flags = flags
+        self.lows = lows
+        self.posts = posts
+        self.fingerprint = fingerprint
+        self.traversals = len(posts) // max(len(flags), 1)
+        self._file: Optional[MappedFile] = None
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    @property
+    def num_components(self) -> int:
+        """The number of strongly connected components of the graph."""
+        return len(self.flags)
+
+    @classmethod
+    def from_graph(
+        cls, graph: CSRGraph, traversals: int = DEFAULT_TRAVERSALS, seed: int = 0
+    ) -> "ReachabilityIndex":
+        """
+        Find the strongly connected components of ``graph`` and label its condensation.
+
+        :param graph: article graph
+        :param traversals: number of randomized traversals of the condensation to label
+                           components with
+        :param seed: seed of the random order of each traversal
+        :return: the reachability index of graph
+        """
+        components, count = _strong_components(graph)
+        dag = CSRGraph.from_edges(
+            range(count),
+            {
+                (components[node], components[linked])
+                for node in range(len(graph))
+                for linked in graph.out_neighbors(node)
+                if components[node] != components[linked]
+            },
+        )
+        flags = array(
+            "B",
+            (
+                (_SOURCE if not dag.in_neighbors(c) else 0)
+                | (_SINK if not dag.out_neighbors(c) else 0)
+                for c in range(count)
+            ),
+        )
+        roots = [c for c in range(count) if flags[c] & _SOURCE]
+        rng = random.Random(seed)
+        lows = array("i")
+        posts = array("i")
+        for _ in range(traversals):
+            low, post = _interval_labels(dag, roots, rng)
+            lows.extend(low)
+            posts.extend(post)
+        return cls(graph.num_edges, components, flags, lows, posts, graph.fingerprint)
+
+    def reachable(self, src: int, dst: int) -> Optional[bool]:
+        """
+        :param src: dense index of the node a path starts from
+        :param dst: dense index of the node a path ends at
+        :return: True if a path from src to dst exists, False if no such path exists, or None
+                if only a search can tell
+        """
+        a, b = self.components[src], self.components[dst]
+        if a == b:
+            return True
+        if a > b or self.flags[a] & _SINK or self.flags[b] & _SOURCE:
+            return False
+        count = self.num_components
+        for offset in range(0, self.traversals * count, count):
+            if (
+                self.lows[offset + b] < self.lows[offset + a]
+                or self.posts[offset + b] > self.posts[offset + a]
+            ):
+                return False
+        return None
+
+    def save(self, path: str = REACHABILITY_PATH) -> None:
+        """Write the index to a file at ``path``."""
+        values = (
+            len(self),
+            self.num_edges,
+            self.num_components,
+            self.traversals,
+            self.fingerprint,
+        )
+        sections = [
+            array("i", self.components),
+            array("B", self.flags),
+            array("i", self.lows),
+            array("i", self.posts),
+        ]
+        write_mapped_file(
+            path, REACHABILITY_MAGIC, REACHABILITY_VERSION, _FIELDS, values, sections
+        )
+
+    @classmethod
+    def load(cls, path: str = REACHABILITY_PATH) -> "ReachabilityIndex":
+        """
+        Memory-map the index written to ``path`` by ``save``.
+
+        :raises ValueError: if the file is not a reachability index of the current version
+        """
+        file = MappedFile(path, REACHABILITY_MAGIC, REACHABILITY_VERSION, _FIELDS)
+        try:
+            n, m, count, traversals, fingerprint = file.fields
+            sections = (
+                file.section("i", n),
+                file.section("B", count),
+                file.section("i", traversals * count),
+                file.section("i", traversals * count),
+            )
+        except ValueError:
+            file.close()
+            raise
+        index = cls(m, *sections, fingerprint)
+        index._file = file
+        return index
+
+
+def get_reachability(
+    graph: CSRGraph, path: str = REACHABILITY_PATH
+) -> Optional[ReachabilityIndex]:
+    """
+    Return the index at ``path``, mapping it on first use and sharing it across the process
+    until it is rebuilt, or None if no index for ``graph`` has been built there, as told by its
+    size and fingerprint.
+    """
+    index = _open_indexes.get(path)
+    if (
+        index is None
+        or len(index) != len(graph)
+        or index.num_edges != graph.num_edges
+        or index.fingerprint != graph.fingerprint
+    ):
+        return None
+    return index
+
+
+def _strong_components(graph: CSRGraph) -> tuple[array, int]:
+    """
+    Find the strongly connected components of ``graph`` with an iterative Tarjan's algorithm.
+
+    :return: the component of each node, numbered so that links only lead from lower to higher
+            numbered components, and the number of components
+    """
+    n = len(graph)
+    offsets, targets = graph.fwd_offsets, graph.fwd_targets
+    order = array("i", [-1]) * n
+    low = array("i", [0]) * n
+    on_stack = bytearray(n)
+    components = array("i", [-1]) * n
+    stack: list[int] = []
+    visits = 0
+    count = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = visits
+        visits += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # each node being visited, and the position of its next link in targets
+        work = [(root, offsets[root])]
+        while work:
+            node, pos = work[-1]
+            if pos < offsets[node + 1]:
+                work[-1] = (node, pos + 1)
+                linked = targets[pos]
+                if order[linked] == -1:
+                    order[linked] = low[linked] = visits
+                    visits += 1
+                    stack.append(linked)
+                    on_stack[linked] = 1
+                    work.append((linked, offsets[linked]))
+                elif on_stack[linked] and order[linked] < low[node]:
+                    low[node] = order[linked]
+                continue
+            work.pop()
+            if work and low[node] < low[work[-1][0]]:
+                low[work[-1][0]] = low[node]
+            if low[node] == order[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    components[member] = count
+                    if member == node:
+                        break
+                count += 1
+    # Tarjan's algorithm completes components in reverse topological order
+    for node in range(n):
+        components[node] = count - 1 - components[node]
+    return components, count
+
+
+def _interval_labels(
+    dag: CSRGraph, roots: list[int], rng: random.Random
+) -> tuple[array, array]:
+    """
+    Traverse ``dag`` depth-first from ``roots``, visiting roots and children in random order.
+
+    :return: the lowest post-order rank in the subtree of each node, including nodes reached
+            through links to already visited nodes, and the post-order rank of each node
+    """
+    n = len(dag)
+    lows = array("i", [-1]) * n
+    posts = array("i", [-1]) * n
+    rank = 0
+    rng.shuffle(roots)
+    for root in roots:
+        if lows[root] != -1:
+            continue
+        lows[root] = n
+        children = list(dag.out_neighbors(root))
+        rng.shuffle(children)
+        work = [(root, children)]
+        while work:
+            node, children = work[-1]
+            if children:
+                child = children.pop()
+                if lows[child] == -1:
+                    lows[child] = n
+                    grandchildren = list(dag.out_neighbors(child))
+                    rng.shuffle(grandchildren)
+                    work.append((child, grandchildren))
+                elif lows[child] < lows[node]:
+                    lows[node] = lows[child]
+                continue
+            work.pop()
+            posts[node] = rank
+            if rank < lows[node]:
+                lows[node] = rank
+            rank += 1
+            if work and lows[node] < lows[work[-1][0]]:
+                lows[work[-1][0]] = lows[node]
+    return lows, posts
@@ -0,0 +1,223 @@
+"""
+This module contains caches of the results of queries for a shortest path between two titles,
+keyed by the version of the article graph the results were found in so that results from
+before the graph was repopulated, or from a different snapshot of it, are never used.
+"""
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session as SessionTy, sessionmaker
+
+from database import CSRGraph, CachedPath, Session, get_graph_version
+from .tree_cache import CacheStats
+from .utilities import TitleIndex, ids_for_titles
+
+__all__ = [
+    "DEFAULT_RESULT_CACHE_ENTRIES",
+    "RESULT_CACHE_BACKENDS",
+    "Outcome",
+    "PathResult",
+    "ResultCache",
+    "LRUResultCache",
+    "SQLResultCache",
+    "cached_path_query",
+    "get_result_cache",
+]
+
+DEFAULT_RESULT_CACHE_ENTRIES = 100_000
+# names of the kinds of result cache which get_result_cache can provide
+RESULT_CACHE_BACKENDS = ("memory", "sqlite")
+
+_result_caches: dict[str, "ResultCache"] = {}
+
+
+class Outcome(str, Enum):
+    """How a query for a shortest path between two titles ended."""
+
+    FOUND = "found"
+    NO_PATH = "no_path"
+    UNKNOWN_TITLE = "unknown_title"
+
+
+@dataclass(frozen=True)
+class PathResult:
+    """The result of a query for a shortest path between two titles."""
+
+    outcome: Outcome
+    # id and title of each article on the path, if one was found
+    articles: Optional[list[tuple[int, str]]] = None
+
+
+class ResultCache(ABC):
+    """A cache of path results keyed by graph version, source title and destination title."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, version: str, src: str, dst: str) -> Optional[PathResult]:
+        """
+        :param version: version stamp of the article graph
+        :param src: title the path starts from
+        :param dst: title the path ends at
+        :return: the cached result of the query, or None if it is not cached
+        """
+
+    @abstractmethod
+    def put(self, version: str, src: str, dst: str, result: PathResult) -> None:
+        """Cache ``result`` as the result of the query from ``src`` to ``dst``."""
+
+
+class LRUResultCache(ResultCache):
+    """
+    An in-process cache holding a bounded number of results, evicting the least recently used.
+    Results for any version other than the latest one seen are dropped.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RESULT_CACHE_ENTRIES) -> None:
+        """
+        :param max_entries: largest number of results to hold
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self._version: Optional[str] = None
+        self._results: OrderedDict[tuple[str, str], PathResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, version: str, src: str, dst: str) -> Optional[PathResult]:
+        with self._lock:
+            self._use_version(version)
+            result = self._results.get((src, dst))
+            if result is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._results.move_to_end((src, dst))
+            return result
+
+    def put(self, version: str, src: str, dst: str, result: PathResult) -> None:
+        with self._lock:
+            self._use_version(version)
+            self._results[src, dst] = result
+            self._results.move_to_end((src, dst))
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _use_version(self, version: str) -> None:
+        if version != self._version:
+            self._results.clear()
+            self._version = version
+
+
+class SQLResultCache(ResultCache):
+    """
+    A cache stored in a table of the database, shared by every process using it and kept
+    across restarts. Results for any version other than the latest one stored are deleted.
+    """
+
+    def __init__(self, session_factory: sessionmaker = Session) -> None:
+        """
+        :param session_factory: creates sessions for the database to store results in
+        """
+        super().__init__()
+        self.session_factory = session_factory
+        self._version: Optional[str] = None
+
+    def get(self, version: str, src: str, dst: str) -> Optional[PathResult]:
+        with self.session_factory() as db:
+            cached = db.get(CachedPath, (version, src, dst))
+        if cached is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        articles = None if cached.articles is None else json.loads(cached.articles)
+        return PathResult(
+            Outcome(cached.outcome),
+            None if articles is None else [(id_, title) for id_, title in articles],
+        )
+
+    def put(self, version: str, src: str, dst: str, result: PathResult) -> None:
+        with self.session_factory() as db:
+            if version != self._version:
+                db.execute(delete(CachedPath.__table__).where(CachedPath.version != version))
+                self._version = version
+            db.merge(
+                CachedPath(
+                    version=version,
+                    src=src,
+                    dst=dst,
+                    outcome=result.outcome.value,
+                    articles=None if result.articles is None else json.dumps(result.articles),
+                )
+            )
+            db.commit()
+
+
+def cached_path_query(
+    db: SessionTy,
+    cache: ResultCache,
+    src_title: str,
+    dst_title: str,
+    search: Callable[[], Optional[list[str]]],
+    titles: Optional[TitleIndex] = None,
+    graph: Optional[CSRGraph] = None,
+) -> PathResult:
+    """
+    Return the cached result of the query for a shortest path from ``src_title`` to
+    ``dst_title`` in the current version of the graph, running ``search`` and caching its
+    result if there is none. Titles which cannot be found and pairs of titles with no path
+    between them are cached as well.
+
+    Results are keyed by the version of the database, and by the fingerprint of ``graph`` if
+    the search runs on it, since a snapshot can lag behind the database it was built from.
+
+    :param db: database session
+    :param cache: cache of path results
+    :param src_title: title of the article to start from
+    :param dst_title: title of the article to end at
+    :param search: finds a shortest path of titles from src_title to dst_title, or None if no
+                   such path exists, raising ValueError if either title cannot be found
+    :param titles: index used to find the ids of the articles on a path which was found
+    :param graph: in-memory copy of the article graph which search runs on, if any
+    :return: the result of the query
+    """
+    version = get_graph_version(db)
+    if graph is not None:
+        version = f"{version}:{graph.fingerprint:08x}"
+    result = cache.get(version, src_title, dst_title)
+    if result is None:
+        try:
+            path = search()
+            if path is None:
+                result = PathResult(Outcome.NO_PATH)
+            else:
+                ids = ids_for_titles(db, path, titles)
+                result = PathResult(Outcome.FOUND, list(zip(ids, path)))
+        except ValueError:
+            result = PathResult(Outcome.UNKNOWN_TITLE)
+        cache.put(version, src_title, dst_title, result)
+    return result
+
+
+def get_result_cache(backend: str = "memory") -> ResultCache:
+    """
+    Return the result cache of kind ``backend`` shared by the whole process.
+
+    :param backend: one of RESULT_CACHE_BACKENDS
+    :raises ValueError: if backend is not a known kind of cache
+    """
+    if backend not in RESULT_CACHE_BACKENDS:
+        raise ValueError(f"Unknown result cache backend {backend}")
+    if backend not in _result_caches:
+        _result_caches[backend] = LRUResultCache() if backend == "memory" else SQLResultCache()
+    return _result_caches[backend]
@@ -0,0 +1,111 @@
+"""
+This module contains tests for the title completion index in the game.completion module.
+"""
+import pytest
+from hypothesis import given, strategies as st
+from sqlalchemy import event
+
+from database import Article, CSRGraph
+from database.test.constants import test_engine
+from .utilities import session_scope
+from ..completion import TitleCompletions, complete_titles, fold_title, get_completions
+
+pytestmark = [pytest.mark.game]
+
+TITLES = ["Albert Einstein", "albedo", "Alps", "Zürich", "Alpaca", "Straße"]
+GRAPH = CSRGraph.from_edges(
+    range(len(TITLES)), [(0, 2), (1, 2), (3, 2), (0, 4), (3, 4), (2, 0), (5, 1)]
+)
+
+
+def test_complete_in_title_order(tmp_path):
+    path = str(tmp_path / "test.complete")
+    TitleCompletions.from_graph(GRAPH, TITLES).save(path)
+    completions = TitleCompletions.load(path)
+    assert [TITLES[i] for i in completions.complete("al")] == [
+        "albedo",
+        "Albert Einstein",
+        "Alpaca",
+        "Alps",
+    ]
+    assert [TITLES[i] for i in completions.complete("ALP", limit=1)] == ["Alpaca"]
+    assert [TITLES[i] for i in completions.complete("strasse")] == ["Straße"]
+    assert completions.complete("albert_e") == [0]
+    assert completions.complete("Bern") == []
+    assert completions.fingerprint == GRAPH.fingerprint
+
+
+def test_completions_stale_after_links_change(tmp_path):
+    path = str(tmp_path / "test.complete")
+    TitleCompletions.from_graph(GRAPH, TITLES).save(path)
+    assert get_completions(GRAPH, path) is not None
+    relinked = CSRGraph.from_edges(
+        range(len(TITLES)), [(0, 2), (1, 2), (3, 2), (0, 4), (3, 4), (2, 1), (5, 0)]
+    )
+    assert get_completions(relinked, path) is None
+
+
+def test_complete_ranked():
+    completions = TitleCompletions.from_graph(GRAPH, TITLES)
+    assert [TITLES[i] for i in completions.complete("al", ranked=True)] == [
+        "Alps",
+        "Alpaca",
+        "albedo",
+        "Albert Einstein",
+    ]
+    assert [TITLES[i] for i in completions.complete("", limit=2, ranked=True)] == [
+        "Alps",
+        "Alpaca",
+    ]
+
+
+@given(
+    titles=st.lists(st.text(st.sampled_from("aAbB_ ß"), max_size=4), min_size=1, max_size=30),
+    prefix=st.text(st.sampled_from("aAbB_ ß"), max_size=3),
+    ranked=st.booleans(),
+)
+def test_complete_same_as_scan(titles: list[str], prefix: str, ranked: bool):
+    n = len(titles)
+    graph = CSRGraph.from_edges(
+        range(n), [(i, j) for i in range(n) for j in range(i % 3, n, 3)]
+    )
+    completions = TitleCompletions.from_graph(graph, titles)
+    folded = fold_title(prefix)
+    matches = {i for i, title in enumerate(titles) if fold_title(title).startswith(folded)}
+    result = completions.complete(prefix, limit=n, ranked=ranked)
+    assert set(result) == matches and len(result) == len(matches)
+    if ranked:
+        degrees = [len(graph.in_neighbors(i)) for i in result]
+        assert degrees == sorted(degrees, reverse=True)
+
+
+def test_complete_in_database():
+    with session_scope() as session:
+        session.add_all(Article(id=i, title=title) for i, title in enumerate(TITLES))
+        session.commit()
+        assert complete_titles(session, "al") == ["Albert Einstein", "Alpaca", "Alps"]
+        assert complete_titles(session, " albert_E") == ["Albert Einstein"]
+        assert complete_titles(session, "Alp", limit=1) == ["Alpaca"]
+        assert complete_titles(session, "") == sorted(TITLES)
+        assert complete_titles(session, "Bern") == []
+
+
+def test_complete_in_database_searches_index():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with session_scope() as session:
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            complete_titles(session, "al")
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+        [(statement, parameters)] = statements
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        details = " ".join(row[-1] for row in plan)
+    assert "SEARCH" in details and "ix_article_title" in details
+    assert "SCAN" not in details and "TEMP B-TREE" not in details
@@ -0,0 +1,48 @@
+"""
+This module contains tests for the exact distance oracle in the game.labeling module.
+"""
+import networkx as nx  # type: ignore
+import pytest
+from hypothesis import HealthCheck, given, settings
+
+from database import CSRGraph
+from .test_pathfinding import nx_graph_and_two_nodes
+from ..labeling import DistanceLabels, get_labels
+
+pytestmark = [pytest.mark.game]
+
+
+@given(inputs=nx_graph_and_two_nodes(max_nodes=200, max_edges=2000, connected=False))
+def test_distance_nx_same(inputs: tuple[nx.DiGraph, int, int]):
+    graph, src, dst = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    labels = DistanceLabels.from_graph(csr_graph)
+    distance = labels.distance(csr_graph.index_of(src), csr_graph.index_of(dst))
+    try:
+        assert distance == nx.shortest_path_length(graph, src, dst)
+    except nx.NetworkXNoPath:
+        assert distance is None
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(inputs=nx_graph_and_two_nodes(max_nodes=50, max_edges=200, connected=False))
+def test_labels_roundtrip(tmp_path, inputs: tuple[nx.DiGraph, int, int]):
+    graph, _, _ = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    labels = DistanceLabels.from_graph(csr_graph)
+    path = str(tmp_path / "graph.labels")
+    labels.save(path)
+    loaded = DistanceLabels.load(path)
+    assert len(loaded) == len(csr_graph) and loaded.fingerprint == csr_graph.fingerprint
+    for u in range(len(csr_graph)):
+        for v in range(len(csr_graph)):
+            assert loaded.distance(u, v) == labels.distance(u, v)
+
+
+def test_labels_stale_after_links_change(tmp_path):
+    path = str(tmp_path / "graph.labels")
+    graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (2, 3)])
+    DistanceLabels.from_graph(graph).save(path)
+    assert get_labels(graph, path) is not None
+    relinked = CSRGraph.from_edges(range(4), [(0, 1), (1, 3), (3, 2)])
+    assert get_labels(relinked, path) is None
@@ -0,0 +1,68 @@
+"""
+This module contains tests for landmark-based search in the game.landmarks module.
+"""
+import networkx as nx  # type: ignore
+import pytest
+from hypothesis import HealthCheck, given, settings, strategies as st
+
+from database import CSRGraph
+from .test_pathfinding import nx_graph_and_two_nodes
+from ..landmarks import LANDMARK_STRATEGIES, Landmarks, alt_bidi_search, get_landmarks
+
+pytestmark = [pytest.mark.game]
+
+
+@given(
+    inputs=nx_graph_and_two_nodes(max_nodes=200, max_edges=2000, connected=False),
+    count=st.integers(0, 6),
+    strategy=st.sampled_from(LANDMARK_STRATEGIES),
+)
+def test_alt_nx_same(inputs: tuple[nx.DiGraph, int, int], count: int, strategy: str):
+    graph, src, dst = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    landmarks = Landmarks.from_graph(csr_graph, count, strategy)
+    src_index, dst_index = csr_graph.index_of(src), csr_graph.index_of(dst)
+    path = alt_bidi_search(csr_graph, landmarks, src_index, dst_index)
+    bound = landmarks.lower_bound(src_index, dst_index)
+    try:
+        nx_length = nx.shortest_path_length(graph, src, dst)
+    except nx.NetworkXNoPath:
+        assert path is None
+    else:
+        assert bound is not None and bound <= nx_length
+        assert path is not None and len(path) == nx_length + 1
+        id_path = [csr_graph.id_of(i) for i in path]
+        assert id_path[0] == src and id_path[-1] == dst
+        assert all(edge in graph.edges for edge in zip(id_path, id_path[1:]))
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(inputs=nx_graph_and_two_nodes(max_nodes=50, max_edges=200, connected=False))
+def test_landmarks_roundtrip(tmp_path, inputs: tuple[nx.DiGraph, int, int]):
+    graph, _, _ = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    landmarks = Landmarks.from_graph(csr_graph, 3, distance_format="uint16")
+    path = str(tmp_path / "graph.landmarks")
+    landmarks.save(path)
+    loaded = Landmarks.load(path)
+    assert list(loaded.landmarks) == list(landmarks.landmarks)
+    assert list(loaded.fwd_distances) == list(landmarks.fwd_distances)
+    assert list(loaded.rev_distances) == list(landmarks.rev_distances)
+    assert loaded.num_nodes == len(csr_graph) and loaded.unreachable == 65535
+    assert loaded.fingerprint == csr_graph.fingerprint
+
+
+def test_landmarks_stale_after_links_change(tmp_path):
+    path = str(tmp_path / "graph.landmarks")
+    graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (2, 3)])
+    Landmarks.from_graph(graph, 2).save(path)
+    assert get_landmarks(graph, path) is not None
+    relinked = CSRGraph.from_edges(range(4), [(0, 1), (1, 3), (3, 2)])
+    assert get_landmarks(relinked, path) is None
+
+
+def test_distance_format_overflow():
+    long_path = CSRGraph.from_edges(range(300), [(i, i + 1) for i in range(299)])
+    with pytest.raises(ValueError):
+        Landmarks.from_graph(long_path, 1, distance_format="uint8")
+    assert Landmarks.from_graph(long_path, 1, distance_format="uint16").count == 1
@@ -12,9 +12,24 @@ from hypothesis import example, given, note, strategies as st
 from hypothesis_networkx import graph_builder  # type: ignore
 from sqlalchemy.orm import Session
 
-from database import Article, Link
+from database import Article, CSRGraph, Link
+from database.snapshot import build_snapshot
 from .utilities import session_scope
-from ..pathfinding import bidi_bfs, follow_parent_pointers, multi_target_bfs
+from ..landmarks import Landmarks
+from ..limits import SearchCutOff, SearchLimits
+from ..pathfinding import (
+    SearchStats,
+    WorkerStats,
+    batch_multi_target_bfs,
+    bidi_bfs,
+    follow_parent_pointers,
+    is_reachable,
+    multi_target_bfs,
+    solve_many,
+    targeted_bfs,
+)
+from ..reachability import ReachabilityIndex
+from ..tree_cache import TreeCache
 
 pytestmark = [pytest.mark.game]
 
@@ -178,3 +193,287 @@ def test_bidi_nx_same(inputs: tuple[nx.DiGraph, int, int]) -> None:
             assert bidi_path is not None
             assert is_valid_path(bidi_path, graph)
             assert len(nx_path) == len(bidi_path), (nx_path, bidi_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+@example(inputs=_example_from_file("./examples/small_01.json"))
+@example(inputs=_example_from_file("./examples/small_02.json"))
+@example(inputs=_example_from_file("./examples/medium_01.json"))
+def test_bidi_graph_nx_same(inputs: tuple[nx.DiGraph, int, int]) -> None:
+    graph, src, dst = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session)
+        bidi_path = bidi_bfs(session, str(src), str(dst), graph=csr_graph)
+        try:
+            nx_path = nx.shortest_path(graph, src, dst)
+        except nx.NetworkXNoPath:
+            assert bidi_path is None
+        else:
+            assert bidi_path is not None
+            assert is_valid_path(bidi_path, graph)
+            assert len(nx_path) == len(bidi_path), (nx_path, bidi_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+def test_multi_graph_same_as_db(inputs: tuple[nx.DiGraph, int, int]):
+    graph, src, _ = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        db_ppd = multi_target_bfs(session, str(src))
+        graph_ppd = multi_target_bfs(session, str(src), graph=CSRGraph.from_db(session))
+        assert db_ppd.keys() == graph_ppd.keys()
+        for dst in graph_ppd:
+            graph_path = follow_parent_pointers(dst, graph_ppd)
+            db_path = follow_parent_pointers(dst, db_ppd)
+            assert graph_path is not None and db_path is not None
+            assert is_valid_path(list(map(str, graph_path)), graph)
+            assert len(graph_path) == len(db_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+@example(inputs=_example_from_file("./examples/small_01.json"))
+@example(inputs=_example_from_file("./examples/medium_01.json"))
+def test_bidi_batched_nx_same(inputs: tuple[nx.DiGraph, int, int]) -> None:
+    graph, src, dst = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        bidi_path = bidi_bfs(session, str(src), str(dst), batched=True)
+        try:
+            nx_path = nx.shortest_path(graph, src, dst)
+        except nx.NetworkXNoPath:
+            assert bidi_path is None
+        else:
+            assert bidi_path is not None
+            assert is_valid_path(bidi_path, graph)
+            assert len(nx_path) == len(bidi_path), (nx_path, bidi_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+def test_multi_batched_nx_same(inputs: tuple[nx.DiGraph, int, int]):
+    graph, src, _ = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        batched_ppd = multi_target_bfs(session, str(src), batched=True)
+        nx_lengths = nx.single_source_shortest_path_length(graph, src)
+        assert batched_ppd.keys() == nx_lengths.keys()
+        for dst, length in nx_lengths.items():
+            path = follow_parent_pointers(dst, batched_ppd)
+            assert path is not None
+            assert is_valid_path(list(map(str, path)), graph)
+            assert len(path) == length + 1
+
+
+def test_batched_issues_fewer_statements():
+    graph = _example_from_file("./examples/medium_01.json")[0]
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        orm_stats = SearchStats()
+        batched_stats = SearchStats()
+        multi_target_bfs(session, "0", stats=orm_stats)
+        session.expunge_all()
+        multi_target_bfs(session, "0", batched=True, stats=batched_stats)
+        levels = max(nx.single_source_shortest_path_length(graph, 0).values()) + 1
+        assert batched_stats.sql_statements == 1 + levels
+        assert orm_stats.sql_statements > batched_stats.sql_statements
+
+
+@pytest.mark.parametrize("mode", ["orm", "batched", "graph", "cached"])
+@pytest.mark.parametrize("max_backward_targets", [0, 3])
+@given(inputs=nx_graph_and_two_nodes(connected=False), data=st.data())
+def test_targeted_nx_same(
+    mode: str, max_backward_targets: int, inputs: tuple[nx.DiGraph, int, int], data
+):
+    graph, src, _ = inputs
+    dsts = data.draw(st.sets(st.sampled_from(list(graph.nodes)), max_size=5))
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        ppd = targeted_bfs(
+            session,
+            str(src),
+            dsts,
+            graph=CSRGraph.from_db(session) if mode in ("graph", "cached") else None,
+            batched=mode == "batched",
+            max_backward_targets=max_backward_targets,
+            tree_cache=TreeCache() if mode == "cached" else None,
+        )
+        nx_lengths = nx.single_source_shortest_path_length(graph, src)
+        for dst in dsts:
+            path = follow_parent_pointers(dst, ppd)
+            if dst not in nx_lengths:
+                assert path is None
+            else:
+                assert path is not None
+                assert is_valid_path(list(map(str, path)), graph)
+                assert len(path) == nx_lengths[dst] + 1
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False), data=st.data())
+def test_batch_multi_nx_same(inputs: tuple[nx.DiGraph, int, int], data):
+    graph, _, _ = inputs
+    srcs = data.draw(st.lists(st.sampled_from(list(graph.nodes)), min_size=1, max_size=100))
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        trees = list(batch_multi_target_bfs(session, [str(src) for src in srcs]))
+        assert [src_title for src_title, _ in trees] == [str(src) for src in srcs]
+        for src, (_, tree) in zip(srcs, trees):
+            nx_lengths = nx.single_source_shortest_path_length(graph, src)
+            assert tree.distances == nx_lengths
+            assert tree.parents.keys() == nx_lengths.keys()
+            for dst, length in nx_lengths.items():
+                path = follow_parent_pointers(dst, tree.parents)
+                assert path is not None
+                assert is_valid_path(list(map(str, path)), graph)
+                assert len(path) == length + 1
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False), data=st.data())
+def test_targeted_builds_tree_for_repeated_source(inputs: tuple[nx.DiGraph, int, int], data):
+    graph, src, _ = inputs
+    dsts = data.draw(st.sets(st.sampled_from(list(graph.nodes)), max_size=5))
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session)
+        tree_cache = TreeCache()
+        searched = targeted_bfs(
+            session, str(src), dsts, graph=csr_graph, tree_cache=tree_cache
+        )
+        assert len(tree_cache) == 0
+        from_tree = targeted_bfs(
+            session, str(src), dsts, graph=csr_graph, tree_cache=tree_cache
+        )
+        assert len(tree_cache) == 1
+        for dst in dsts:
+            searched_path = follow_parent_pointers(dst, searched)
+            tree_path = follow_parent_pointers(dst, from_tree)
+            assert (searched_path is None) == (tree_path is None)
+            if searched_path is not None and tree_path is not None:
+                assert len(searched_path) == len(tree_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+def test_bidi_cached_tree_nx_same(inputs: tuple[nx.DiGraph, int, int]) -> None:
+    graph, src, dst = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session)
+        tree_cache = TreeCache()
+        multi_target_bfs(session, str(src), graph=csr_graph, tree_cache=tree_cache)
+        bidi_path = bidi_bfs(
+            session, str(src), str(dst), graph=csr_graph, tree_cache=tree_cache
+        )
+        assert tree_cache.stats.misses == 1
+        assert tree_cache.stats.hits == (src != dst)
+        try:
+            nx_path = nx.shortest_path(graph, src, dst)
+        except nx.NetworkXNoPath:
+            assert bidi_path is None
+        else:
+            assert bidi_path is not None
+            assert is_valid_path(bidi_path, graph)
+            assert len(nx_path) == len(bidi_path)
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+def test_reachable_nx_same(inputs: tuple[nx.DiGraph, int, int]) -> None:
+    graph, src, dst = inputs
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session)
+        reachability = ReachabilityIndex.from_graph(csr_graph)
+        reachable = is_reachable(
+            session, str(src), str(dst), graph=csr_graph, reachability=reachability
+        )
+        bidi_path = bidi_bfs(
+            session, str(src), str(dst), graph=csr_graph, reachability=reachability
+        )
+        assert reachable == nx.has_path(graph, src, dst)
+        assert (bidi_path is not None) == reachable
+
+
+@pytest.mark.parametrize("mode", ["orm", "batched", "graph"])
+def test_bidi_cut_off_by_expansions(mode: str):
+    graph = nx.path_graph(10, create_using=nx.DiGraph)
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session) if mode == "graph" else None
+        limits = SearchLimits(max_expansions=3)
+        with pytest.raises(SearchCutOff) as e:
+            bidi_bfs(
+                session, "0", "9", graph=csr_graph, batched=mode == "batched", limits=limits
+            )
+        assert e.value.reason == "expansions"
+        assert limits.expansions <= 3
+        path = bidi_bfs(
+            session,
+            "0",
+            "9",
+            graph=csr_graph,
+            batched=mode == "batched",
+            limits=SearchLimits(max_expansions=10),
+        )
+        assert path == [str(n) for n in range(10)]
+
+
+def test_cancelled_search_cut_off():
+    graph = nx.path_graph(10, create_using=nx.DiGraph)
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = CSRGraph.from_db(session)
+        limits = SearchLimits()
+        limits.cancel()
+        with pytest.raises(SearchCutOff) as e:
+            multi_target_bfs(session, "0", graph=csr_graph, limits=limits)
+        assert e.value.reason == "cancelled"
+        tree_cache = TreeCache()
+        with pytest.raises(SearchCutOff):
+            targeted_bfs(
+                session, "0", [9], graph=csr_graph, tree_cache=tree_cache, limits=limits
+            )
+        assert len(tree_cache) == 0
+
+
+def test_solve_many_nx_same(tmp_path):
+    graph = _example_from_file("./examples/medium_01.json")[0]
+    rng = random.Random(0)
+    nodes = list(graph.nodes)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(50)]
+    snapshot_path = str(tmp_path / "test.graph")
+    landmarks_path = str(tmp_path / "test.landmarks")
+    reachability_path = str(tmp_path / "test.reach")
+    with session_scope() as session:
+        add_nx_graph_to_db(session, graph)
+        csr_graph = build_snapshot(session, snapshot_path)
+        Landmarks.from_graph(csr_graph, 4, distance_format="uint16").save(landmarks_path)
+        ReachabilityIndex.from_graph(csr_graph).save(reachability_path)
+        worker_stats: dict[int, WorkerStats] = {}
+        paths = list(
+            solve_many(
+                session,
+                [(str(src), str(dst)) for src, dst in pairs],
+                workers=2,
+                snapshot_path=snapshot_path,
+                chunk_size=8,
+                worker_stats=worker_stats,
+                landmarks_path=landmarks_path,
+                reachability_path=reachability_path,
+            )
+        )
+    assert len(paths) == len(pairs)
+    assert sum(stats.pairs for stats in worker_stats.values()) == len(pairs)
+    for (src, dst), path in zip(pairs, paths):
+        try:
+            nx_path = nx.shortest_path(graph, src, dst)
+        except nx.NetworkXNoPath:
+            assert path is None
+        else:
+            assert path is not None
+            assert path[0] == str(src) and path[-1] == str(dst)
+            assert is_valid_path(path, graph)
+            assert len(nx_path) == len(path)
+
+
+def test_solve_many_requires_snapshot(tmp_path):
+    with session_scope() as session:
+        with pytest.raises(ValueError):
+            solve_many(session, [], snapshot_path=str(tmp_path / "missing.graph"))
@@ -0,0 +1,70 @@
+"""
+This module contains tests for the reachability index in the game.reachability module.
+"""
+import networkx as nx  # type: ignore
+import pytest
+from hypothesis import HealthCheck, given, settings
+
+from database import CSRGraph
+from .test_pathfinding import nx_graph_and_two_nodes
+from ..reachability import ReachabilityIndex, get_reachability
+
+pytestmark = [pytest.mark.game]
+
+
+@given(inputs=nx_graph_and_two_nodes(max_nodes=100, max_edges=300, connected=False))
+def test_reachable_nx_same(inputs: tuple[nx.DiGraph, int, int]):
+    graph, _, _ = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    index = ReachabilityIndex.from_graph(csr_graph)
+    components = index.components
+    for scc in nx.strongly_connected_components(graph):
+        assert len({components[csr_graph.index_of(n)] for n in scc}) == 1
+    assert index.num_components == nx.number_strongly_connected_components(graph)
+    for src in graph:
+        descendants = nx.descendants(graph, src) | {src}
+        for dst in graph:
+            reachable = index.reachable(csr_graph.index_of(src), csr_graph.index_of(dst))
+            if dst in descendants:
+                assert reachable is not False
+            else:
+                assert reachable is not True
+            if not graph.out_degree(src) or not graph.in_degree(dst):
+                assert reachable == (src == dst)
+
+
+def test_dag_intervals_decide_chain():
+    # a chain condenses to itself, and a single traversal labels it exactly
+    csr_graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (2, 3)])
+    index = ReachabilityIndex.from_graph(csr_graph, traversals=1)
+    assert index.num_components == 4
+    for src in range(4):
+        for dst in range(4):
+            expected = True if src == dst else None if src < dst else False
+            assert index.reachable(src, dst) is expected
+
+
+@settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(inputs=nx_graph_and_two_nodes(max_nodes=50, max_edges=200, connected=False))
+def test_reachability_roundtrip(tmp_path, inputs: tuple[nx.DiGraph, int, int]):
+    graph, _, _ = inputs
+    csr_graph = CSRGraph.from_edges(graph.nodes, graph.edges)
+    index = ReachabilityIndex.from_graph(csr_graph)
+    path = str(tmp_path / "graph.reach")
+    index.save(path)
+    loaded = ReachabilityIndex.load(path)
+    assert len(loaded) == len(csr_graph)
+    assert loaded.num_edges == csr_graph.num_edges
+    assert loaded.fingerprint == csr_graph.fingerprint
+    for u in range(len(csr_graph)):
+        for v in range(len(csr_graph)):
+            assert loaded.reachable(u, v) == index.reachable(u, v)
+
+
+def test_reachability_stale_after_links_change(tmp_path):
+    path = str(tmp_path / "graph.reach")
+    graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (2, 3)])
+    ReachabilityIndex.from_graph(graph).save(path)
+    assert get_reachability(graph, path) is not None
+    relinked = CSRGraph.from_edges(range(4), [(0, 1), (1, 3), (3, 2)])
+    assert get_reachability(relinked, path) is None
@@ -0,0 +1,102 @@
+"""
+This module contains tests for the caches of path results in the game.result_cache module.
+"""
+from typing import Callable
+
+import networkx as nx  # type: ignore
+import pytest
+
+from database import CSRGraph, bump_graph_version
+from database.test.constants import TestSession
+from .test_pathfinding import add_nx_graph_to_db
+from .utilities import session_scope
+from ..pathfinding import bidi_bfs
+from ..result_cache import (
+    LRUResultCache,
+    Outcome,
+    PathResult,
+    ResultCache,
+    SQLResultCache,
+    cached_path_query,
+)
+
+pytestmark = [pytest.mark.game]
+
+FOUND = PathResult(Outcome.FOUND, [(0, "0"), (1, "1")])
+
+
+backends = pytest.mark.parametrize(
+    "make_cache",
+    [LRUResultCache, lambda: SQLResultCache(TestSession)],
+    ids=["memory", "sqlite"],
+)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUResultCache(max_entries=2)
+    cache.put("v", "a", "b", FOUND)
+    cache.put("v", "b", "c", FOUND)
+    assert cache.get("v", "a", "b") == FOUND
+    cache.put("v", "c", "d", FOUND)
+    assert cache.get("v", "b", "c") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 1, 1)
+
+
+@backends
+def test_results_keyed_by_version(make_cache: Callable[[], ResultCache]):
+    with session_scope():
+        cache = make_cache()
+        cache.put("v1", "0", "1", FOUND)
+        cache.put("v1", "1", "0", PathResult(Outcome.NO_PATH))
+        assert cache.get("v1", "0", "1") == FOUND
+        assert cache.get("v1", "1", "0") == PathResult(Outcome.NO_PATH)
+        assert cache.get("v2", "0", "1") is None
+
+
+@backends
+def test_cached_path_query(make_cache: Callable[[], ResultCache]):
+    with session_scope() as session:
+        add_nx_graph_to_db(session, nx.DiGraph([(0, 1), (1, 2)]))
+        cache = make_cache()
+        searches = []
+
+        def query(src: str, dst: str) -> PathResult:
+            def search():
+                searches.append((src, dst))
+                return bidi_bfs(session, src, dst)
+
+            return cached_path_query(session, cache, src, dst, search)
+
+        assert query("0", "2") == PathResult(Outcome.FOUND, [(0, "0"), (1, "1"), (2, "2")])
+        assert query("2", "0") == PathResult(Outcome.NO_PATH)
+        assert query("0", "missing") == PathResult(Outcome.UNKNOWN_TITLE)
+        assert len(searches) == 3
+        for src, dst in searches:
+            query(src, dst)
+        assert len(searches) == 3
+        bump_graph_version(session)
+        session.commit()
+        query("0", "2")
+        assert len(searches) == 4
+
+
+@backends
+def test_cached_path_query_keyed_by_graph(make_cache: Callable[[], ResultCache]):
+    with session_scope() as session:
+        add_nx_graph_to_db(session, nx.DiGraph([(0, 1), (1, 2)]))
+        cache = make_cache()
+        searches = []
+
+        def query(graph: CSRGraph) -> PathResult:
+            def search():
+                searches.append(graph)
+                return bidi_bfs(session, "0", "2", graph=graph)
+
+            return cached_path_query(session, cache, "0", "2", search, graph=graph)
+
+        graph = CSRGraph.from_db(session)
+        stale_graph = CSRGraph.from_edges(graph.ids, [(0, 1)])
+        assert query(stale_graph) == PathResult(Outcome.NO_PATH)
+        assert query(graph).outcome is Outcome.FOUND
+        assert query(graph).outcome is Outcome.FOUND
+        assert searches == [stale_graph, graph]
@@ -0,0 +1,93 @@
+"""
+This module contains tests for traversals in the game.traversal module.
+"""
+import networkx as nx  # type: ignore
+import pytest
+from hypothesis import given, strategies as st
+
+from database import CSRGraph
+from .test_pathfinding import nx_graph_and_two_nodes
+from ..traversal import (
+    MAX_SOURCES,
+    ROOT,
+    UNREACHED,
+    LevelStats,
+    direction_optimizing_bfs,
+    level_bfs,
+    multi_source_bfs,
+)
+
+pytestmark = [pytest.mark.game]
+
+
+def to_csr(graph: nx.DiGraph) -> CSRGraph:
+    """:return: the CSR representation of ``graph``"""
+    return CSRGraph.from_edges(graph.nodes, graph.edges)
+
+
+def depths(parents) -> dict[int, int]:
+    """:return: the depth of every reached node in the array-backed tree ``parents``"""
+    result: dict[int, int] = {}
+    for node in range(len(parents)):
+        depth, curr = 0, node
+        if parents[curr] == UNREACHED:
+            continue
+        while parents[curr] != ROOT:
+            curr = parents[curr]
+            depth += 1
+        result[node] = depth
+    return result
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False))
+def test_level_bfs_depths(inputs: tuple[nx.DiGraph, int, int]):
+    graph, src, _ = inputs
+    csr_graph = to_csr(graph)
+    parents = level_bfs(csr_graph, csr_graph.index_of(src))
+    for node, parent in enumerate(parents):
+        if parent not in (ROOT, UNREACHED):
+            assert (csr_graph.id_of(parent), csr_graph.id_of(node)) in graph.edges
+    expected = nx.single_source_shortest_path_length(graph, src)
+    assert {csr_graph.id_of(node): d for node, d in depths(parents).items()} == expected
+
+
+@given(inputs=nx_graph_and_two_nodes(connected=False), data=st.data())
+def test_multi_source_bfs_same_as_level_bfs(inputs: tuple[nx.DiGraph, int, int], data):
+    graph, _, _ = inputs
+    csr_graph = to_csr(graph)
+    sources = data.draw(
+        st.lists(st.integers(0, len(csr_graph) - 1), min_size=1, max_size=MAX_SOURCES)
+    )
+    all_distances, all_parents = multi_source_bfs(csr_graph, sources)
+    for src, distances, parents in zip(sources, all_distances, all_parents):
+        for node, parent in enumerate(parents):
+            if parent not in (ROOT, UNREACHED):
+                assert (csr_graph.id_of(parent), csr_graph.id_of(node)) in graph.edges
+        expected = depths(level_bfs(csr_graph, src))
+        assert depths(parents) == expected
+        assert {node: d for node, d in enumerate(distances) if d != UNREACHED} == expected
+
+
+@given(
+    inputs=nx_graph_and_two_nodes(connected=False),
+    alpha=st.sampled_from([0, 1, 14, 1e9]),
+    beta=st.sampled_from([1, 24, 1e9]),
+)
+def test_direction_optimizing_bfs_depths(
+    inputs: tuple[nx.DiGraph, int, int], alpha: float, beta: float
+):
+    graph, src, _ = inputs
+    csr_graph = to_csr(graph)
+    levels: list[LevelStats] = []
+    parents = direction_optimizing_bfs(
+        csr_graph, csr_graph.index_of(src), alpha=alpha, beta=beta, stats=levels
+    )
+    for node, parent in enumerate(parents):
+        if parent not in (ROOT, UNREACHED):
+            assert (csr_graph.id_of(parent), csr_graph.id_of(node)) in graph.edges
+    expected = nx.single_source_shortest_path_length(graph, src)
+    assert {csr_graph.id_of(node): d for node, d in depths(parents).items()} == expected
+    assert [level.depth for level in levels] == list(range(1, len(levels) + 1))
+    assert sum(level.frontier_size for level in levels) == len(expected) - 1
+    if alpha == 0:
+        assert not any(level.bottom_up for level in levels)
@@ -0,0 +1,66 @@
+"""
+This module contains tests for the cache of shortest-path trees in the game.tree_cache module.
+"""
+import pytest
+
+from database import CSRGraph
+from ..traversal import direction_optimizing_bfs
+from ..tree_cache import TreeCache
+
+pytestmark = [pytest.mark.game]
+
+GRAPH = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (2, 3), (3, 0)])
+TREE_BYTES = 4 * len(GRAPH)
+
+
+def test_tree_built_once():
+    tree_cache = TreeCache()
+    tree = tree_cache.tree(GRAPH, 0)
+    assert list(tree) == list(direction_optimizing_bfs(GRAPH, 0))
+    assert tree_cache.tree(GRAPH, 0) is tree
+    assert (tree_cache.stats.hits, tree_cache.stats.misses) == (1, 1)
+    assert tree_cache.nbytes == TREE_BYTES
+
+
+def test_evicts_least_recently_used():
+    tree_cache = TreeCache(max_bytes=2 * TREE_BYTES)
+    tree_cache.tree(GRAPH, 0)
+    tree_cache.tree(GRAPH, 1)
+    tree_cache.tree(GRAPH, 0)
+    tree_cache.tree(GRAPH, 2)
+    assert tree_cache.stats.evictions == 1
+    assert tree_cache.get(GRAPH, 1) is None
+    assert tree_cache.get(GRAPH, 0) is not None and tree_cache.get(GRAPH, 2) is not None
+    assert tree_cache.nbytes == 2 * TREE_BYTES
+
+
+def test_skips_trees_over_budget():
+    tree_cache = TreeCache(max_bytes=TREE_BYTES - 1)
+    tree_cache.tree(GRAPH, 0)
+    assert len(tree_cache) == 0 and tree_cache.nbytes == 0
+
+
+def test_cleared_by_other_graph():
+    tree_cache = TreeCache()
+    tree_cache.tree(GRAPH, 0)
+    other_graph = CSRGraph.from_edges(range(4), [(0, 1)])
+    assert tree_cache.get(other_graph, 0) is None
+    expected = direction_optimizing_bfs(other_graph, 0)
+    assert list(tree_cache.tree(other_graph, 0)) == list(expected)
+
+
+def test_repeated_tree_built_on_second_use():
+    tree_cache = TreeCache()
+    assert tree_cache.repeated_tree(GRAPH, 0) is None
+    assert len(tree_cache) == 0
+    tree = tree_cache.repeated_tree(GRAPH, 0)
+    assert tree is not None and list(tree) == list(direction_optimizing_bfs(GRAPH, 0))
+    assert tree_cache.repeated_tree(GRAPH, 0) is tree
+
+
+def test_repeated_tree_forgets_oldest_sources():
+    tree_cache = TreeCache(max_sources=1)
+    tree_cache.repeated_tree(GRAPH, 0)
+    tree_cache.repeated_tree(GRAPH, 1)
+    assert tree_cache.repeated_tree(GRAPH, 0) is None
+    assert tree_cache.repeated_tree(GRAPH, 0) is not None
@@ -5,8 +5,17 @@ import pytest
 from hypothesis import given, reject, strategies as st
 from sqlalchemy.orm import Session
 
-from database import Article
-from game.utilities import id_to_title, title_to_id
+from database import Article, GraphSnapshot, Redirect
+from database.snapshot import build_snapshot
+from game.utilities import (
+    TitleIndex,
+    get_title_index,
+    id_to_title,
+    ids_for_titles,
+    normalize_title,
+    title_to_id,
+    titles_for_ids,
+)
 from .utilities import db_safe_ints, session_scope
 
 pytestmark = [pytest.mark.game]
@@ -75,3 +84,90 @@ def test_id_to_title_no_matches(article_id: int):
             pass
         else:
             reject()
+
+
+@given(title=st.text())
+def test_normalize_title_idempotent(title: str):
+    assert normalize_title(normalize_title(title)) == normalize_title(title)
+
+
+def test_title_to_id_normalized():
+    with session_scope() as db_conn:
+        add_article(db_conn, 1, "Albert Einstein")
+        add_article(db_conn, 2, "iPhone")
+        add_article(db_conn, 3, "IPhone")
+        assert title_to_id(db_conn, " albert_Einstein ") == 1
+        assert title_to_id(db_conn, "iPhone") == 2
+        assert title_to_id(db_conn, "IPhone") == 3
+        titles = TitleIndex.from_db(db_conn)
+        assert len(titles) == 1
+        assert titles.get("albert  Einstein") == 1
+        assert titles.get("iPhone") is None
+        assert title_to_id(db_conn, "albert Einstein", titles) == 1
+        assert title_to_id(db_conn, "iPhone", titles) == 2
+
+
+def test_bulk_lookups_same_as_single(tmp_path):
+    snapshot_path = str(tmp_path / "test.snapshot")
+    with session_scope() as db_conn:
+        add_article(db_conn, 1, "Albert Einstein")
+        add_article(db_conn, 2, "Zürich")
+        build_snapshot(db_conn, snapshot_path)
+        add_article(db_conn, 3, "iPhone")
+        snapshot = GraphSnapshot(snapshot_path)
+        try:
+            ids = [3, 1, 2, 1]
+            expected = [id_to_title(db_conn, article_id) for article_id in ids]
+            assert titles_for_ids(db_conn, ids) == expected
+            assert titles_for_ids(db_conn, ids, snapshot) == expected
+            assert ids_for_titles(db_conn, expected) == ids
+            assert ids_for_titles(db_conn, ["albert_Einstein", "iPhone"]) == [1, 3]
+            with pytest.raises(ValueError):
+                titles_for_ids(db_conn, [1, 4], snapshot)
+            with pytest.raises(ValueError):
+                ids_for_titles(db_conn, ["Zürich", "Bern"])
+        finally:
+            snapshot.close()
+
+
+def test_bulk_lookups_chunked():
+    with session_scope() as db_conn:
+        db_conn.add_all(Article(id=i, title=f"Article {i}") for i in range(1, 2001))
+        db_conn.commit()
+        ids = list(range(2000, 0, -1))
+        titles = [f"Article {i}" for i in ids]
+        assert titles_for_ids(db_conn, ids) == titles
+        assert ids_for_titles(db_conn, titles) == ids
+
+
+def test_title_index_per_snapshot(tmp_path):
+    first_path = str(tmp_path / "first.snapshot")
+    second_path = str(tmp_path / "second.snapshot")
+    with session_scope() as db_conn:
+        add_article(db_conn, 1, "Albert Einstein")
+        build_snapshot(db_conn, first_path)
+        add_article(db_conn, 2, "Zürich")
+        build_snapshot(db_conn, second_path)
+    first = GraphSnapshot(first_path)
+    try:
+        assert get_title_index(first) is get_title_index(first)
+        assert get_title_index(first).get("Zürich") is None
+    finally:
+        first.close()
+    del first
+    second = GraphSnapshot(second_path)
+    try:
+        assert get_title_index(second).get("Zürich") == 2
+    finally:
+        second.close()
+
+
+def test_title_to_id_redirect():
+    with session_scope() as db_conn:
+        add_article(db_conn, 1, "Albert Einstein")
+        add_article(db_conn, 2, "Einstein")
+        db_conn.add(Redirect(id=3, title="Einstein", target=2))
+        db_conn.add(Redirect(id=4, title="A. Einstein", target=1))
+        db_conn.commit()
+        assert title_to_id(db_conn, "Einstein") == 2
+        assert ids_for_titles(db_conn, ["a._Einstein", "Albert Einstein"]) == [1, 1]
@@ -0,0 +1,337 @@
+"""
+This module contains traversals of the in-memory article graph which work on dense node
+indices and array-backed parent mappings, rather than on article ids and dictionaries.
+"""
+from array import array
+from dataclasses import dataclass
+from itertools import compress
+from operator import not_
+from typing import Collection, Optional, Sequence, cast
+
+from database import CSRGraph
+from .limits import SearchLimits
+
+__all__ = [
+    "ROOT",
+    "UNREACHED",
+    "MAX_SOURCES",
+    "DEFAULT_ALPHA",
+    "DEFAULT_BETA",
+    "LevelStats",
+    "level_bfs",
+    "direction_optimizing_bfs",
+    "bfs_distances",
+    "multi_source_bfs",
+]
+
+# sentinel values used in place of parent indices or distances by array-backed mappings
+ROOT = -1
+UNREACHED = -2
+
+# largest number of sources multi_source_bfs advances together, one per bit of a machine word
+MAX_SOURCES = 64
+
+# direction_optimizing_bfs switches to bottom-up steps once the links leaving the frontier
+# outnumber 1 / DEFAULT_ALPHA of the links entering unvisited nodes, and back to top-down steps
+# once the frontier holds fewer than 1 / DEFAULT_BETA of all nodes
+DEFAULT_ALPHA = 14
+DEFAULT_BETA = 24
+
+
+@dataclass
+class LevelStats:
+    """Counters describing the expansion of one level of a breadth-first search."""
+
+    depth: int
+    # whether the level was found from the frontier's out-links or unvisited nodes' in-links
+    bottom_up: bool
+    frontier_size: int
+    # number of links leaving the frontier
+    frontier_links: int
+    # number of links examined to find the next level
+    links_checked: int
+
+
+def level_bfs(
+    graph: CSRGraph,
+    src: int,
+    targets: Optional[Collection[int]] = None,
+    limits: Optional[SearchLimits] = None,
+) -> array:
+    """
+    Find a shortest path from node ``src`` to all other reachable nodes of ``graph``, expanding
+    one whole level of the search at a time. If ``targets`` are provided, the search stops after
+    the level in which the last of them is reached.
+
+    Each level gathers the out-links of the entire frontier with bulk array copies, masks out
+    links to visited nodes, and assigns parents for the whole next frontier at once. Work done
+    per link stays inside C-level iterators, and no per-node containers are allocated.
+
+    :param graph: article graph
+    :param src: dense index of the node to start from
+    :param targets: dense indices of the nodes to find shortest paths to, or None for all nodes
+    :param limits: if provided, checked before expanding each level
+    :return: parent of every node in a shortest-path tree rooted at src, with ROOT for src
+            itself and UNREACHED for nodes which src cannot reach or which were not reached
+            before all targets were
+
+    >>> graph = CSRGraph.from_edges(range(5), [(0, 1), (0, 2), (1, 3), (2, 3), (4, 0)])
+    >>> list(level_bfs(graph, 0))
+    [-1, 0, 0, 2, -2]
+    >>> list(level_bfs(graph, 0, targets=[2]))
+    [-1, 0, 0, -2, -2]
+    """
+    offsets = graph.fwd_offsets
+    target_bytes = _target_bytes(graph.fwd_targets)
+    parents = array("i", [UNREACHED]) * len(graph)
+    visited = bytearray(len(graph))
+    parents[src] = ROOT
+    visited[src] = 1
+    remaining = None if targets is None else set(targets) - {src}
+    frontier = array("i", [src])
+    while frontier and (remaining is None or remaining):
+        if limits is not None:
+            limits.expand(len(frontier))
+        linked = array("i")
+        linked_from = array("i")
+        for node in frontier:
+            start, end = offsets[node], offsets[node + 1]
+            linked.frombytes(target_bytes[start * linked.itemsize : end * linked.itemsize])
+            linked_from.extend(array("i", [node]) * (end - start))
+        unvisited = map(not_, map(visited.__getitem__, linked))
+        level_parents = dict(compress(zip(linked, linked_from), unvisited))
+        frontier = array("i", level_parents)
+        for node, parent in level_parents.items():
+            parents[node] = parent
+            visited[node] = 1
+        if remaining is not None:
+            remaining.difference_update(frontier)
+    return parents
+
+
+def _target_bytes(targets: Sequence[int]) -> memoryview:
+    """:return: the raw bytes of ``targets``, which a CSRGraph holds as an array or a mapping"""
+    return memoryview(cast(array, targets)).cast("B")
+
+
+def direction_optimizing_bfs(
+    graph: CSRGraph,
+    src: int,
+    alpha: float = DEFAULT_ALPHA,
+    beta: float = DEFAULT_BETA,
+    stats: Optional[list[LevelStats]] = None,
+    limits: Optional[SearchLimits] = None,
+) -> array:
+    """
+    Find a shortest path from node ``src`` to all other reachable nodes of ``graph``, choosing
+    for each level whether to expand it top-down or bottom-up, as described by Beamer et al. in
+    "Direction-Optimizing Breadth-First Search".
+
+    A top-down step follows the out-links of every frontier node, as ``level_bfs`` does. A
+    bottom-up step instead scans the in-links of every unvisited node and stops at the first
+    link from the frontier, which checks far fewer links once the frontier covers most of the
+    graph. The search steps bottom-up while the links leaving the frontier outnumber the links
+    entering unvisited nodes divided by alpha, until the frontier holds fewer than
+    ``len(graph) / beta`` nodes.
+
+    :param graph: article graph
+    :param src: dense index of the node to start from
+    :param alpha: how large the frontier's links must grow to switch to bottom-up steps
+    :param beta: how small the frontier must shrink to switch back to top-down steps
+    :param stats: if provided, extended with the statistics of each level of the search
+    :param limits: if provided, checked before expanding each level
+    :return: parent of every node in a shortest-path tree rooted at src, in the format of
+            ``level_bfs``
+
+    >>> graph = CSRGraph.from_edges(range(5), [(0, 1), (0, 2), (1, 3), (2, 3), (4, 0)])
+    >>> levels = []
+    >>> list(direction_optimizing_bfs(graph, 0, stats=levels))
+    [-1, 0, 0, 1, -2]
+    >>> [(level.depth, level.bottom_up, level.frontier_size) for level in levels]
+    [(1, True, 2), (2, True, 1), (3, True, 0)]
+    >>> list(direction_optimizing_bfs(graph, 0, alpha=0))
+    [-1, 0, 0, 2, -2]
+    """
+    n = len(graph)
+    fwd_offsets, rev_offsets = graph.fwd_offsets, graph.rev_offsets
+    parents = array("i", [UNREACHED]) * n
+    parents[src] = ROOT
+    frontier = [src]
+    # number of links entering nodes which have not been visited
+    unvisited_links = graph.num_edges - (rev_offsets[src + 1] - rev_offsets[src])
+    bottom_up = False
+    depth = 0
+    while frontier:
+        frontier_links = sum(fwd_offsets[node + 1] - fwd_offsets[node] for node in frontier)
+        if bottom_up:
+            bottom_up = len(frontier) * beta >= n
+        else:
+            bottom_up = frontier_links * alpha > unvisited_links
+        depth += 1
+        if limits is not None:
+            limits.expand(len(frontier))
+        if bottom_up:
+            frontier, checked = _bottom_up_step(graph, frontier, parents)
+        else:
+            frontier, checked = _top_down_step(graph, frontier, parents)
+        if stats is not None:
+            stats.append(LevelStats(depth, bottom_up, len(frontier), frontier_links, checked))
+        unvisited_links -= sum(rev_offsets[node + 1] - rev_offsets[node] for node in frontier)
+    return parents
+
+
+def _top_down_step(
+    graph: CSRGraph, frontier: list[int], parents: array
+) -> tuple[list[int], int]:
+    """
+    Assign parents to the nodes which the out-links of ``frontier`` reach first, gathering
+    links in bulk as ``level_bfs`` does.
+
+    :return: the next frontier, and the number of links checked
+    """
+    offsets = graph.fwd_offsets
+    target_bytes = _target_bytes(graph.fwd_targets)
+    linked = array("i")
+    linked_from = array("i")
+    for node in frontier:
+        start, end = offsets[node], offsets[node + 1]
+        linked.frombytes(target_bytes[start * linked.itemsize : end * linked.itemsize])
+        linked_from.extend(array("i", [node]) * (end - start))
+    unvisited = map((UNREACHED).__eq__, map(parents.__getitem__, linked))
+    level_parents = dict(compress(zip(linked, linked_from), unvisited))
+    for node, parent in level_parents.items():
+        parents[node] = parent
+    return list(level_parents), len(linked)
+
+
+def _bottom_up_step(
+    graph: CSRGraph, frontier: list[int], parents: array
+) -> tuple[list[int], int]:
+    """
+    Assign each unvisited node the first node of ``frontier`` among the nodes linking to it.
+
+    :return: the next frontier, and the number of links checked
+    """
+    in_frontier = bytearray(len(graph))
+    for node in frontier:
+        in_frontier[node] = 1
+    next_frontier = []
+    checked = 0
+    for node in compress(range(len(graph)), map((UNREACHED).__eq__, parents)):
+        for linked in graph.in_neighbors(node):
+            checked += 1
+            if in_frontier[linked]:
+                parents[node] = linked
+                next_frontier.append(node)
+                break
+    return next_frontier, checked
+
+
+def tree_path(parents: Sequence[int], dst: int) -> Optional[list[int]]:
+    """
+    :param parents: parent of every node in a shortest-path tree, as ``level_bfs`` returns
+    :param dst: dense index of the node to find a path to
+    :return: the path from the root of the tree to dst, or None if dst is not in the tree
+
+    >>> tree_path([-1, 0, 0, 2, -2], 3), tree_path([-1, 0, 0, 2, -2], 4)
+    ([0, 2, 3], None)
+    """
+    if parents[dst] == UNREACHED:
+        return None
+    path = [dst]
+    while parents[path[-1]] != ROOT:
+        path.append(parents[path[-1]])
+    return path[::-1]
+
+
+def bfs_distances(graph: CSRGraph, src: int, reverse: bool = False) -> array:
+    """
+    Find the number of links on a shortest path from node ``src`` to every node of ``graph``,
+    or from every node to ``src`` if ``reverse`` is true.
+
+    :param graph: article graph
+    :param src: dense index of the node to start from
+    :param reverse: if true, follow links backwards
+    :return: distance of every node from src, with UNREACHED for nodes src cannot reach
+
+    >>> graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (3, 0)])
+    >>> list(bfs_distances(graph, 0)), list(bfs_distances(graph, 0, reverse=True))
+    ([0, 1, 2, -2], [0, -2, -2, 1])
+    """
+    offsets, targets = (
+        (graph.rev_offsets, graph.rev_targets)
+        if reverse
+        else (graph.fwd_offsets, graph.fwd_targets)
+    )
+    target_bytes = _target_bytes(targets)
+    distances = array("i", [UNREACHED]) * len(graph)
+    distances[src] = 0
+    frontier = array("i", [src])
+    depth = 0
+    while frontier:
+        depth += 1
+        linked = array("i")
+        for node in frontier:
+            start, end = offsets[node], offsets[node + 1]
+            linked.frombytes(target_bytes[start * linked.itemsize : end * linked.itemsize])
+        unvisited = map((UNREACHED).__eq__, map(distances.__getitem__, linked))
+        frontier = array("i", dict.fromkeys(compress(linked, unvisited)))
+        for node in frontier:
+            distances[node] = depth
+    return distances
+
+
+def multi_source_bfs(
+    graph: CSRGraph, sources: Sequence[int]
+) -> tuple[list[array], list[array]]:
+    """
+    Find a shortest path from each node in ``sources`` to all other reachable nodes of
+    ``graph``, with a single traversal which advances the searches from every source together.
+
+    Each node holds a word with one bit per source in which it has been seen, and the frontier
+    maps nodes to the bits of the sources which reached them in the last level. Expanding a
+    frontier node once propagates all of its bits, so nodes reached by many sources are only
+    expanded once per level rather than once per source.
+
+    :param graph: article graph
+    :param sources: dense indices of the nodes to start from
+    :return: for each source, the distance of every node from it and the parent of every node in
+            a shortest-path tree rooted at it, in the format of ``bfs_distances`` and
+            ``level_bfs`` respectively
+    :raises ValueError: if there are more than MAX_SOURCES sources
+
+    >>> graph = CSRGraph.from_edges(range(4), [(0, 1), (1, 2), (3, 0)])
+    >>> distances, parents = multi_source_bfs(graph, [0, 3])
+    >>> [list(d) for d in distances], [list(p) for p in parents]
+    ([[0, 1, 2, -2], [1, 2, 3, 0]], [[-1, 0, 1, -2], [3, 0, 1, -1]])
+    """
+    if len(sources) > MAX_SOURCES:
+        raise ValueError(f"Cannot search from more than {MAX_SOURCES} sources at once")
+    distances = [array("i", [UNREACHED]) * len(graph) for _ in sources]
+    parents = [array("i", [UNREACHED]) * len(graph) for _ in sources]
+    seen = array("Q", [0]) * len(graph)
+    frontier: dict[int, int] = {}
+    for bit, src in enumerate(sources):
+        seen[src] |= 1 << bit
+        frontier[src] = frontier.get(src, 0) | 1 << bit
+        distances[bit][src] = 0
+        parents[bit][src] = ROOT
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier: dict[int, int] = {}
+        for node, bits in frontier.items():
+            for linked in graph.out_neighbors(node):
+                new = bits & ~seen[linked]
+                if not new:
+                    continue
+                seen[linked] |= new
+                next_frontier[linked] = next_frontier.get(linked, 0) | new
+                while new:
+                    lowest = new & -new
+                    bit = lowest.bit_length() - 1
+                    distances[bit][linked] = depth
+                    parents[bit][linked] = node
+                    new ^= lowest
+        frontier = next_frontier
+    return distances, parents
@@ -0,0 +1,172 @@
+"""
+This module contains a process-level cache of shortest-path trees from popular source articles,
+so that repeated queries from the same source become walks up an already-built tree.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from database import CSRGraph
+from .limits import SearchLimits
+from .traversal import direction_optimizing_bfs
+
+__all__ = [
+    "DEFAULT_TREE_CACHE_BYTES",
+    "DEFAULT_TREE_CACHE_SOURCES",
+    "CacheStats",
+    "TreeCache",
+    "get_tree_cache",
+]
+
+# total size of the trees the process-level cache holds before evicting the least recent
+DEFAULT_TREE_CACHE_BYTES = 256 << 20
+# number of sources without a cached tree the cache remembers having been asked for
+DEFAULT_TREE_CACHE_SOURCES = 4096
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a cache has been used."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class TreeCache:
+    """
+    A least-recently-used cache of the shortest-path trees of a graph, keyed by the id of the
+    source article of each tree and bounded by the total size of the trees.
+
+    Each tree is the array of parent indices ``direction_optimizing_bfs`` returns, taking four
+    bytes per article. Trees belong to the graph they were built from, and the cache is emptied
+    when it is used with a different graph.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_TREE_CACHE_BYTES,
+        max_sources: int = DEFAULT_TREE_CACHE_SOURCES,
+    ) -> None:
+        """
+        :param max_bytes: largest total size of the cached trees, in bytes
+        :param max_sources: largest number of uncached sources remembered by ``repeated_tree``
+        """
+        self.max_bytes = max_bytes
+        self.max_sources = max_sources
+        self.nbytes = 0
+        self.stats = CacheStats()
+        self._graph: Optional[CSRGraph] = None
+        self._trees: OrderedDict[int, array] = OrderedDict()
+        self._sources: OrderedDict[int, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def get(self, graph: CSRGraph, src_id: int) -> Optional[array]:
+        """
+        :param graph: article graph
+        :param src_id: id of the source article of the tree
+        :return: the cached shortest-path tree of graph from src_id, or None if not cached
+        """
+        with self._lock:
+            self._use_graph(graph)
+            parents = self._trees.get(src_id)
+            if parents is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._trees.move_to_end(src_id)
+            return parents
+
+    def tree(
+        self, graph: CSRGraph, src_id: int, limits: Optional[SearchLimits] = None
+    ) -> array:
+        """
+        :param graph: article graph
+        :param src_id: id of the source article of the tree
+        :param limits: if provided, bounds the work done to build the tree if not cached
+        :return: the shortest-path tree of graph from src_id, built and cached if not cached
+        :raises SearchCutOff: if building the tree reaches any of its limits, in which case
+                              nothing is cached
+        """
+        parents = self.get(graph, src_id)
+        if parents is None:
+            parents = direction_optimizing_bfs(graph, graph.index_of(src_id), limits=limits)
+            self.put(graph, src_id, parents)
+        return parents
+
+    def repeated_tree(
+        self, graph: CSRGraph, src_id: int, limits: Optional[SearchLimits] = None
+    ) -> Optional[array]:
+        """
+        Like ``tree``, but only build a tree the second time a source without a cached tree is
+        asked for, so that sources used once do not pay for a search of the whole graph.
+
+        :param graph: article graph
+        :param src_id: id of the source article of the tree
+        :param limits: if provided, bounds the work done to build the tree if not cached
+        :return: the shortest-path tree of graph from src_id, or None if it is not cached and
+                 src_id has not been asked for since the cache last built a tree from it
+        :raises SearchCutOff: if building the tree reaches any of its limits, in which case
+                              nothing is cached
+        """
+        parents = self.get(graph, src_id)
+        if parents is not None:
+            return parents
+        with self._lock:
+            if src_id not in self._sources:
+                self._sources[src_id] = None
+                while len(self._sources) > self.max_sources:
+                    self._sources.popitem(last=False)
+                return None
+            del self._sources[src_id]
+        parents = direction_optimizing_bfs(graph, graph.index_of(src_id), limits=limits)
+        self.put(graph, src_id, parents)
+        return parents
+
+    def put(self, graph: CSRGraph, src_id: int, parents: array) -> None:
+        """
+        Cache ``parents`` as the shortest-path tree of ``graph`` from ``src_id``, evicting the
+        least recently used trees until it fits. Trees larger than the whole budget are not
+        cached.
+        """
+        size = len(parents) * parents.itemsize
+        with self._lock:
+            self._use_graph(graph)
+            if size > self.max_bytes:
+                return
+            replaced = self._trees.pop(src_id, None)
+            if replaced is not None:
+                self.nbytes -= len(replaced) * replaced.itemsize
+            while self._trees and self.nbytes + size > self.max_bytes:
+                _, evicted = self._trees.popitem(last=False)
+                self.nbytes -= len(evicted) * evicted.itemsize
+                self.stats.evictions += 1
+            self._trees[src_id] = parents
+            self.nbytes += size
+
+    def clear(self) -> None:
+        """Remove every tree from the cache."""
+        with self._lock:
+            self._trees.clear()
+            self._sources.clear()
+            self.nbytes = 0
+
+    def _use_graph(self, graph: CSRGraph) -> None:
+        if graph is not self._graph:
+            self._trees.clear()
+            self._sources.clear()
+            self.nbytes = 0
+            self._graph = graph
+
+
+_tree_cache = TreeCache()
+
+
+def get_tree_cache() -> TreeCache:
+    """Return the tree cache shared by the whole process."""
+    return _tree_cache
@@ -2,30 +2,236 @@
 This module contains utilities used for retrieving Articles from the database
 given only a single column value for a row.
 """
-from typing import Optional
+import re
+import weakref
+from typing import Iterable, Optional, Sequence, cast
 
+from sqlalchemy import Column, select
 from sqlalchemy.orm import Session
 
-from database import Article
+from database import Article, GraphSnapshot, Redirect
+from database.frontier import DEFAULT_CHUNK_SIZE
 
-__all__ = ["title_to_id", "id_to_title"]
+__all__ = [
+    "normalize_title",
+    "TitleIndex",
+    "get_title_index",
+    "title_to_id",
+    "id_to_title",
+    "ids_for_titles",
+    "titles_for_ids",
+]
 
+_WHITESPACE = re.compile(r"[\s_]+")
 
-def title_to_id(db: Session, article_title: str) -> int:
+_title_indexes: "weakref.WeakKeyDictionary[GraphSnapshot, TitleIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize ``title`` the way Wikipedia does when resolving links, so that the ways players
+    type a title all map to the title the article is stored under.
+
+    :param title: title as typed
+    :return: title with underscores and runs of whitespace replaced by single spaces, leading
+            and trailing whitespace removed, and its first letter in upper case
+
+    >>> normalize_title("  albert_Einstein ")
+    'Albert Einstein'
+    >>> normalize_title("iPhone")
+    'IPhone'
+    """
+    title = _WHITESPACE.sub(" ", title).strip()
+    return title[:1].upper() + title[1:]
+
+
+class TitleIndex:
+    """
+    An in-memory map from the normalized titles of articles to their ids.
+
+    Titles which normalize to the title of more than one article are not held, so that
+    lookups of them fall back to the database and fail as ambiguous.
+    """
+
+    def __init__(self, articles: Iterable[tuple[int, str]]) -> None:
+        """
+        :param articles: id and title of each article
+        """
+        self._ids: dict[str, int] = {}
+        ambiguous: set[str] = set()
+        for article_id, title in articles:
+            normalized = normalize_title(title)
+            if normalized in self._ids and self._ids[normalized] != article_id:
+                ambiguous.add(normalized)
+            self._ids[normalized] = article_id
+        for normalized in ambiguous:
+            del self._ids[normalized]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "TitleIndex":
+        """:return: the index of every article in the database which session ``db`` accesses"""
+        return cls(
+            (article_id, title)
+            for article_id, title in db.execute(select([Article.id, Article.title]))
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GraphSnapshot) -> "TitleIndex":
+        """:return: the index of every article in ``snapshot``"""
+        graph = snapshot.graph
+        return cls((graph.id_of(i), snapshot.title(i)) for i in range(len(graph)))
+
+    def get(self, article_title: str) -> Optional[int]:
+        """
+        :param article_title: title of an article, as typed
+        :return: the id of the only article whose title normalizes to the same title as
+                article_title, or None if there is no such article
+        """
+        return self._ids.get(normalize_title(article_title))
+
+
+def get_title_index(snapshot: GraphSnapshot) -> TitleIndex:
+    """
+    Return the title index of the articles in ``snapshot``, building it on first use and
+    sharing it across the process for as long as the snapshot stays open.
+
+    Indexes are keyed on the snapshot itself rather than its id, so that the index of a
+    snapshot which has been collected is never returned for one reusing its id.
+    """
+    if snapshot not in _title_indexes:
+        _title_indexes.clear()
+        _title_indexes[snapshot] = TitleIndex.from_snapshot(snapshot)
+    return _title_indexes[snapshot]
+
+
+def title_to_id(db: Session, article_title: str, titles: Optional[TitleIndex] = None) -> int:
     """
     Map titles of articles to their corresponding ID in the provided database.
 
+    A title matches an article stored under exactly that title or, failing that, under the
+    normalized title, as ``normalize_title`` returns. Titles matching no article match the
+    article which a redirect with that title leads to.
+
     :param db: database session
     :param article_title: title of the article to find the id of
+    :param titles: index of the titles in the database; if it holds article_title, the id is
+                   read from the index instead of the database
     :return: the id corresponding to the article uniquely named article_name
     :raises ValueError: if n articles have the title article_title for some n != 1
     """
-    db_articles: list[Article] = db.query(Article).filter(Article.title == article_title).all()
-    if not db_articles:
+    return ids_for_titles(db, [article_title], titles)[0]
+
+
+def ids_for_titles(
+    db: Session, article_titles: Sequence[str], titles: Optional[TitleIndex] = None
+) -> list[int]:
+    """
+    Map titles of articles to their ids as ``title_to_id`` does, querying the titles which are
+    not in ``titles``, and then the redirects of any not matching an article, in chunks of
+    DEFAULT_CHUNK_SIZE titles.
+
+    :param db: database session
+    :param article_titles: titles of the articles to find the ids of
+    :param titles: index of the titles in the database
+    :return: the id of the article matching each title, in order
+    :raises ValueError: if n articles match any title for some n != 1
+    """
+    ids: list[Optional[int]] = [
+        None if titles is None else titles.get(article_title)
+        for article_title in article_titles
+    ]
+    missing = [title for article_id, title in zip(ids, article_titles) if article_id is None]
+    if missing:
+        matches = _title_matches(db, Article.id, Article.title, missing)
+        unmatched = [title for title in missing if not _matches_of(title, matches)]
+        redirects = (
+            _title_matches(db, Redirect.target, Redirect.title, unmatched) if unmatched else {}
+        )
+        for i, article_title in enumerate(article_titles):
+            if ids[i] is None:
+                found = _matches_of(article_title, matches)
+                found = found or _matches_of(article_title, redirects)
+                ids[i] = _only_match(article_title, found)
+    return cast(list[int], ids)
+
+
+def _title_matches(
+    db: Session,
+    id_column: Column,
+    title_column: Column,
+    article_titles: list[str],
+) -> dict[str, list[int]]:
+    """
+    :return: the ids in id_column of the rows whose title_column is any of article_titles or
+            their normalized titles, keyed by title
+    """
+    candidates = list(
+        set(article_titles) | {normalize_title(title) for title in article_titles}
+    )
+    matches: dict[str, list[int]] = {}
+    for start in range(0, len(candidates), DEFAULT_CHUNK_SIZE):
+        chunk = candidates[start : start + DEFAULT_CHUNK_SIZE]
+        for article_id, title in db.execute(
+            select([id_column, title_column]).where(title_column.in_(chunk))
+        ):
+            matches.setdefault(title, []).append(article_id)
+    return matches
+
+
+def _matches_of(article_title: str, matches: dict[str, list[int]]) -> list[int]:
+    """:return: the ids matching article_title exactly if any, or its normalized title"""
+    return matches.get(article_title, []) or matches.get(normalize_title(article_title), [])
+
+
+def _only_match(article_title: str, article_ids: list[int]) -> int:
+    """
+    :return: the only id in article_ids, which are the ids of articles matching article_title
+    :raises ValueError: if article_ids does not hold exactly one id
+    """
+    if not article_ids:
         raise ValueError(f'No article with title "{article_title}" found in database')
-    if len(db_articles) > 1:
-        raise ValueError(f'Multiple articles found titled "{article_title}": {db_articles}')
-    return db_articles[0].id
+    if len(article_ids) > 1:
+        raise ValueError(f'Multiple articles found titled "{article_title}": {article_ids}')
+    return article_ids[0]
+
+
+def titles_for_ids(
+    db: Session, article_ids: Sequence[int], snapshot: Optional[GraphSnapshot] = None
+) -> list[str]:
+    """
+    Map ids of articles to their titles as ``id_to_title`` does, reading the titles of the
+    articles in ``snapshot`` from its memory-mapped title blob and querying the rest in chunks
+    of DEFAULT_CHUNK_SIZE ids.
+
+    :param db: database session
+    :param article_ids: ids of the articles to find the titles of
+    :param snapshot: snapshot of the article graph in the database
+    :return: the title of the article with each id, in order
+    :raises ValueError: if no article has one of the ids
+    """
+    found: dict[int, str] = {}
+    if snapshot is not None:
+        graph = snapshot.graph
+        for article_id in article_ids:
+            try:
+                found[article_id] = snapshot.title(graph.index_of(article_id))
+            except ValueError:
+                pass
+    missing = list(set(article_ids) - found.keys())
+    for start in range(0, len(missing), DEFAULT_CHUNK_SIZE):
+        chunk = missing[start : start + DEFAULT_CHUNK_SIZE]
+        found.update(
+            db.execute(select([Article.id, Article.title]).where(Article.id.in_(chunk))).all()
+        )
+    try:
+        return [found[article_id] for article_id in article_ids]
+    except KeyError as e:
+        raise ValueError(f"No article with id={e.args[0]} found in database") from e
 
 
 def id_to_title(db: Session, article_id: int) -> str: